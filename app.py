@@ -1,12 +1,25 @@
+"""Flask web app: uploads run as background jobs (core.jobs) and are polled by id.
+
+Serve it from ONE process (threads are fine): the job table is kept in
+memory, so with several workers a status poll can land on a process that
+never saw the job. ``FLASK_SECRET_KEY`` must be set, or sessions would not
+survive a restart.
+"""
+
 import os
+import time
+import uuid
 from pathlib import Path
-from flask import Flask, request, send_from_directory
+from flask import Flask, request, send_from_directory, jsonify, session, g, Response
 from werkzeug.utils import secure_filename
-from core.pipeline import run_pipeline
+from core.config import Config
+from core.jobs import JobManager, JobQueueFull
+from core.profiling import REGISTRY
+from core.incremental import reoptimise_run
+from core.result_store import is_run_key
 
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
-RESULTS_DIR = BASE_DIR / "results"
 WEB_DIR = BASE_DIR / "web"
 ALLOWED_EXTENSIONS = {"csv", "xls", "xlsx"}
 
@@ -16,6 +29,26 @@ app = Flask(
     template_folder=str(WEB_DIR)
 )
 
+app.secret_key = os.getenv("FLASK_SECRET_KEY")
+if not app.secret_key:
+    raise RuntimeError("FLASK_SECRET_KEY is not set")
+if int(os.getenv("WEB_CONCURRENCY") or 1) > 1:
+    raise RuntimeError("Run a single server process: job state is kept in memory (see core.jobs)")
+jobs = JobManager.from_config(Config())
+
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def _observe_latency(response):
+    start = getattr(g, "request_start", None)
+    if start is not None:
+        REGISTRY.observe("http_request_duration_seconds", time.perf_counter() - start,
+                         endpoint=request.url_rule.rule if request.url_rule else "unmatched",
+                         method=request.method, status=str(response.status_code))
+    return response
+
 def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -31,23 +64,60 @@ def upload_file():
     if file.filename == "":
         return "No selected file", 400
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
+        job_id = uuid.uuid4().hex
+        filename = f"{job_id}_{secure_filename(file.filename)}"
         DATA_DIR.mkdir(parents=True, exist_ok=True)
         file_path = DATA_DIR / filename
         file.save(file_path)
         try:
-            run_pipeline(file_path)
-        except Exception as e:
-            return f"Error while running pipeline: {e}", 500
-        url_file = RESULTS_DIR / "URL.txt"
-        if not url_file.exists():
-            return "Pipeline completed, but URL.txt not found", 500
-        return "OK", 200
+            jobs.submit(file_path, job_id=job_id, remove_input=True)
+        except JobQueueFull as e:
+            return str(e), 503
+        session["last_job"] = job_id
+        return jsonify({"job_id": job_id, "status_url": f"/jobs/{job_id}"}), 202
     return "File type not allowed", 400
 
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    status = jobs.status(job_id)
+    if status is None:
+        return "Unknown job", 404
+    return jsonify(status)
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return "Unknown job", 404
+    if job["state"] == "failed":
+        return f"Error while running pipeline: {job['error']}", 500
+    if job["state"] != "done":
+        return jsonify(jobs.status(job_id)), 202
+    return jsonify(job["result"])
+
+@app.route("/runs/<run_key>/delta", methods=["POST"])
+def update_run(run_key):
+    # body: {"add": [point, ...], "remove": [id, ...]} -> updated route stored as a new run
+    if not is_run_key(run_key):
+        return "Invalid run key", 400
+    body = request.get_json(silent=True) or {}
+    try:
+        res = reoptimise_run(jobs.store, run_key, body.get("add") or [], body.get("remove") or [], jobs.config)
+    except ValueError as e:
+        return str(e), 400
+    if res is None:
+        return "Unknown run", 404
+    key, route = res
+    return jsonify({"run_key": key, "result": route})
+
 @app.route("/last_url", methods=["GET"])
 def last_url():
-    url_file = RESULTS_DIR / "URL.txt"
+    # the map URL of ?job_id=..., or of this session's latest upload
+    job_id = request.args.get("job_id") or session.get("last_job")
+    job = jobs.get(job_id) if job_id else None
+    if job is None or job["state"] != "done":
+        return ("", 204)
+    url_file = Path(job["output_dir"]) / "URL.txt"
     if not url_file.exists():
         return ("", 204)
     with open(url_file, "r", encoding="utf-8") as f:
@@ -56,9 +126,15 @@ def last_url():
         return ("", 204)
     return url
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    # Prometheus text exposition: request and pipeline stage latency histograms
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/static/<path:filename>")
 def static_files(filename):
     return send_from_directory(WEB_DIR / "static", filename)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8001, debug=True)
+    # development server; see asgi.py for the production (ASGI) entry point
+    app.run(host="0.0.0.0", port=8001, debug=os.getenv("FLASK_DEBUG") == "1")
@@ -0,0 +1,274 @@
+"""ASGI version of the web app (FastAPI), for serving many clients from one process.
+
+Run with::
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8001
+
+It exposes the same routes as the Flask app in ``app.py`` plus
+``/jobs/<id>/events``, a Server-Sent Events stream of job status changes
+that ``web/static/main.js`` listens to instead of polling. Uploads are
+parsed as they arrive and written to ``data/`` chunk by chunk, so a large
+file is never held in memory. Pipelines run in the JobManager process
+pool; the remaining blocking work (hashing the upload, incremental
+re-optimisation, reading results) runs in the default thread executor, so
+the event loop only shuffles bytes and events.
+
+Keep ``--workers 1``: the job table lives in this process, so another
+worker would answer 404 for its jobs. ``FLASK_SECRET_KEY`` (shared with
+``app.py``) must be set for the session cookie; uploads are deleted when
+their job ends.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.middleware.sessions import SessionMiddleware
+from core.config import Config
+from core.jobs import JobManager, JobQueueFull
+from core.profiling import REGISTRY
+from core.incremental import reoptimise_run
+from core.result_store import is_run_key
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "data"
+WEB_DIR = BASE_DIR / "web"
+ALLOWED_EXTENSIONS = {"csv", "xls", "xlsx"}
+SSE_HEARTBEAT_S = 15.0
+
+SECRET_KEY = os.getenv("FLASK_SECRET_KEY")
+if not SECRET_KEY:
+    raise RuntimeError("FLASK_SECRET_KEY is not set")
+if int(os.getenv("WEB_CONCURRENCY") or 1) > 1:
+    raise RuntimeError("Run a single server process: job state is kept in memory (see core.jobs)")
+
+jobs = JobManager.from_config(Config())
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    yield
+    jobs.shutdown(wait=False)
+
+
+app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None, lifespan=_lifespan)
+app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
+app.mount("/static", StaticFiles(directory=str(WEB_DIR / "static")), name="static")
+
+
+def allowed_file(filename: str) -> bool:
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def safe_filename(filename: str) -> str:
+    # same idea as werkzeug's secure_filename: ASCII letters, digits, '.', '_' and '-' only
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", os.path.basename(filename.replace("\\", "/"))).strip("._")
+    return name or "upload"
+
+
+async def _blocking(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+@app.middleware("http")
+async def _observe_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    REGISTRY.observe("http_request_duration_seconds", time.perf_counter() - start,
+                     endpoint=getattr(route, "path", "unmatched"), method=request.method,
+                     status=str(response.status_code))
+    return response
+
+
+@app.get("/")
+async def index():
+    return FileResponse(WEB_DIR / "index.html")
+
+
+async def _stream_upload(request: Request, job_id: str):
+    """Parse a multipart body from the request stream, writing the 'file' part straight to disk.
+
+    Returns ``(path, original_name)``; ``path`` is None when there was no
+    usable file part. The body is consumed in transport-sized chunks.
+    """
+    try:
+        from python_multipart.multipart import MultipartParser, parse_options_header
+    except ImportError:  # python-multipart < 0.0.13
+        from multipart.multipart import MultipartParser, parse_options_header
+
+    ctype, params = parse_options_header(request.headers.get("content-type", ""))
+    if ctype != b"multipart/form-data" or b"boundary" not in params:
+        return None, None
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    state = {"field": b"", "value": b"", "headers": {}, "file": None, "path": None, "name": None}
+
+    def on_header_field(data, start, end):
+        state["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"] = state["value"] = b""
+
+    def on_headers_finished():
+        _, disp = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = disp.get(b"filename")
+        if disp.get(b"name") == b"file" and name and state["path"] is None:
+            name = name.decode("utf-8", "replace")
+            if allowed_file(name):
+                state["name"] = name
+                state["path"] = DATA_DIR / f"{job_id}_{safe_filename(name)}"
+                state["file"] = open(state["path"], "wb")
+        state["headers"] = {}
+
+    def on_part_data(data, start, end):
+        if state["file"] is not None:
+            state["file"].write(data[start:end])
+
+    def on_part_end():
+        if state["file"] is not None:
+            state["file"].close()
+            state["file"] = None
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_header_field": on_header_field, "on_header_value": on_header_value,
+        "on_header_end": on_header_end, "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data, "on_part_end": on_part_end,
+    })
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+    finally:
+        if state["file"] is not None:
+            state["file"].close()
+    return state["path"], state["name"]
+
+
+@app.post("/upload")
+async def upload_file(request: Request):
+    job_id = uuid.uuid4().hex
+    path, name = await _stream_upload(request, job_id)
+    if path is None:
+        return PlainTextResponse("No file part or file type not allowed", status_code=400)
+    try:
+        await _blocking(jobs.submit, path, job_id, True)
+    except JobQueueFull as e:
+        return PlainTextResponse(str(e), status_code=503)
+    request.session["last_job"] = job_id
+    return JSONResponse({"job_id": job_id, "status_url": f"/jobs/{job_id}",
+                         "events_url": f"/jobs/{job_id}/events"}, status_code=202)
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    status = jobs.status(job_id)
+    if status is None:
+        return PlainTextResponse("Unknown job", status_code=404)
+    return JSONResponse(status)
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """Server-Sent Events: one ``status`` event per state / stage change, closed when the job ends."""
+    if jobs.status(job_id) is None:
+        return PlainTextResponse("Unknown job", status_code=404)
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def listener(changed_id, status):
+        if changed_id == job_id:
+            loop.call_soon_threadsafe(queue.put_nowait, status)
+
+    jobs.add_listener(listener)
+
+    async def events():
+        try:
+            # current status first, so a job that finished before we subscribed still ends the stream
+            status = jobs.status(job_id)
+            while True:
+                if status is not None:
+                    yield f"event: status\ndata: {json.dumps(status)}\n\n"
+                    if status["state"] in ("done", "failed"):
+                        return
+                if await request.is_disconnected():
+                    return
+                try:
+                    status = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    status = None
+                    yield ": keep-alive\n\n"
+        finally:
+            jobs.remove_listener(listener)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        return PlainTextResponse("Unknown job", status_code=404)
+    if job["state"] == "failed":
+        return PlainTextResponse(f"Error while running pipeline: {job['error']}", status_code=500)
+    if job["state"] != "done":
+        return JSONResponse(jobs.status(job_id), status_code=202)
+    return JSONResponse(job["result"])
+
+
+@app.post("/runs/{run_key}/delta")
+async def update_run(run_key: str, request: Request):
+    # body: {"add": [point, ...], "remove": [id, ...]} -> updated route stored as a new run
+    if not is_run_key(run_key):
+        return PlainTextResponse("Invalid run key", status_code=400)
+    try:
+        body = await request.json()
+    except ValueError:
+        body = {}
+    body = body if isinstance(body, dict) else {}
+    try:
+        res = await _blocking(reoptimise_run, jobs.store, run_key, body.get("add") or [],
+                              body.get("remove") or [], jobs.config)
+    except ValueError as e:
+        return PlainTextResponse(str(e), status_code=400)
+    if res is None:
+        return PlainTextResponse("Unknown run", status_code=404)
+    key, route = res
+    return JSONResponse({"run_key": key, "result": route})
+
+
+@app.get("/last_url")
+async def last_url(request: Request, job_id: str = None):
+    # the map URL of ?job_id=..., or of this session's latest upload
+    job_id = job_id or request.session.get("last_job")
+    job = jobs.get(job_id) if job_id else None
+    if job is None or job["state"] != "done":
+        return Response(status_code=204)
+    url_file = Path(job["output_dir"]) / "URL.txt"
+    url = await _blocking(lambda: url_file.read_text(encoding="utf-8").strip() if url_file.exists() else "")
+    if not url:
+        return Response(status_code=204)
+    return PlainTextResponse(url)
+
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus text exposition: request and pipeline stage latency histograms
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("asgi:app", host="0.0.0.0", port=8001)
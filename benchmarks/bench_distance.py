@@ -0,0 +1,65 @@
+"""Benchmark: nested scalar ``haversine`` loops vs the vectorised matrix engine.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_distance --sizes 100 1000 5000
+
+The scalar loop is only timed on the first ``--loop-rows`` rows for large N
+and extrapolated linearly, otherwise N=5000 would take minutes.
+"""
+
+import argparse
+import time
+import numpy as np
+from core.utils import haversine
+from core.distance import haversine_matrix
+
+
+def random_points(n, seed=0):
+    # Rostov-on-Don bounding box
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(47.15, 47.32, n)
+    lon = rng.uniform(39.55, 39.85, n)
+    return lat, lon
+
+
+def loop_matrix(lat, lon, rows):
+    n = len(lat)
+    out = [[0.0]*n for _ in range(rows)]
+    for i in range(rows):
+        for j in range(n):
+            if i == j:
+                continue
+            out[i][j] = haversine(lon[i], lat[i], lon[j], lat[j])
+    return out
+
+
+def bench(n, loop_rows):
+    lat, lon = random_points(n)
+    lat_l, lon_l = lat.tolist(), lon.tolist()
+    rows = min(n, loop_rows)
+    t0 = time.perf_counter()
+    loop = loop_matrix(lat_l, lon_l, rows)
+    t_loop = (time.perf_counter() - t0) * n / rows
+    t0 = time.perf_counter()
+    vec = haversine_matrix(lat, lon)
+    t_vec = time.perf_counter() - t0
+    err = float(np.max(np.abs(vec[:rows] - np.array(loop))))
+    return t_loop, t_vec, err, rows < n
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    ap.add_argument('--loop-rows', type=int, default=200)
+    args = ap.parse_args()
+    print(f"{'N':>6} {'loop s':>10} {'numpy s':>10} {'speedup':>9} {'max err km':>11}")
+    for n in args.sizes:
+        t_loop, t_vec, err, extrapolated = bench(n, args.loop_rows)
+        mark = '*' if extrapolated else ' '
+        print(f"{n:>6} {t_loop:>9.3f}{mark} {t_vec:>10.4f} {t_loop / t_vec:>8.1f}x {err:>11.2e}")
+    print("* extrapolated from a row sample")
+
+
+if __name__ == '__main__':
+    main()
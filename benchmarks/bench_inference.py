@@ -0,0 +1,79 @@
+"""Benchmark: GNN inference latency per backend.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_inference --points 200 2000 --repeat 20
+
+The configured model is exported to a temporary directory in every format
+whose runtime is installed (npz always; TorchScript; ONNX with
+onnxruntime) and each backend scores the same graphs. Dense graphs use
+the inverse-distance matrix, ``--knn`` the sparse kNN graph. Reported are
+the median and p95 wall time per call after one warm-up call, and the
+largest score difference from the eager model.
+"""
+
+import argparse
+import importlib.util
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from benchmarks.bench_distance import random_points
+from core import inference
+from core.config import Config
+from core.distance import haversine_matrix, inverse_distance_adjacency
+from core.features import DEFAULT_FEATURES
+from core.model_registry import model_for_config
+from core.neighbors import knn_adjacency
+
+BACKENDS = (("torch", None, None), ("numpy", "npz", None), ("torchscript", "torchscript", None),
+            ("onnxruntime", "onnx", "onnxruntime"))
+
+
+def _time(fn, repeat):
+    fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return np.percentile(times, 50) * 1000, np.percentile(times, 95) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--points", type=int, nargs="+", default=[200, 2000])
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--knn", action="store_true")
+    ap.add_argument("--threads", type=int, default=None)
+    args = ap.parse_args()
+
+    base = Config()
+    base.INFERENCE_THREADS = args.threads
+    model = model_for_config(base, len(DEFAULT_FEATURES))
+    with tempfile.TemporaryDirectory() as tmp:
+        configs = {}
+        for kind, fmt, module in BACKENDS:
+            if module and importlib.util.find_spec(module) is None:
+                print(f"{kind:<12} skipped ({module} not installed)")
+                continue
+            config = Config()
+            config.INFERENCE_THREADS = args.threads
+            config.GNN_BACKEND = kind
+            if fmt:
+                config.GNN_EXPORT_PATH = str(inference.export_model(
+                    model, Path(tmp) / f"gnn{inference.EXPORT_FORMATS[fmt]}", fmt))
+            configs[kind] = config
+        for n in args.points:
+            lat, lon = random_points(n)
+            adj = knn_adjacency(lat, lon, k=8) if args.knn else inverse_distance_adjacency(haversine_matrix(lat, lon))
+            feats = np.column_stack([lat - lat.mean(), lon - lon.mean(), np.zeros(n), np.full(n, 10.0)])
+            ref = inference.predict(feats, adj, configs["torch"])
+            for kind, config in configs.items():
+                p50, p95 = _time(lambda: inference.predict(feats, adj, config), args.repeat)
+                diff = np.abs(inference.predict(feats, adj, config) - ref).max()
+                print(f"{n:>6} {kind:<12} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms  max |diff| {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: legacy row-wise input loading vs the typed columnar loader.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_load --rows 100000
+
+The legacy path is the old ``load_input``: ``pd.read_csv`` with default
+inference, a ``strptime`` per clock cell via ``.apply`` and one
+``iterrows`` pass to build the point dicts. The new path is
+``core.io.load_input`` (optionally chunked) followed by ``extract_points``.
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+import pandas as pd
+from benchmarks.bench_distance import random_points
+from core.io import load_input
+from core.pipeline import extract_points
+from core.utils import parse_clock
+
+HEADER = ("Номер объекта,Адрес объекта,Географическая широта,Географическая долгота,"
+          "Время начала рабочего дня,Время окончания рабочего дня,Время начала обеда,"
+          "Время окончания обеда,Уровень клиента\n")
+
+
+def write_rows(path, n):
+    lat, lon = random_points(n)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER)
+        for i in range(n):
+            f.write(f'{i},"г. Ростов-на-Дону, ул. Тестовая, д. {i}",{lat[i]:.6f},{lon[i]:.6f},'
+                    f'09:00,18:00,13:00,14:00,{"VIP" if i % 10 == 0 else "Standart"}\n')
+
+
+def legacy_load(path):
+    df = pd.read_csv(path).rename(columns={
+        'Номер объекта': 'id', 'Адрес объекта': 'address', 'Географическая широта': 'latitude',
+        'Географическая долгота': 'longitude', 'Уровень клиента': 'priority',
+        'Время начала рабочего дня': 'time_window_start', 'Время окончания рабочего дня': 'time_window_end',
+        'Время начала обеда': 'lunch_start', 'Время окончания обеда': 'lunch_end'})
+    for col in ('time_window_start', 'time_window_end', 'lunch_start', 'lunch_end'):
+        df['_' + col] = df[col].apply(parse_clock)
+    points = []
+    for _, row in df.iterrows():
+        points.append({"id": row.get("id"), "address": row.get("address"),
+                       "lat": float(row.get("latitude")), "lon": float(row.get("longitude")),
+                       "priority": row.get("priority"),
+                       "time_window_start": row.get("_time_window_start"),
+                       "time_window_end": row.get("_time_window_end"),
+                       "lunch_start": row.get("_lunch_start"), "lunch_end": row.get("_lunch_end")})
+    return points
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, elapsed, peak / 2 ** 20
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--chunk", type=int, default=20_000)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "points.csv"
+        write_rows(src, args.rows)
+        runs = [
+            ("legacy read_csv + apply + iterrows", lambda: legacy_load(src)),
+            ("columnar load_input", lambda: load_input(src)),
+            (f"columnar, {args.chunk}-row chunks", lambda: load_input(src, chunksize=args.chunk)),
+            ("columnar + extract_points", lambda: extract_points(load_input(src))),
+        ]
+        print(f"{args.rows} rows")
+        for name, fn in runs:
+            out, elapsed, peak = measure(fn)
+            n = len(out) if isinstance(out, list) else len(out["latitude"])
+            assert n == args.rows
+            print(f"{name:<38} {elapsed * 1000:9.1f} ms   peak {peak:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark: legacy full-recompute 2-opt vs the neighbour-list local search.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_local_search --sizes 100 1000 5000
+
+Both start from the same nearest-neighbour tour on synthetic points. The
+legacy ``_two_opt`` is O(N^3) per sweep, so it is skipped above
+``--legacy-max`` points.
+"""
+
+import argparse
+import time
+from core.distance import haversine_matrix
+from core.local_search import improve_tour
+from core.optimizer import _nearest_neighbor_order_from_matrix, _two_opt
+from core.distance import tour_distance
+from benchmarks.bench_distance import random_points
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    ap.add_argument('--legacy-max', type=int, default=300)
+    ap.add_argument('--time-budget', type=float, default=10.0)
+    ap.add_argument('--neighbors', type=int, default=10)
+    args = ap.parse_args()
+    print(f"{'N':>6} {'NN km':>10} {'legacy km':>10} {'legacy s':>9} {'new km':>10} {'new s':>8} {'moves':>7}")
+    for n in args.sizes:
+        lat, lon = random_points(n)
+        dist = haversine_matrix(lat, lon)
+        start = _nearest_neighbor_order_from_matrix(dist)
+        if n <= args.legacy_max:
+            t0 = time.perf_counter()
+            legacy = _two_opt(start, dist, max_iters=300)
+            legacy_s = f"{time.perf_counter() - t0:9.2f}"
+            legacy_km = f"{tour_distance(legacy, dist):10.2f}"
+        else:
+            legacy_s, legacy_km = f"{'skip':>9}", f"{'-':>10}"
+        stats = {}
+        t0 = time.perf_counter()
+        tour = improve_tour(start, dist, k=args.neighbors, time_budget=args.time_budget, stats=stats)
+        new_s = time.perf_counter() - t0
+        moves = stats['two_opt_moves'] + stats['or_opt_moves']
+        print(f"{n:>6} {tour_distance(start, dist):10.2f} {legacy_km} {legacy_s} "
+              f"{tour_distance(tour, dist):10.2f} {new_s:8.2f} {moves:>7}{' (timeout)' if stats['timed_out'] else ''}")
+
+
+if __name__ == '__main__':
+    main()
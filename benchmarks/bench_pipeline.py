@@ -0,0 +1,145 @@
+"""Benchmark: end-to-end pipeline on synthetic instances, checked against a baseline.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_pipeline                      # 50, 500, 5000 points
+    python -m benchmarks.bench_pipeline --sizes 50 500 5000 50000
+    python -m benchmarks.bench_pipeline --record             # (re)record the baseline
+
+Every size runs the full pipeline offline on ``benchmarks.synthetic``
+instances. The Distance Matrix API is replaced by an in-process stub
+(road distance = 1.3 x haversine) up to ``--stub-max`` points; larger
+inputs use the haversine fallback. The GNN uses the sparse kNN graph above
+``--knn-min`` points. 50k points still need a dense N x N matrix in the
+route solver (~20 GB), so that size is opt-in.
+
+Per size the run records the wall time of every pipeline stage, the peak
+traced memory and the tour length. Results are compared with
+``--baseline`` (benchmarks/baseline.json by default): a stage slower than
+``--time-tolerance`` x baseline (plus ``--time-slack`` seconds), memory
+above ``--memory-tolerance`` x baseline or a tour longer than
+``--quality-tolerance`` x baseline is reported and the exit status is 1.
+A size, mode or seed without a recorded baseline also exits 1 (CI must
+not pass by default); ``--record`` writes the baseline instead.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+import numpy as np
+from benchmarks.synthetic import write_csv
+from core import pipeline
+from core.config import Config
+from core.distance import haversine_matrix
+from core.matrix_client import MatrixClient
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+ROAD_FACTOR = 1.3
+
+
+class StubMatrixClient(MatrixClient):
+    """Offline Distance Matrix: 1.3 x haversine metres, 40 km/h durations, no HTTP."""
+
+    def fetch(self, origins, destinations, need=None):
+        o, d = np.asarray(origins, dtype=float), np.asarray(destinations, dtype=float)
+        dist_m = haversine_matrix(o[:, 0], o[:, 1], d[:, 0], d[:, 1]) * 1000.0 * ROAD_FACTOR
+        self.requests_made += 1
+        return dist_m, dist_m / (40 / 3.6)
+
+
+def _config(n, args):
+    config = Config()
+    config.MATRIX_CACHE_PATH = None
+    config.YANDEX_API_KEY = "stub" if n <= args.stub_max else None
+    config.GRAPH_MODE = "knn" if n >= args.knn_min else "dense"
+    config.LOCAL_SEARCH_TIME_BUDGET = args.time_budget
+    config.PROFILE_MEMORY = True
+    config.SOLVER_MODE = args.mode
+    return config
+
+
+def run_size(n, args, tmp):
+    src = write_csv(Path(tmp) / f"synthetic_{n}.csv", n, seed=args.seed)
+    config = _config(n, args)
+    with mock.patch.object(pipeline.MatrixClient, "from_config",
+                           lambda cfg, apikey=None: StubMatrixClient(apikey, max_workers=1)):
+        out = pipeline.run_pipeline(src, output_dir=Path(tmp) / str(n), config=config)
+    profile = out["metrics"]["profile"]
+    return {
+        "points": n,
+        "mode": out["mode"],
+        "distance_km": out["metrics"]["distance_km"],
+        "total_s": profile["total_wall_s"],
+        "peak_mb": max((s["peak_mb"] for s in profile["stages"].values()), default=0.0),
+        "stages": {k: v["wall_s"] for k, v in profile["stages"].items() if "." not in k},
+    }
+
+
+def compare(result, base, args):
+    """Regression messages for one size (empty when within tolerance)."""
+    problems = []
+    for stage, t in result["stages"].items():
+        ref = base["stages"].get(stage)
+        if ref is not None and t > ref * args.time_tolerance + args.time_slack:
+            problems.append(f"stage {stage}: {t:.3f}s vs baseline {ref:.3f}s")
+    if result["peak_mb"] > base["peak_mb"] * args.memory_tolerance + 1.0:
+        problems.append(f"peak memory {result['peak_mb']:.1f} MiB vs baseline {base['peak_mb']:.1f} MiB")
+    if result["mode"] != base["mode"]:
+        problems.append(f"solver mode {result['mode']} vs baseline {base['mode']}")
+    elif result["distance_km"] > base["distance_km"] * args.quality_tolerance:
+        problems.append(f"tour {result['distance_km']:.2f} km vs baseline {base['distance_km']:.2f} km")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--mode", default="tsp", choices=["tsp", "vrptw", "fleet"])
+    ap.add_argument("--stub-max", type=int, default=5000)
+    ap.add_argument("--knn-min", type=int, default=2000)
+    ap.add_argument("--time-budget", type=float, default=2.0)
+    ap.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    ap.add_argument("--record", "--update-baseline", dest="record", action="store_true")
+    ap.add_argument("--time-tolerance", type=float, default=1.5)
+    ap.add_argument("--time-slack", type=float, default=0.05)
+    ap.add_argument("--memory-tolerance", type=float, default=1.25)
+    ap.add_argument("--quality-tolerance", type=float, default=1.02)
+    args = ap.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            r = results[str(n)] = run_size(n, args, tmp)
+            stages = "  ".join(f"{k} {v:.3f}s" for k, v in r["stages"].items())
+            print(f"{n:>6} {r['mode']:<8} {r['total_s']:8.3f}s  peak {r['peak_mb']:8.1f} MiB  "
+                  f"{r['distance_km']:10.2f} km   {stages}")
+
+    key = f"{args.mode}/seed{args.seed}"
+    stored = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    if args.record:
+        stored.setdefault(key, {}).update(results)
+        stored["_machine"] = {"python": platform.python_version(), "platform": platform.platform()}
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"baseline written to {args.baseline}")
+        return 0
+    base = stored.get(key, {})
+    failed = False
+    for n, r in results.items():
+        if n not in base:
+            print(f"MISSING {n:>6} points: no baseline for {key} in {args.baseline}; record one with --record")
+            failed = True
+            continue
+        for problem in compare(r, base[n], args):
+            print(f"REGRESSION {n:>6} points: {problem}")
+            failed = True
+    print("FAILED: performance regressions or missing baselines" if failed else "OK: within baseline tolerances")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
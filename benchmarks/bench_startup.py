@@ -0,0 +1,76 @@
+"""Benchmark: cold import time and warm per-request pipeline latency.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup --points 200 --requests 20
+
+Import times are measured in fresh interpreters. Request latency runs the
+offline pipeline (no Yandex call) repeatedly in this process; the first
+request pays the torch import and model construction, the rest reuse the
+warm model from ``core.model_registry``.
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from benchmarks.bench_distance import random_points
+
+IMPORT_SNIPPET = ("import sys, time; t = time.perf_counter(); import {mod}; "
+                  "print(time.perf_counter() - t, 'torch' in sys.modules)")
+
+
+def import_time(module, repeat=3):
+    best, torch_loaded = None, None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET.format(mod=module)],
+                             capture_output=True, text=True, check=True).stdout.split()
+        t, torch_loaded = float(out[0]), out[1] == "True"
+        best = t if best is None else min(best, t)
+    return best, torch_loaded
+
+
+def write_points(path, n):
+    lat, lon = random_points(n)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("id,latitude,longitude,priority,time_window_start,time_window_end\n")
+        for i in range(n):
+            f.write(f"{i},{lat[i]:.6f},{lon[i]:.6f},{'VIP' if i % 10 == 0 else 'Standart'},09:00,18:00\n")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--points", type=int, default=200)
+    ap.add_argument("--requests", type=int, default=20)
+    args = ap.parse_args()
+
+    for module in ("app", "core.pipeline", "torch"):
+        t, torch_loaded = import_time(module)
+        print(f"import {module:<14} {t * 1000:8.1f} ms   torch loaded: {torch_loaded}")
+
+    from core.config import Config
+    from core.pipeline import run_pipeline
+    config = Config()
+    config.YANDEX_API_KEY = None
+    config.MATRIX_CACHE_PATH = None
+    config.LOCAL_SEARCH_TIME_BUDGET = 1.0
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "points.csv"
+        write_points(src, args.points)
+        times = []
+        for _ in range(args.requests):
+            t0 = time.perf_counter()
+            run_pipeline(src, output_dir=tmp, config=config)
+            times.append(time.perf_counter() - t0)
+    warm = np.array(times[1:]) * 1000
+    print(f"first request  {times[0] * 1000:8.1f} ms")
+    if len(warm):
+        print(f"warm p50       {np.percentile(warm, 50):8.1f} ms")
+        print(f"warm p95       {np.percentile(warm, 95):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
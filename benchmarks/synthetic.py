@@ -0,0 +1,74 @@
+"""Synthetic route instances shaped like the Rostov-on-Don input files.
+
+Stops are drawn around a handful of city districts (Gaussian blobs with a
+uniform background), about ``vip_ratio`` of them are VIP clients, and
+working hours / lunch breaks follow the mix seen in real uploads: mostly
+09:00-18:00 with a 13:00-14:00 lunch, some shifted or narrow windows.
+``merged=True`` writes the working hours as one '09:0018:00' cell, like
+some exports do. Every instance is fully determined by its arguments.
+"""
+
+import numpy as np
+
+# (lat, lon, share of stops) of the district centres
+DISTRICTS = (
+    (47.2225, 39.7187, 0.30),  # centre
+    (47.2870, 39.7160, 0.20),  # Severny
+    (47.2300, 39.6100, 0.15),  # Zapadny
+    (47.2050, 39.6550, 0.10),  # Leventsovka
+    (47.2400, 39.7900, 0.10),  # Nakhichevan
+)
+BACKGROUND = (47.15, 47.32, 39.55, 39.85)  # uniform noise over the city bounding box
+SPREAD_KM = 1.5
+WINDOWS = (("09:00", "18:00", 0.6), ("10:00", "19:00", 0.2), ("08:00", "12:00", 0.1), ("14:00", "17:00", 0.1))
+
+HEADER = ("Номер объекта", "Адрес объекта", "Географическая широта", "Географическая долгота",
+          "Время начала рабочего дня", "Время окончания рабочего дня", "Время начала обеда",
+          "Время окончания обеда", "Уровень клиента")
+
+
+def instance(n, seed=0, vip_ratio=0.1, merged=False):
+    """Column dict of a synthetic instance (Russian column names, as in the uploads)."""
+    rng = np.random.default_rng(seed)
+    shares = np.array([d[2] for d in DISTRICTS])
+    which = rng.choice(len(DISTRICTS) + 1, size=n, p=np.append(shares, 1.0 - shares.sum()))
+    lat = np.empty(n)
+    lon = np.empty(n)
+    for k, (clat, clon, _) in enumerate(DISTRICTS):
+        m = which == k
+        lat[m] = clat + rng.normal(0, SPREAD_KM / 111.32, m.sum())
+        lon[m] = clon + rng.normal(0, SPREAD_KM / (111.32 * np.cos(np.radians(clat))), m.sum())
+    bg = which == len(DISTRICTS)
+    lat[bg] = rng.uniform(BACKGROUND[0], BACKGROUND[1], bg.sum())
+    lon[bg] = rng.uniform(BACKGROUND[2], BACKGROUND[3], bg.sum())
+
+    w = rng.choice(len(WINDOWS), size=n, p=[x[2] for x in WINDOWS])
+    start = np.array([x[0] for x in WINDOWS], dtype=object)[w]
+    end = np.array([x[1] for x in WINDOWS], dtype=object)[w]
+    if merged:
+        start = start + end
+        end = np.full(n, "", dtype=object)
+    lunch = rng.random(n) < 0.8
+    vip = rng.random(n) < vip_ratio
+    return {
+        HEADER[0]: np.arange(1, n + 1),
+        HEADER[1]: np.array([f"г. Ростов-на-Дону, ул. Синтетическая, д. {i}" for i in range(1, n + 1)]),
+        HEADER[2]: lat,
+        HEADER[3]: lon,
+        HEADER[4]: start,
+        HEADER[5]: end,
+        HEADER[6]: np.where(lunch, "13:00", ""),
+        HEADER[7]: np.where(lunch, "14:00", ""),
+        HEADER[8]: np.where(vip, "VIP", "Standart"),
+    }
+
+
+def write_csv(path, n, seed=0, **kwargs):
+    """Write ``instance(n, seed)`` as an upload-style CSV and return the path."""
+    cols = instance(n, seed, **kwargs)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(HEADER) + "\n")
+        for row in zip(*(cols[h] for h in HEADER)):
+            f.write(",".join(f'"{v}"' if isinstance(v, str) and "," in v else
+                             (f"{v:.6f}" if isinstance(v, float) else str(v)) for v in row) + "\n")
+    return path
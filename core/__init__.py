@@ -1,6 +1,6 @@
 """Core package for route processing."""
 
-from .pipeline import run_pipeline
+from .pipeline import run_pipeline, run_pipeline_batch
 from .config import Config
 
-__all__ = ["run_pipeline", "Config"]
+__all__ = ["run_pipeline", "run_pipeline_batch", "Config"]
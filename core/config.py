@@ -4,6 +4,96 @@ class Config:
     # Yandex API key (you provided one; replace here or set env var YANDEX_API_KEY)
     YANDEX_API_KEY = os.getenv("YANDEX_API_KEY", "eda4655c-123d-4bff-bd11-db8cddf99055")
     ROUTING_PROFILE = "auto"  # 'auto' == car
-    MAX_POINTS = 100
+    YANDEX_MATRIX_URL = os.getenv("YANDEX_MATRIX_URL", "https://api.routing.yandex.net/v2/distancematrix")
+    # On-disk Distance Matrix cache (SQLite); set the path to None to disable
+    MATRIX_CACHE_PATH = os.getenv("MATRIX_CACHE_PATH", "cache/matrix_cache.sqlite")
+    MATRIX_CACHE_TTL = 7 * 24 * 3600  # seconds
+    MATRIX_CACHE_MAX_ENTRIES = 2_000_000
+    MATRIX_CACHE_PRECISION = 5  # coordinate decimals in the cache key (~1 m)
+    # Geocoding of rows without coordinates: 'yandex', 'stub' (answers from GEOCODE_STUB_PATH,
+    # an input file with coordinates) or None to leave them for the address-based fallback
+    GEOCODER = os.getenv("GEOCODER") or None
+    YANDEX_GEOCODER_KEY = os.getenv("YANDEX_GEOCODER_KEY")
+    GEOCODE_STUB_PATH = os.getenv("GEOCODE_STUB_PATH")
+    GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "cache/geocode.sqlite")
+    GEOCODE_CACHE_TTL = 90 * 24 * 3600  # seconds
+    GEOCODE_CACHE_NEGATIVE_TTL = 24 * 3600  # seconds a "not found" answer is trusted
+    DEPOTS_PATH = os.getenv("DEPOTS_PATH")  # known depots; geocodes far from all of them are dropped
+    GEOCODE_MAX_KM = 50
+    # Dense haversine / adjacency matrices as float32 .npy files memory-mapped by every
+    # worker and pool process (keyed by the point coordinates); None builds them per run
+    MATRIX_STORE_DIR = os.getenv("MATRIX_STORE_DIR") or None
+    MATRIX_STORE_MAX_BYTES = 4 * 2 ** 30
+    # Road distance / time model fitted on the matrix cache (python -m core.road_model); when the
+    # file exists it replaces haversine and AVERAGE_SPEED_KMH wherever the API is not used
+    ROAD_MODEL_PATH = os.getenv("ROAD_MODEL_PATH", "models/road_model.npz")
+    # Distance Matrix requests: 'full' (every missing cell) or 'sparse' (each stop's ROAD_KNN
+    # nearest neighbours and the tour edges; other cells come from the road model)
+    MATRIX_STRATEGY = os.getenv("MATRIX_STRATEGY", "full")
+    ROAD_KNN = 10
+    INPUT_CHUNK_ROWS = None  # CSV rows per chunk (None = chunk only files over 32 MB)
+    MAX_POINTS = 100  # Distance Matrix API: max origins / destinations per request
+    MATRIX_MAX_CELLS = None  # optional cap on origins x destinations per request
+    MATRIX_WORKERS = 4  # concurrent tile requests
+    MATRIX_RATE_LIMIT = 10  # requests per second
+    MATRIX_RETRIES = 3
+    MATRIX_BACKOFF = 0.5  # seconds, doubled on every retry
+    # GNN graph: 'dense' (inverse distance between all pairs) or 'knn' (sparse)
+    GRAPH_MODE = os.getenv("GRAPH_MODE", "dense")
+    GRAPH_K = 8
+    GRAPH_RADIUS_KM = None  # knn mode: use a radius cutoff instead of k neighbours
+    # GNN: hidden size, optional saved state_dict, init seed when no state is given
+    GNN_HIDDEN_DIM = 32
+    GNN_STATE_PATH = os.getenv("GNN_STATE_PATH")
+    GNN_SEED = 0
+    # Node features, in order (see core.features); the saved model expects the default four
+    GNN_FEATURES = ("lat", "lon", "vip", "service")
+    FEATURE_CACHE_SIZE = 32  # feature matrices kept per process (0 disables the cache)
+    FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR")  # optional on-disk copy shared by workers
+    TORCH_THREADS = None  # intra-op threads for GNN inference (None = torch default)
+    # Inference backend: 'torch' (eager), or an exported model (python -m core.inference)
+    # run by 'numpy' (no torch import), 'onnxruntime' or 'torchscript'
+    GNN_BACKEND = os.getenv("GNN_BACKEND", "torch")
+    GNN_EXPORT_PATH = os.getenv("GNN_EXPORT_PATH")
+    INFERENCE_THREADS = None  # onnxruntime / torch intra-op threads (None = TORCH_THREADS)
+    BATCH_WORKERS = None  # run_pipeline_batch routing processes (None = all cores)
+    # Local search (2-opt / Or-opt): wall-clock budget in seconds, neighbour list size
+    LOCAL_SEARCH_TIME_BUDGET = 2.0
+    LOCAL_SEARCH_NEIGHBORS = 10
+    # Fallback solver: >1 runs that many seeded searches (random restarts, iterated local search)
+    # in parallel within the same time budget and keeps the shortest tour
+    LOCAL_SEARCH_STARTS = int(os.getenv("LOCAL_SEARCH_STARTS", "1"))
+    LOCAL_SEARCH_WORKERS = None  # processes for the starts (None = all cores)
+    LOCAL_SEARCH_SEED = 0
+    INCREMENTAL_TIME_BUDGET = 0.2  # seconds of local search when adding / removing stops on a stored route
+    # Solver: 'tsp' (single tour, VIP reorder), 'vrptw' (working hours, lunch, service time)
+    # or 'fleet' (one route per vehicle)
+    SOLVER_MODE = os.getenv("SOLVER_MODE", "tsp")
+    AVERAGE_SPEED_KMH = 40
+    WORKDAY_START = "09:00"
+    DEFAULT_SERVICE_MIN = 10  # when the input has no service_time column
+    VIP_FIRST = True  # vrptw: every VIP stop precedes all standard stops
+    VRPTW_TIME_LIMIT = 5.0  # seconds
+    # Fleet mode: stops are split per vehicle by 'kmeans' or 'sweep'
+    VEHICLE_COUNT = int(os.getenv("VEHICLE_COUNT", "1"))
+    VEHICLE_CAPACITY = None  # max stops per vehicle
+    SHIFT_MINUTES = None  # max driving + service minutes per vehicle
+    FLEET_PARTITION = "kmeans"
+    FLEET_WORKERS = None  # per-cluster solver processes (None = all cores)
+    # Outputs: route.json is always written; 'npz' or 'msgpack' adds a compact route.<format>
+    ROUTE_BINARY_FORMAT = os.getenv("ROUTE_BINARY_FORMAT") or None
+    # Instrumentation: stage timings always land in route.json metrics.profile;
+    # PROFILER = 'cprofile' / 'pyinstrument' also dumps a profile next to it
+    PROFILER = os.getenv("PROFILER") or None
+    PROFILE_MEMORY = False  # per-stage tracemalloc peaks (slower) instead of process peak RSS
     # Timezone in input data
     TIMEZONE = "Europe/Moscow"
+    # Background pipeline jobs (web app)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_MAX_PENDING = 100
+    JOB_HISTORY = 1000  # finished jobs kept in memory
+    JOB_START_METHOD = "spawn"
+    # Per-run result directories (content-addressed by input file + config)
+    RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR", "results/runs")
+    RESULT_MAX_RUNS = 200
+    RESULT_MAX_AGE = 30 * 24 * 3600  # seconds
@@ -0,0 +1,103 @@
+"""Vectorised haversine distance matrices.
+
+The GNN graph builder and the fallback TSP solver both need the full
+pairwise distance matrix. Computing it once with NumPy broadcasting (in row
+blocks, so memory stays bounded) replaces the nested ``haversine`` loops.
+Missing coordinates are masked: every pair touching such a point is ``inf``.
+"""
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+DEFAULT_BLOCK_SIZE = 1024
+
+
+def _coord(p, *keys):
+    for k in keys:
+        v = p.get(k)
+        if v is None:
+            continue
+        try:
+            v = float(v)
+        except (TypeError, ValueError):
+            continue
+        if not np.isnan(v):
+            return v
+    return np.nan
+
+
+def point_coords(points):
+    """Return ``(lat, lon)`` float arrays for a list of point dicts (NaN where missing)."""
+    lat = np.array([_coord(p, 'lat', 'latitude') for p in points], dtype=float)
+    lon = np.array([_coord(p, 'lon', 'longitude') for p in points], dtype=float)
+    return lat, lon
+
+
+def haversine_matrix(lat, lon, lat2=None, lon2=None, block_size=DEFAULT_BLOCK_SIZE, dtype=np.float64, out=None):
+    """Great-circle distances in km between every origin and destination.
+
+    ``lat``/``lon`` describe the origins, ``lat2``/``lon2`` the destinations
+    (defaults to the origins, giving a square matrix with a zero diagonal).
+    Rows are computed ``block_size`` at a time to cap temporary memory,
+    into ``out`` when given (e.g. a file-backed array).
+    Pairs with a NaN coordinate on either side are set to ``inf``.
+    """
+    lat1 = np.radians(np.asarray(lat, dtype=float))
+    lon1 = np.radians(np.asarray(lon, dtype=float))
+    square = lat2 is None
+    if square:
+        lat2, lon2 = lat1, lon1
+    else:
+        lat2 = np.radians(np.asarray(lat2, dtype=float))
+        lon2 = np.radians(np.asarray(lon2, dtype=float))
+    n, m = len(lat1), len(lat2)
+    if out is None:
+        out = np.empty((n, m), dtype=dtype)
+    cos2 = np.cos(lat2)
+    step = max(1, int(block_size or n or 1))
+    for s in range(0, n, step):
+        e = min(n, s + step)
+        la = lat1[s:e, None]
+        dlat = lat2[None, :] - la
+        dlon = lon2[None, :] - lon1[s:e, None]
+        a = np.sin(dlat / 2.0) ** 2 + np.cos(la) * cos2[None, :] * np.sin(dlon / 2.0) ** 2
+        d = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+        d[np.isnan(d)] = np.inf
+        out[s:e] = d
+    if square and n:
+        np.fill_diagonal(out, 0.0)
+    return out
+
+
+def points_distance_matrix(points, block_size=DEFAULT_BLOCK_SIZE):
+    """Square haversine matrix (km) for a list of point dicts."""
+    lat, lon = point_coords(points)
+    return haversine_matrix(lat, lon, block_size=block_size)
+
+
+def inverse_distance_adjacency(dist, eps=1e-3, out=None, block_size=DEFAULT_BLOCK_SIZE):
+    """Dense GNN adjacency ``1 / (d + eps)``: zero diagonal, zero for unreachable pairs.
+
+    Written row blocks at a time into ``out`` when given (float64 otherwise).
+    """
+    dist = np.asarray(dist)
+    if out is None:
+        out = np.empty(dist.shape, dtype=float)
+    step = max(1, int(block_size or len(dist) or 1))
+    for s in range(0, len(dist), step):
+        d = np.asarray(dist[s:s + step], dtype=float)
+        with np.errstate(divide='ignore'):
+            block = 1.0 / (d + eps)
+        block[~np.isfinite(d)] = 0.0
+        out[s:s + step] = block
+    np.fill_diagonal(out, 0.0)
+    return out
+
+
+def tour_distance(order, dist):
+    """Sum of consecutive finite legs of ``order`` in ``dist`` (unreachable legs are skipped)."""
+    if len(order) < 2:
+        return 0.0
+    order = np.asarray(order)
+    legs = np.asarray(dist)[order[:-1], order[1:]]
+    return float(legs[np.isfinite(legs)].sum())
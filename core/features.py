@@ -0,0 +1,205 @@
+"""GNN node features.
+
+Every feature is a vectorised function of the PointSet (and the graph
+adjacency) returning one column; ``register_feature`` adds new ones and
+``Config.GNN_FEATURES`` picks the columns, in order. Columns registered
+with ``normalise=True`` are z-scored per run. The default set —
+latitude, longitude, VIP flag, service minutes with normalised
+coordinates — is what the model was trained on; changing it changes the
+model's input size.
+
+Feature matrices are cached by a hash of the point arrays, feature names
+and graph settings, so re-running the same stops (a repeated upload, a
+batch containing the same file) skips the computation.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from .io import NO_TIME
+from .points import PointSet
+from .utils import atomic_open
+
+DEFAULT_FEATURES = ("lat", "lon", "vip", "service")
+
+_FEATURES = {}
+
+
+def register_feature(name, normalise=False):
+    """Decorator registering ``fn(points, adj) -> (n,) array`` as feature ``name``."""
+    def wrap(fn):
+        _FEATURES[name] = (fn, normalise)
+        return fn
+    return wrap
+
+
+def available_features():
+    return tuple(_FEATURES)
+
+
+def _minutes(a):
+    return np.where(a == NO_TIME, np.nan, a.astype(np.float64))
+
+
+@register_feature("lat", normalise=True)
+def _lat(ps, adj):
+    return np.nan_to_num(ps.lat, nan=0.0)
+
+
+@register_feature("lon", normalise=True)
+def _lon(ps, adj):
+    return np.nan_to_num(ps.lon, nan=0.0)
+
+
+@register_feature("vip")
+def _vip(ps, adj):
+    return ps.vip.astype(np.float64)
+
+
+@register_feature("service")
+def _service(ps, adj):
+    return np.nan_to_num(ps.service, nan=0.0)
+
+
+@register_feature("tw_width", normalise=True)
+def _tw_width(ps, adj):
+    """Working-window length in hours (0 when open-ended)."""
+    return np.nan_to_num((_minutes(ps.tw_end) - _minutes(ps.tw_start)) / 60.0, nan=0.0)
+
+
+@register_feature("lunch_overlap", normalise=True)
+def _lunch_overlap(ps, adj):
+    """Hours of the lunch break that fall inside the working window."""
+    start = np.fmax(_minutes(ps.tw_start), _minutes(ps.lunch_start))
+    end = np.fmin(_minutes(ps.tw_end), _minutes(ps.lunch_end))
+    lunch = _minutes(ps.lunch_end) - _minutes(ps.lunch_start)
+    # no working window: the whole break counts
+    overlap = np.where(np.isnan(start) | np.isnan(end), lunch, np.clip(end - start, 0.0, None))
+    return np.nan_to_num(overlap / 60.0, nan=0.0)
+
+
+@register_feature("degree", normalise=True)
+def _degree(ps, adj):
+    """Weighted degree (sum of inverse-distance edge weights) in the GNN graph."""
+    if adj is None:
+        return np.zeros(len(ps))
+    return np.log1p(np.asarray(adj.sum(axis=1), dtype=np.float64).ravel())
+
+
+def normalise_columns(feats, columns):
+    """Z-score ``columns`` of ``feats``, returning a new array."""
+    out = np.array(feats, dtype=np.float64, copy=True)
+    if len(columns) and len(out):
+        cols = out[:, columns]
+        out[:, columns] = (cols - cols.mean(axis=0)) / (cols.std(axis=0) + 1e-6)
+    return out
+
+
+def node_features(points, adj=None, names=DEFAULT_FEATURES, normalise=True):
+    """``(n, len(names))`` feature matrix; ``normalise=False`` returns the raw columns."""
+    ps = PointSet.of(points)
+    unknown = [name for name in names if name not in _FEATURES]
+    if unknown:
+        raise ValueError(f"Unknown features: {unknown}")
+    feats = np.empty((len(ps), len(names)), dtype=np.float64)
+    for j, name in enumerate(names):
+        feats[:, j] = _FEATURES[name][0](ps, adj)
+    if not normalise:
+        return feats
+    return normalise_columns(feats, [j for j, name in enumerate(names) if _FEATURES[name][1]])
+
+
+def feature_key(points, names=DEFAULT_FEATURES, graph=None):
+    """Hash of everything the features depend on: stop arrays, feature names, graph settings."""
+    ps = PointSet.of(points)
+    h = hashlib.sha256(repr((tuple(names), graph, len(ps))).encode("utf-8"))
+    for a in (ps.lat, ps.lon, ps.vip, ps.service, ps.tw_start, ps.tw_end, ps.lunch_start, ps.lunch_end):
+        h.update(np.ascontiguousarray(a).tobytes())
+    return h.hexdigest()[:32]
+
+
+class FeatureCache:
+    """LRU of feature matrices in memory, optionally backed by ``<directory>/<key>.npy``."""
+
+    def __init__(self, max_entries=32, directory=None):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            feats = self._entries.get(key)
+            if feats is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return feats
+        path = self.directory / f"{key}.npy" if self.directory else None
+        if path is not None and path.exists():
+            feats = np.load(path)
+            self._remember(key, feats)
+            self.hits += 1
+            return feats
+        self.misses += 1
+        return None
+
+    def put(self, key, feats):
+        feats = self._remember(key, feats)
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with atomic_open(self.directory / f"{key}.npy", "wb") as f:
+                np.save(f, feats)
+        return feats
+
+    def _remember(self, key, feats):
+        feats = np.array(feats, dtype=np.float64)
+        feats.setflags(write=False)  # shared between callers
+        with self._lock:
+            self._entries[key] = feats
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return feats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def cache_for_config(config):
+    """Per-process FeatureCache for ``Config.FEATURE_CACHE_*``, or None when disabled."""
+    size = getattr(config, "FEATURE_CACHE_SIZE", 32)
+    if not size:
+        return None
+    key = (size, getattr(config, "FEATURE_CACHE_DIR", None))
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = FeatureCache(*key)
+    return cache
+
+
+def features_for_config(points, adj, config, cache=None):
+    """Normalised ``Config.GNN_FEATURES`` for ``points``, from the feature cache when already computed.
+
+    Returns ``(feats, hit)``; a cached array is read-only.
+    """
+    names = tuple(getattr(config, "GNN_FEATURES", DEFAULT_FEATURES))
+    cache = cache if cache is not None else cache_for_config(config)
+    if cache is None:
+        return node_features(points, adj, names), False
+    graph = (getattr(config, "GRAPH_MODE", "dense"), getattr(config, "GRAPH_K", 8),
+             getattr(config, "GRAPH_RADIUS_KM", None)) if "degree" in names else None
+    key = feature_key(points, names, graph)
+    feats = cache.get(key)
+    if feats is not None:
+        return feats, True
+    return cache.put(key, node_features(points, adj, names)), False
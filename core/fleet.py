@@ -0,0 +1,248 @@
+"""Multi-vehicle routing: partition stops, solve each cluster, exchange stops.
+
+1. Stops are split into one geographic cluster per vehicle with k-means
+   or an angular sweep around the centroid, honouring the per-vehicle
+   stop ``capacity``.
+2. Every cluster's tour is optimised independently (nearest neighbour +
+   local search), in a process pool for large inputs.
+3. Routes over the shift limit hand stops to routes with spare time
+   (cheapest insertion next to a nearby stop) until they fit.
+4. An inter-route pass relocates single stops next to their nearest
+   neighbours on other vehicles while that shortens the total distance
+   and keeps capacity and shift limits.
+
+``time_budget`` is split between the cluster solves, the exchange pass
+and the final polish (``BUDGET_SHARES``).
+"""
+
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .local_search import improve_tour, neighbor_lists, DEFAULT_NEIGHBORS
+from .points import PointSet
+
+PARALLEL_MIN_POINTS = 300  # below this, pool start-up costs more than it saves
+BUDGET_SHARES = (0.5, 0.3, 0.2)  # cluster solves, exchange pass, final polish
+
+
+def _rebalance(labels, centers, X, capacity):
+    # move the stops farthest from their center out of overfull clusters
+    k = len(centers)
+    d = ((X[:, None, :] - centers[None, :, :]) ** 2).sum(-1)
+    counts = np.bincount(labels, minlength=k)
+    for c in range(k):
+        while counts[c] > capacity:
+            members = np.flatnonzero(labels == c)
+            open_ = np.flatnonzero(counts < capacity)
+            sub = d[np.ix_(members, open_)] - d[members, c][:, None]
+            i, j = np.unravel_index(np.argmin(sub), sub.shape)
+            labels[members[i]] = open_[j]
+            counts[c] -= 1
+            counts[open_[j]] += 1
+    return labels
+
+
+def partition(lat, lon, n_vehicles, method="kmeans", capacity=None, seed=0):
+    """Cluster label (vehicle index) per stop."""
+    n = len(lat)
+    k = max(1, min(int(n_vehicles), n))
+    if capacity is not None and capacity * k < n:
+        raise ValueError(f"{n} stops do not fit {k} vehicles of capacity {capacity}")
+    # local planar coordinates in km
+    lat0 = np.nanmean(lat) if n else 0.0
+    X = np.column_stack([np.nan_to_num(lat, nan=lat0) * 111.32,
+                         np.nan_to_num(lon, nan=np.nanmean(lon) if n else 0.0) * 111.32 * math.cos(math.radians(lat0))])
+    if method == "sweep":
+        ang = np.arctan2(X[:, 0] - X[:, 0].mean(), X[:, 1] - X[:, 1].mean())
+        size = math.ceil(n / k)
+        labels = np.empty(n, dtype=int)
+        labels[np.argsort(ang, kind="stable")] = np.arange(n) // size
+        return labels
+    if method != "kmeans":
+        raise ValueError(f"Unknown partition method: {method}")
+    from sklearn.cluster import KMeans
+
+    km = KMeans(n_clusters=k, n_init=10, random_state=seed).fit(X)
+    labels = km.labels_.astype(int)
+    if capacity is not None:
+        labels = _rebalance(labels, km.cluster_centers_, X, capacity)
+    return labels
+
+
+def _solve_cluster(sub_dist, time_budget, neighbors):
+    from .optimizer import _nearest_neighbor_order_from_matrix
+    order = _nearest_neighbor_order_from_matrix(sub_dist)
+    return improve_tour(order, sub_dist, k=neighbors, time_budget=time_budget)
+
+
+def polish_route(route, dist, time_budget, neighbors=DEFAULT_NEIGHBORS, stats=None):
+    """``improve_tour`` on the stops of one route, priced on their own submatrix.
+
+    Running it against the full matrix would try neighbours from other
+    routes as if their edges were in this one. Returns the improved route
+    as indices into ``dist``.
+    """
+    if len(route) < 4:
+        return list(route)
+    idx = np.asarray(route)
+    order = improve_tour(range(len(idx)), dist[np.ix_(idx, idx)], k=neighbors, time_budget=time_budget, stats=stats)
+    return [int(idx[i]) for i in order]
+
+
+def _route_length(route, dist):
+    return float(sum(dist[route[i], route[i + 1]] for i in range(len(route) - 1)))
+
+
+def _route_minutes(route, dist, speed_kmh, service_min):
+    return _route_length(route, dist) / speed_kmh * 60.0 + service_min * len(route)
+
+
+def _insertion(route, q, c, dist):
+    # km added by putting c before position q of route
+    u = route[q - 1] if q > 0 else None
+    w = route[q] if q < len(route) else None
+    add = (dist[u, c] if u is not None else 0.0) + (dist[c, w] if w is not None else 0.0)
+    if u is not None and w is not None:
+        add -= dist[u, w]
+    return add
+
+
+def repair_shifts(routes, dist, shift_minutes, capacity=None, speed_kmh=40.0, service_min=0.0,
+                  neighbors=DEFAULT_NEIGHBORS):
+    """Move stops out of routes longer than ``shift_minutes`` into routes with spare time.
+
+    Each move takes the stop whose removal plus cheapest insertion (next to
+    one of its ``neighbors`` nearest stops on another route that stays
+    within shift and capacity) adds the fewest kilometres. Routes are
+    modified in place. Returns the number of routes still over the limit.
+    """
+    nbrs = neighbor_lists(dist, neighbors)
+    minutes = [_route_minutes(r, dist, speed_kmh, service_min) for r in routes]
+    route_of = {c: r for r, route in enumerate(routes) for c in route}
+    for a in range(len(routes)):
+        while minutes[a] > shift_minutes and len(routes[a]) > 1:
+            ra = routes[a]
+            best = None
+            for pos, c in enumerate(ra):
+                gain = _insertion(ra[:pos] + ra[pos + 1:], pos, c, dist)
+                for v in nbrs[c]:
+                    b = route_of[v]
+                    rb = routes[b]
+                    if b == a or (capacity is not None and len(rb) >= capacity):
+                        continue
+                    j = rb.index(v)
+                    for q in (j, j + 1):
+                        add = _insertion(rb, q, c, dist)
+                        if minutes[b] + add / speed_kmh * 60.0 + service_min > shift_minutes:
+                            continue
+                        if best is None or add - gain < best[0]:
+                            best = (add - gain, pos, b, q, add, gain)
+            if best is None:
+                break
+            _, pos, b, q, add, gain = best
+            c = ra.pop(pos)
+            routes[b].insert(q, c)
+            route_of[c] = b
+            minutes[a] -= gain / speed_kmh * 60.0 + service_min
+            minutes[b] += add / speed_kmh * 60.0 + service_min
+    return sum(1 for r in routes if _route_minutes(r, dist, speed_kmh, service_min) > shift_minutes)
+
+
+def exchange_pass(routes, dist, capacity=None, shift_minutes=None, speed_kmh=40.0, service_min=0.0,
+                  neighbors=DEFAULT_NEIGHBORS, time_budget=1.0):
+    """Relocate single stops between routes while the total distance drops.
+
+    Routes are open paths, modified in place. A stop is only tried next to
+    its ``neighbors`` nearest stops of other routes. Returns the number of
+    moves applied.
+    """
+    deadline = time.perf_counter() + time_budget
+    nbrs = neighbor_lists(dist, neighbors)
+    route_of = {c: r for r, route in enumerate(routes) for c in route}
+    moves = 0
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for c in sorted(route_of):
+            a = route_of[c]
+            ra = routes[a]
+            if len(ra) <= 1:
+                continue
+            pos = ra.index(c)
+            prev = ra[pos - 1] if pos > 0 else None
+            nxt = ra[pos + 1] if pos + 1 < len(ra) else None
+            gain = (dist[prev, c] if prev is not None else 0.0) + (dist[c, nxt] if nxt is not None else 0.0)
+            if prev is not None and nxt is not None:
+                gain -= dist[prev, nxt]
+            best = None
+            for v in nbrs[c]:
+                b = route_of[v]
+                rb = routes[b]
+                if b == a or (capacity is not None and len(rb) >= capacity):
+                    continue
+                j = rb.index(v)
+                for q in (j, j + 1):  # before or after v
+                    add = _insertion(rb, q, c, dist)
+                    if gain - add > 1e-9 and (best is None or add < best[0]):
+                        best = (add, b, q)
+            if best is None:
+                continue
+            _, b, q = best
+            cand = routes[b][:q] + [c] + routes[b][q:]
+            if shift_minutes is not None and _route_minutes(cand, dist, speed_kmh, service_min) > shift_minutes:
+                continue
+            routes[b] = cand
+            del ra[pos]
+            route_of[c] = b
+            moves += 1
+            improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return moves
+
+
+def solve_fleet(points, dist, n_vehicles, capacity=None, shift_minutes=None, method="kmeans",
+                speed_kmh=40.0, service_min=0.0, time_budget=2.0, neighbors=DEFAULT_NEIGHBORS,
+                max_workers=None, start_method="spawn", stats=None):
+    """Split ``points`` over ``n_vehicles`` routes.
+
+    ``points`` is a PointSet or a list of point dicts. Returns a list of
+    routes, each a list of indices into ``points``. ``stats`` (a dict)
+    receives ``over_shift_routes``: routes still longer than
+    ``shift_minutes`` after the repair (no other vehicle had room).
+    """
+    solve_budget, exchange_budget, polish_budget = (time_budget * share for share in BUDGET_SHARES)
+    dist = np.asarray(dist, dtype=float)
+    ps = PointSet.of(points)
+    labels = partition(ps.lat, ps.lon, n_vehicles, method=method, capacity=capacity)
+    clusters = [np.flatnonzero(labels == c) for c in range(labels.max() + 1 if len(labels) else 0)]
+    clusters = [c for c in clusters if len(c)]
+    subs = [dist[np.ix_(c, c)] for c in clusters]
+    workers = min(max_workers or os.cpu_count() or 1, len(clusters))
+    if workers > 1 and len(points) >= PARALLEL_MIN_POINTS:
+        # clusters run ``workers`` at a time
+        each = solve_budget * workers / len(subs)
+        ctx = multiprocessing.get_context(start_method)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            orders = list(pool.map(_solve_cluster, subs, [each] * len(subs), [neighbors] * len(subs)))
+    else:
+        each = solve_budget / max(1, len(subs))
+        orders = [_solve_cluster(sub, each, neighbors) for sub in subs]
+    routes = [[int(c[i]) for i in order] for c, order in zip(clusters, orders)]
+    finite = np.where(np.isfinite(dist), dist, np.nanmax(np.where(np.isfinite(dist), dist, 0)) * 10 + 1e3)
+    if shift_minutes is not None:
+        repair_shifts(routes, finite, shift_minutes, capacity=capacity, speed_kmh=speed_kmh,
+                      service_min=service_min, neighbors=neighbors)
+    exchange_pass(routes, finite, capacity=capacity, shift_minutes=shift_minutes,
+                  speed_kmh=speed_kmh, service_min=service_min, neighbors=neighbors, time_budget=exchange_budget)
+    # polish every route after the exchanges, sharing one budget
+    routes = [r for r in routes if r]
+    share = polish_budget / max(1, len(routes))
+    routes = [polish_route(r, dist, share, neighbors) for r in routes]
+    if stats is not None:
+        stats["over_shift_routes"] = 0 if shift_minutes is None else sum(
+            1 for r in routes if _route_minutes(r, finite, speed_kmh, service_min) > shift_minutes)
+    return routes
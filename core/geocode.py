@@ -0,0 +1,329 @@
+"""Coordinates for address-only rows.
+
+Rows without latitude / longitude are resolved by address before routing:
+
+- addresses are normalised (case, 'ё', punctuation, postcodes, common
+  street-type abbreviations) so spelling variants share one key;
+- ``GeocodeCache`` keeps ``key -> (lat, lon)`` in SQLite, so every
+  distinct address is looked up at most once per ``ttl``; negative
+  answers are kept for the much shorter ``negative_ttl``;
+- a geocoder is anything with ``geocode(address) -> (lat, lon) | None``:
+  ``YandexGeocoder`` calls the HTTP Geocoder API, ``StubGeocoder`` answers
+  from a local table (e.g. an earlier upload that had coordinates). A
+  geocoder whose ``cache_misses`` is false (the stub: its table is not the
+  world) never has its misses cached;
+- ``SpatialGrid`` buckets known depots into a uniform grid for fast
+  nearby / nearest queries. ``fill_coordinates`` uses it to reject answers
+  farther than ``max_km`` from every known depot (a same-named street in
+  another city). ``depot_grid`` builds it once per process and file
+  version.
+"""
+
+import math
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+from .distance import EARTH_RADIUS_KM, haversine_matrix
+
+YANDEX_GEOCODER_URL = "https://geocode-maps.yandex.ru/1.x/"
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180.0
+
+_depot_grids = {}  # resolved path -> ((mtime_ns, size, cell_km), SpatialGrid)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS addresses (
+    key TEXT PRIMARY KEY,
+    lat REAL, lon REAL,
+    created REAL NOT NULL, accessed REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+_ABBREVIATIONS = (
+    (r"\bулица\b", "ул"), (r"\bпроспект\b", "пр"), (r"\bпр-т\b", "пр"), (r"\bпереулок\b", "пер"),
+    (r"\bбульвар\b", "бул"), (r"\bплощадь\b", "пл"), (r"\bшоссе\b", "ш"), (r"\bдом\b", "д"),
+    (r"\bгород\b", "г"), (r"\bкорпус\b", "к"), (r"\bстроение\b", "с"),
+)
+
+
+def normalise_address(address):
+    """Cache key for an address string ('' when there is nothing to look up)."""
+    if not isinstance(address, str):
+        return ""
+    s = address.lower().replace("ё", "е")
+    s = re.sub(r"\b\d{6}\b", " ", s)  # postcode
+    for pattern, short in _ABBREVIATIONS:
+        s = re.sub(pattern, short, s)
+    s = re.sub(r"[^\w/]+", " ", s)
+    return " ".join(s.split())
+
+
+class GeocodeCache:
+    def __init__(self, path, ttl=90 * 24 * 3600, negative_ttl=24 * 3600):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.executescript(_SCHEMA)
+
+    @classmethod
+    def from_config(cls, config):
+        """Cache configured by ``Config.GEOCODE_CACHE_*``, or None when disabled."""
+        path = getattr(config, "GEOCODE_CACHE_PATH", None)
+        if not path:
+            return None
+        return cls(path, ttl=getattr(config, "GEOCODE_CACHE_TTL", 90 * 24 * 3600),
+                   negative_ttl=getattr(config, "GEOCODE_CACHE_NEGATIVE_TTL", 24 * 3600))
+
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def lookup(self, keys):
+        """``{key: (lat, lon) or None}`` for the cached keys; missing keys are absent."""
+        keys = list(dict.fromkeys(keys))
+        out = {}
+        now = time.time()
+        with self._connect() as con:
+            for s in range(0, len(keys), 500):
+                chunk = keys[s:s + 500]
+                rows = con.execute(
+                    f"SELECT key, lat, lon FROM addresses WHERE created>=? AND key IN ({','.join('?' * len(chunk))}) "
+                    "AND (lat IS NOT NULL OR created>=?)",
+                    (now - self.ttl, *chunk, now - self.negative_ttl)).fetchall()
+                for key, lat, lon in rows:
+                    out[key] = None if lat is None else (lat, lon)
+            if out:
+                con.executemany("UPDATE addresses SET accessed=? WHERE key=?", [(now, k) for k in out])
+        self.hits += len(out)
+        self.misses += len(keys) - len(out)
+        return out
+
+    def store(self, results):
+        """Store ``{key: (lat, lon) or None}``; None records a negative answer (kept ``negative_ttl``)."""
+        now = time.time()
+        rows = [(k, *(v if v is not None else (None, None)), now, now) for k, v in results.items()]
+        if rows:
+            with self._connect() as con:
+                con.executemany("INSERT OR REPLACE INTO addresses VALUES (?,?,?,?,?)", rows)
+        return len(rows)
+
+    def __len__(self):
+        with self._connect() as con:
+            return con.execute("SELECT COUNT(*) FROM addresses").fetchone()[0]
+
+
+class StubGeocoder:
+    """Offline geocoder answering from a ``{address: (lat, lon)}`` table."""
+
+    cache_misses = False  # an address missing from the table may still exist
+
+    def __init__(self, table=None):
+        self.table = {normalise_address(a): (float(lat), float(lon)) for a, (lat, lon) in (table or {}).items()}
+        self.requests_made = 0
+
+    @classmethod
+    def from_file(cls, path):
+        """Table of every row with an address and coordinates in an input file."""
+        from .io import load_input
+
+        cols = load_input(path)
+        ok = ~(np.isnan(cols["latitude"]) | np.isnan(cols["longitude"]))
+        return cls({a: (lat, lon) for a, lat, lon, good in
+                    zip(cols["address"], cols["latitude"], cols["longitude"], ok) if good and a})
+
+    def geocode(self, address):
+        self.requests_made += 1
+        return self.table.get(normalise_address(address))
+
+
+class YandexGeocoder:
+    """Yandex HTTP Geocoder (one request per distinct address)."""
+
+    cache_misses = True
+
+    def __init__(self, apikey, url=YANDEX_GEOCODER_URL, timeout=10):
+        import requests
+
+        self.apikey = apikey
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.requests_made = 0
+
+    def geocode(self, address):
+        self.requests_made += 1
+        r = self.session.get(self.url, params={"apikey": self.apikey, "geocode": address, "format": "json",
+                                               "results": 1, "lang": "ru_RU"}, timeout=self.timeout)
+        r.raise_for_status()
+        members = r.json()["response"]["GeoObjectCollection"]["featureMember"]
+        if not members:
+            return None
+        lon, lat = map(float, members[0]["GeoObject"]["Point"]["pos"].split())
+        return lat, lon
+
+
+def geocoder_from_config(config):
+    """Geocoder selected by ``Config.GEOCODER`` ('yandex' / 'stub'), or None when disabled."""
+    kind = getattr(config, "GEOCODER", None)
+    if not kind:
+        return None
+    if kind == "stub":
+        path = getattr(config, "GEOCODE_STUB_PATH", None)
+        return StubGeocoder.from_file(path) if path else StubGeocoder()
+    if kind == "yandex":
+        return YandexGeocoder(getattr(config, "YANDEX_GEOCODER_KEY", None),
+                              url=getattr(config, "YANDEX_GEOCODER_URL", YANDEX_GEOCODER_URL))
+    raise ValueError(f"Unknown geocoder: {kind}")
+
+
+class SpatialGrid:
+    """Uniform grid of roughly ``cell_km`` cells over a fixed set of points (e.g. known depots)."""
+
+    def __init__(self, lat, lon, cell_km=1.0):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        ok = ~(np.isnan(lat) | np.isnan(lon))
+        self.index = np.flatnonzero(ok)
+        self.lat, self.lon = lat[ok], lon[ok]
+        self.cell_km = cell_km
+        self.dlat = cell_km / KM_PER_DEG
+        # longitude cells are widened so they are at least cell_km across everywhere in the set
+        top = float(np.abs(self.lat).max()) if len(self.lat) else 0.0
+        self.dlon = self.dlat / max(math.cos(math.radians(min(top, 89.0))), 1e-6)
+        ci = np.floor(self.lat / self.dlat).astype(np.int64)
+        cj = np.floor(self.lon / self.dlon).astype(np.int64)
+        self.cells = {}
+        for i, key in enumerate(zip(ci.tolist(), cj.tolist())):
+            self.cells.setdefault(key, []).append(i)
+        self.cells = {k: np.array(v) for k, v in self.cells.items()}
+        self._bounds = (int(ci.min()), int(ci.max()), int(cj.min()), int(cj.max())) if len(ci) else None
+
+    @classmethod
+    def from_file(cls, path, cell_km=1.0):
+        """Grid over the coordinates of an input file (rows without coordinates are skipped)."""
+        from .io import load_input
+
+        cols = load_input(path)
+        return cls(cols["latitude"], cols["longitude"], cell_km=cell_km)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _ring_km(self, lat):
+        """Lower bound on the distance from a point at ``lat`` to cells one ring further out."""
+        return min(self.cell_km, self.dlon * KM_PER_DEG * math.cos(math.radians(min(abs(lat), 89.9))))
+
+    def _candidates(self, ci, cj, rings):
+        found = [self.cells[(i, j)] for i in range(ci - rings, ci + rings + 1)
+                 for j in range(cj - rings, cj + rings + 1) if (i, j) in self.cells]
+        return np.concatenate(found) if found else np.empty(0, dtype=int)
+
+    def within(self, lat, lon, radius_km):
+        """Indices (into the input arrays) of the points within ``radius_km``, nearest first."""
+        if not len(self):
+            return np.empty(0, dtype=int)
+        ci, cj = int(math.floor(lat / self.dlat)), int(math.floor(lon / self.dlon))
+        cand = self._candidates(ci, cj, int(math.ceil(radius_km / self._ring_km(lat))))
+        if not len(cand):
+            return np.empty(0, dtype=int)
+        d = haversine_matrix([lat], [lon], self.lat[cand], self.lon[cand])[0]
+        keep = d <= radius_km
+        order = np.argsort(d[keep], kind="stable")
+        return self.index[cand[keep][order]]
+
+    def nearest(self, lat, lon, max_km=None):
+        """``(index, km)`` of the nearest point, or None when there is none within ``max_km``.
+
+        Rings of cells are scanned outwards until the best candidate is
+        provably closer than anything in the unscanned rings.
+        """
+        if not len(self):
+            return None
+        ci, cj = int(math.floor(lat / self.dlat)), int(math.floor(lon / self.dlon))
+        i0, i1, j0, j1 = self._bounds
+        last = max(abs(ci - i0), abs(ci - i1), abs(cj - j0), abs(cj - j1))  # every cell scanned
+        ring_km = self._ring_km(lat)
+        if max_km is not None:
+            last = min(last, int(math.ceil(max_km / ring_km)))
+        rings = 0
+        while True:
+            cand = self._candidates(ci, cj, rings)
+            if len(cand):
+                d = haversine_matrix([lat], [lon], self.lat[cand], self.lon[cand])[0]
+                best = int(np.argmin(d))
+                if d[best] <= rings * ring_km or rings >= last:
+                    break
+            elif rings >= last:
+                return None
+            rings += 1
+        if max_km is not None and d[best] > max_km:
+            return None
+        return int(self.index[cand[best]]), float(d[best])
+
+
+def depot_grid(path, cell_km=1.0):
+    """``SpatialGrid.from_file(path)``, kept per process until the file changes."""
+    path = Path(path).resolve()
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size, cell_km)
+    cached = _depot_grids.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = _depot_grids[path] = (stamp, SpatialGrid.from_file(path, cell_km=cell_km))
+    return cached[1]
+
+
+def fill_coordinates(cols, geocoder, cache=None, depots=None, max_km=None):
+    """Fill missing coordinates of ``load_input`` columns in place from their addresses.
+
+    Every distinct normalised address is resolved once: from ``cache``
+    first, then ``geocoder``; new answers are written back. With
+    ``depots`` (a SpatialGrid) and ``max_km``, answers farther than that
+    from every depot are discarded. Returns counters for the run metrics.
+    """
+    lat, lon = cols["latitude"], cols["longitude"]
+    missing = np.flatnonzero(np.isnan(lat) | np.isnan(lon))
+    keys = {i: normalise_address(cols["address"][i]) for i in missing.tolist()}
+    raw = {}  # first original spelling of every key, sent to the geocoder
+    for i, key in keys.items():
+        if key:
+            raw.setdefault(key, cols["address"][i])
+    wanted = sorted(raw)
+    stats = {"geocode_rows": len(missing), "geocode_cache_hits": 0, "geocode_requests": 0, "geocode_unresolved": 0}
+    if not wanted:
+        stats["geocode_unresolved"] = len(missing)
+        return stats
+    found = cache.lookup(wanted) if cache is not None else {}
+    stats["geocode_cache_hits"] = len(found)
+    fresh = {}
+    if geocoder is not None:
+        for key in (k for k in wanted if k not in found):
+            try:
+                fresh[key] = geocoder.geocode(raw[key])
+            except Exception:
+                continue  # transient failure: not cached, retried next run
+            stats["geocode_requests"] += 1
+    if cache is not None and fresh:
+        keep_misses = getattr(geocoder, "cache_misses", True)
+        cache.store({k: v for k, v in fresh.items() if v is not None or keep_misses})
+    found.update(fresh)
+    for i, key in keys.items():
+        hit = found.get(key)
+        if hit is not None and depots is not None and max_km is not None and len(depots):
+            if depots.nearest(hit[0], hit[1], max_km=max_km) is None:
+                hit = None
+        if hit is None:
+            stats["geocode_unresolved"] += 1
+            continue
+        lat[i], lon[i] = hit
+    return stats
@@ -4,10 +4,12 @@ This GNN is intentionally simple and dependency-free (only torch).
 It computes node embeddings via message passing where messages are
 distance-weighted average of neighbor features.
 
-The model expects a dense adjacency matrix (N x N) and node features (N x F).
-It returns a scalar score per node which we interpret as a priority score.
+The model expects an adjacency matrix (N x N, dense or torch sparse COO/CSR)
+and node features (N x F). It returns a scalar score per node which we
+interpret as a priority score.
 """
 
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -20,11 +22,25 @@ class SimpleGNN(nn.Module):
         self.readout = nn.Linear(hidden_dim, 1)
 
     def forward(self, x, adj):
-        # x: [N, F], adj: [N, N] (torch tensor)
+        # x: [N, F], adj: [N, N] (torch tensor, dense or sparse)
         h = F.relu(self.lin1(x))
         # message passing: h' = D^{-1} A h
-        deg = adj.sum(dim=1, keepdim=True) + 1e-6
-        msg = torch.matmul(adj, h) / deg
+        if adj.layout != torch.strided:
+            ones = torch.ones(adj.shape[0], 1, dtype=h.dtype)
+            deg = torch.sparse.mm(adj, ones) + 1e-6
+            msg = torch.sparse.mm(adj, h) / deg
+        else:
+            deg = adj.sum(dim=1, keepdim=True) + 1e-6
+            msg = torch.matmul(adj, h) / deg
         h = F.relu(self.lin2(msg))
         scores = self.readout(h).squeeze(-1)
         return scores
+
+def adjacency_to_torch(adj):
+    """Convert a NumPy array or SciPy sparse matrix to a float32 torch adjacency."""
+    if hasattr(adj, 'tocoo'):
+        coo = adj.tocoo()
+        idx = torch.from_numpy(np.vstack([coo.row, coo.col]).astype(np.int64))
+        vals = torch.from_numpy(coo.data.astype(np.float32))
+        return torch.sparse_coo_tensor(idx, vals, coo.shape, check_invariants=False).coalesce()
+    return torch.tensor(adj, dtype=torch.float32)
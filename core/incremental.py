@@ -0,0 +1,166 @@
+"""Incremental re-optimisation of a stored route.
+
+``apply_delta`` takes a finished single-vehicle route (the ``route.json``
+dict) plus stops to add and stop ids to remove, and repairs the existing
+order instead of re-running the pipeline:
+
+1. removed stops are cut out of the order, closing the gap;
+2. the distance matrix is rebuilt for the new stop set. Road distances go
+   through the MatrixCache, so after the original run only the new rows
+   and columns are requested from the API; haversine distances are a
+   single vectorised pass;
+3. every new stop is placed by cheapest insertion;
+4. local search runs with only the stops around the changes active, then
+   the VIP rules are re-applied.
+
+The GNN is not re-run: kept stops keep their ``gnn_score`` and new ones
+have none.
+"""
+
+import hashlib
+import json
+import time
+import numpy as np
+from .config import Config
+from .distance import haversine_matrix, tour_distance
+from .local_search import improve_tour, _working_matrix
+from .matrix_cache import MatrixCache
+from .matrix_client import MatrixClient
+from .optimizer import fetch_distance_matrix, vip_order
+from .points import PointSet
+from .result_store import KEY_LENGTH
+
+SINGLE_ROUTE_MODES = ("yandex", "fallback")
+
+
+def delta_key(run_key, added, removed):
+    """Result-store key of ``run_key`` updated with this delta."""
+    h = hashlib.sha256(run_key.encode("utf-8"))
+    h.update(json.dumps({"add": added, "remove": sorted(map(str, removed))}, sort_keys=True,
+                        ensure_ascii=False, default=str).encode("utf-8"))
+    return h.hexdigest()[:KEY_LENGTH]
+
+
+def cheapest_insertion(order, new, dist):
+    """Insert every node of ``new`` into the open path ``order`` where it adds the least distance."""
+    order = list(order)
+    d = _working_matrix(dist)
+    for c in new:
+        if not order:
+            order.append(c)
+            continue
+        path = np.asarray(order)
+        # position q means "before order[q]"; q == len(order) appends
+        cost = np.empty(len(order) + 1)
+        cost[0] = d[c, path[0]]
+        cost[1:-1] = d[path[:-1], c] + d[c, path[1:]] - d[path[:-1], path[1:]]
+        cost[-1] = d[path[-1], c]
+        order.insert(int(np.argmin(cost)), c)
+    return order
+
+
+def _matrix(ps, mode, cache, client):
+    if mode == "yandex" and client.apikey and ps.has_coords().all():
+        coords = list(zip(ps.lat.tolist(), ps.lon.tolist()))
+        try:
+            dist, stats = fetch_distance_matrix(coords, client.apikey, cache=cache, client=client)
+            return dist, "yandex", stats
+        except Exception:
+            pass
+    return haversine_matrix(ps.lat, ps.lon), "haversine", {}
+
+
+def apply_delta(route, added=(), removed=(), config: Config = Config(), cache=None, client=None):
+    """Updated route dict for ``route`` with ``added`` point dicts and ``removed`` stop ids.
+
+    Raises ValueError for multi-route results, unknown ids and added stops
+    without coordinates.
+    """
+    t0 = time.perf_counter()
+    mode = route.get("mode")
+    if mode not in SINGLE_ROUTE_MODES:
+        raise ValueError(f"Incremental updates support single-route runs, not mode '{mode}'")
+    points = route["ordered_points"]
+    removed = {str(x) for x in removed}  # ids may come back from JSON as numbers or strings
+    unknown = removed - {str(p.get("id")) for p in points}
+    if unknown:
+        raise ValueError(f"Unknown stop ids: {sorted(unknown)}")
+    new = PointSet.from_dicts(list(added))
+    if not new.has_coords().all():
+        raise ValueError("Added stops need latitude and longitude")
+
+    # 1. cut removed stops; their former neighbours are the affected spots
+    affected = set()
+    kept = []
+    for p in points:
+        if str(p.get("id")) in removed:
+            affected.update(j for j in (len(kept) - 1, len(kept)) if j >= 0)
+        else:
+            kept.append(p)
+    all_points = kept + new.to_dicts()
+    ps = PointSet.from_dicts(all_points)
+    n_kept = len(kept)
+    affected = {j for j in affected if j < n_kept}
+
+    # 2. matrix for the new stop set (road cells come from the cache where possible)
+    if client is None:
+        client = MatrixClient.from_config(config, getattr(config, "YANDEX_API_KEY", None))
+    dist, source, stats = _matrix(ps, mode, cache, client)
+
+    # 3. cheapest insertion of the new stops, 4. local search around the changes
+    new_idx = list(range(n_kept, len(all_points)))
+    order = cheapest_insertion(range(n_kept), new_idx, dist)
+    pos = {c: q for q, c in enumerate(order)}
+    for c in new_idx:
+        affected.update(order[q] for q in (pos[c] - 1, pos[c], pos[c] + 1) if 0 <= q < len(order))
+    ls_stats = {}
+    order = improve_tour(order, dist, k=getattr(config, "LOCAL_SEARCH_NEIGHBORS", 10),
+                         time_budget=getattr(config, "INCREMENTAL_TIME_BUDGET", 0.2),
+                         stats=ls_stats, active=sorted(affected))
+    order = vip_order(order, ps.vip)
+
+    ordered = [all_points[i] for i in order]
+    km = tour_distance(order, dist)
+    return {
+        "mode": mode,
+        "distance_source": source,
+        "ordered_ids": [p["id"] for p in ordered],
+        "ordered_points": ordered,
+        "metrics": {
+            "distance_km": km,
+            "estimated_travel_time_min": km / getattr(config, "AVERAGE_SPEED_KMH", 40) * 60,
+            "added": len(new_idx),
+            "removed": len(removed),
+            "reoptimise_ms": (time.perf_counter() - t0) * 1000.0,
+            **{k: v for k, v in ls_stats.items() if k != "timed_out"},
+            **stats
+        }
+    }
+
+
+def reoptimise_run(store, run_key, added=(), removed=(), config: Config = Config()):
+    """Apply a delta to stored run ``run_key`` and store the result as a new run.
+
+    Returns ``(new_run_key, route)``, or None when ``run_key`` is not stored.
+    """
+    from .pipeline import _write_outputs
+
+    route = store.lookup(run_key)
+    if route is None:
+        return None
+    added = list(added)
+    key = delta_key(run_key, added, removed)
+    stored = store.lookup(key)
+    if stored is not None:
+        return key, stored
+    out = apply_delta(route, added, removed, config, cache=MatrixCache.from_config(config))
+    out["parent_run"] = run_key
+    tmp = store.begin()
+    try:
+        _write_outputs(tmp, out, lambda stage: None, url_by="coords" if out["mode"] == "yandex" else "address",
+                       binary=getattr(config, "ROUTE_BINARY_FORMAT", None))
+    except BaseException:
+        store.abort(tmp)
+        raise
+    store.commit(tmp, key)
+    return key, out
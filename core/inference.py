@@ -0,0 +1,213 @@
+"""GNN inference backends.
+
+``Config.GNN_BACKEND`` chooses how node scores are computed:
+
+- ``torch``: the eager ``SimpleGNN`` from ``model_registry`` (default);
+- ``numpy``: the same forward pass on exported weights (``.npz``) with
+  NumPy / SciPy, so the worker never imports torch. Sparse adjacency stays
+  sparse;
+- ``onnxruntime``: an exported ONNX graph;
+- ``torchscript``: an exported TorchScript module (torch, but no eager
+  model code).
+
+The ONNX and TorchScript graphs are traced on a dense adjacency, so sparse
+(kNN) graphs are densified before they are passed in; prefer ``numpy`` for
+large sparse graphs. ``Config.INFERENCE_THREADS`` sets the intra-op thread
+count of onnxruntime and torch; NumPy follows the BLAS environment
+variables (``OMP_NUM_THREADS`` / ``OPENBLAS_NUM_THREADS``).
+
+Export the configured model (``GNN_STATE_PATH`` or the seeded init) with::
+
+    python -m core.inference --format npz --out models/gnn.npz
+"""
+
+import argparse
+import threading
+from pathlib import Path
+import numpy as np
+from .config import Config
+
+BACKENDS = ("torch", "numpy", "onnxruntime", "torchscript")
+EXPORT_FORMATS = {"npz": ".npz", "onnx": ".onnx", "torchscript": ".pt"}
+
+_backends = {}
+_lock = threading.Lock()
+
+
+def _dense(adj):
+    return np.asarray(adj.toarray() if hasattr(adj, "toarray") else adj, dtype=np.float32)
+
+
+def _relu(a):
+    return np.maximum(a, 0.0, out=a)
+
+
+class NumpyGNN:
+    """``SimpleGNN.forward`` in float32 NumPy from an exported ``state_dict``."""
+
+    def __init__(self, weights):
+        w = {k: np.asarray(v, dtype=np.float32) for k, v in weights.items()}
+        self.w1, self.b1 = w["lin1.weight"].T.copy(), w["lin1.bias"]
+        self.w2, self.b2 = w["lin2.weight"].T.copy(), w["lin2.bias"]
+        self.wr, self.br = w["readout.weight"].T.copy(), w["readout.bias"]
+        self.in_dim = self.w1.shape[0]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(dict(data))
+
+    def __call__(self, feats, adj):
+        x = np.asarray(feats, dtype=np.float32)
+        h = _relu(x @ self.w1 + self.b1)
+        if hasattr(adj, "tocsr"):
+            adj = adj.tocsr().astype(np.float32)
+            deg = np.asarray(adj.sum(axis=1), dtype=np.float32) + 1e-6
+            msg = adj @ h / deg
+        else:
+            adj = np.asarray(adj, dtype=np.float32)
+            msg = adj @ h / (adj.sum(axis=1, keepdims=True) + 1e-6)
+        h = _relu(np.asarray(msg, dtype=np.float32) @ self.w2 + self.b2)
+        return (h @ self.wr + self.br)[:, 0]
+
+
+class OnnxGNN:
+    def __init__(self, path, threads=None):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+            opts.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(path), sess_options=opts, providers=["CPUExecutionProvider"])
+
+    def __call__(self, feats, adj):
+        return self.session.run(None, {"x": np.asarray(feats, dtype=np.float32), "adj": _dense(adj)})[0]
+
+
+class TorchScriptGNN:
+    def __init__(self, path, threads=None):
+        import torch
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.torch = torch
+        self.module = torch.jit.load(str(path), map_location="cpu").eval()
+
+    def __call__(self, feats, adj):
+        torch = self.torch
+        with torch.no_grad():
+            return self.module(torch.from_numpy(np.asarray(feats, dtype=np.float32)),
+                               torch.from_numpy(_dense(adj))).numpy()
+
+
+class EagerGNN:
+    def __init__(self, config, threads=None):
+        import torch
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.torch = torch
+        self.config = config
+
+    def __call__(self, feats, adj):
+        from .gnn_model import adjacency_to_torch
+        from .model_registry import model_for_config
+
+        torch = self.torch
+        x = torch.tensor(np.asarray(feats), dtype=torch.float32)
+        model = model_for_config(self.config, in_dim=x.shape[1])
+        with torch.no_grad():
+            return model(x, adjacency_to_torch(adj)).numpy()
+
+
+def backend_for_config(config: Config = Config()):
+    """Warm per-process scorer ``fn(feats, adj) -> scores`` for ``Config.GNN_BACKEND``."""
+    kind = getattr(config, "GNN_BACKEND", "torch") or "torch"
+    threads = getattr(config, "INFERENCE_THREADS", None) or getattr(config, "TORCH_THREADS", None)
+    path = getattr(config, "GNN_EXPORT_PATH", None)
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown GNN backend: {kind}")
+    if kind != "torch" and not path:
+        raise ValueError(f"GNN backend '{kind}' needs Config.GNN_EXPORT_PATH")
+    key = (kind, str(path) if kind != "torch" else None, threads,
+           None if kind != "torch" else (getattr(config, "GNN_HIDDEN_DIM", 32),
+                                          str(getattr(config, "GNN_STATE_PATH", None)),
+                                          getattr(config, "GNN_SEED", 0)))
+    backend = _backends.get(key)
+    if backend is not None:
+        return backend
+    with _lock:
+        backend = _backends.get(key)
+        if backend is None:
+            if kind == "torch":
+                backend = EagerGNN(config, threads)
+            elif kind == "numpy":
+                backend = NumpyGNN.load(path)
+            elif kind == "onnxruntime":
+                backend = OnnxGNN(path, threads)
+            else:
+                backend = TorchScriptGNN(path, threads)
+            _backends[key] = backend
+    return backend
+
+
+def predict(feats, adj, config: Config = Config()):
+    """GNN scores for one graph (or a block-diagonal batch) with the configured backend."""
+    return np.asarray(backend_for_config(config)(feats, adj), dtype=np.float32)
+
+
+def warmup(config: Config = Config()):
+    """Load the configured backend (and, for 'torch', the model) ahead of the first request."""
+    backend_for_config(config)
+    if (getattr(config, "GNN_BACKEND", "torch") or "torch") == "torch":
+        from .model_registry import warmup as warm_model
+        warm_model(config)
+
+
+def clear():
+    with _lock:
+        _backends.clear()
+
+
+def export_model(model, path, fmt="npz", n_example=8):
+    """Write eager ``model`` as ``fmt`` ('npz' / 'onnx' / 'torchscript') to ``path``."""
+    import torch
+
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    model = model.eval()
+    if fmt == "npz":
+        np.savez(path, **{k: v.detach().cpu().numpy() for k, v in model.state_dict().items()})
+        return path
+    x = torch.zeros(n_example, model.lin1.in_features)
+    adj = torch.ones(n_example, n_example)
+    with torch.no_grad():
+        if fmt == "torchscript":
+            torch.jit.trace(model, (x, adj)).save(str(path))
+        else:
+            torch.onnx.export(model, (x, adj), str(path), input_names=["x", "adj"], output_names=["scores"],
+                              dynamic_axes={"x": {0: "n"}, "adj": {0: "n", 1: "n"}, "scores": {0: "n"}},
+                              opset_version=17)
+    return path
+
+
+def main():
+    from .features import DEFAULT_FEATURES
+    from .model_registry import model_for_config
+
+    ap = argparse.ArgumentParser(description="Export the configured GNN for CPU-only inference.")
+    ap.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="npz")
+    ap.add_argument("--out", type=Path, required=True)
+    ap.add_argument("--in-dim", type=int, default=None, help="feature count (default: Config.GNN_FEATURES)")
+    args = ap.parse_args()
+    config = Config()
+    in_dim = args.in_dim or len(getattr(config, "GNN_FEATURES", DEFAULT_FEATURES))
+    path = export_model(model_for_config(config, in_dim), args.out, args.format)
+    print(f"exported {args.format} model to {path}")
+
+
+if __name__ == "__main__":
+    main()
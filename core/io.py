@@ -1,46 +1,137 @@
+"""Input loading: CSV / Excel -> typed columnar NumPy arrays.
+
+``load_input`` returns a dict of equal-length arrays keyed by the English
+column names. Text columns are object arrays (None when missing), the
+coordinates and ``service_time`` are float64 (NaN when missing) and the
+time-window / lunch columns are int32 minutes after midnight
+(``NO_TIME`` when missing).
+
+Large CSV files are streamed in chunks so the intermediate DataFrame never
+holds the whole file; smaller ones are read in one go, with the pyarrow
+engine when it is installed. Clock cells are parsed with one vectorised
+regex per column instead of a ``strptime`` per row.
+"""
+
+import importlib.util
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from .utils import parse_time_window
 
-def load_input(path):
-    path = Path(path)
-    if path.suffix in ['.csv', '.xls']:
-        df = pd.read_csv(path)
-    else:
-        df = pd.read_csv(path)
-
-    # 🧭 Автоматическое сопоставление русских названий
-    rename_map = {
-        'Номер объекта': 'id',
-        'Адрес объекта': 'address',
-        'Географическая широта': 'latitude',
-        'Географическая долгота': 'longitude',
-        'Уровень клиента': 'priority',
-        'Время начала рабочего дня': 'time_window_start',
-        'Время окончания рабочего дня': 'time_window_end',
-        'Время начала обеда': 'lunch_start',
-        'Время окончания обеда': 'lunch_end',
-    }
+NO_TIME = -1
+CHUNK_ROWS = 100_000
+STREAM_MIN_BYTES = 32 << 20  # CSV files above this size are read in chunks
+
+# 🧭 Автоматическое сопоставление русских названий
+RENAME_MAP = {
+    'Номер объекта': 'id',
+    'Адрес объекта': 'address',
+    'Географическая широта': 'latitude',
+    'Географическая долгота': 'longitude',
+    'Уровень клиента': 'priority',
+    'Время начала рабочего дня': 'time_window_start',
+    'Время окончания рабочего дня': 'time_window_end',
+    'Время начала обеда': 'lunch_start',
+    'Время окончания обеда': 'lunch_end',
+}
+TEXT_COLUMNS = ('client_name', 'address', 'priority')
+# (column, half of a merged '09:0018:00' cell, column to split when this one is missing)
+CLOCK_COLUMNS = (('time_window_start', 0, None), ('time_window_end', 1, 'time_window_start'),
+                 ('lunch_start', 0, None), ('lunch_end', 1, 'lunch_start'))
+# 'HH:MM', 'H:MM:SS', 'HHMM' or two of them merged into one cell
+_CLOCK_RE = r'(\d{1,2}):?(\d{2})(?::\d{2})?\D*(?:(\d{1,2}):?(\d{2}))?'
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+def _dtypes(columns):
+    # read text and clock cells as strings; coordinates are coerced later
+    names = set(TEXT_COLUMNS) | {c for c, _, _ in CLOCK_COLUMNS}
+    return {c: str for c in columns if RENAME_MAP.get(c, c) in names}
+
 
-    for k, v in rename_map.items():
-        if k in df.columns and v not in df.columns:
-            df.rename(columns={k: v}, inplace=True)
+def clock_minutes_column(values, part=0):
+    """Vectorised clock parsing: cells -> int32 minutes after midnight (``NO_TIME`` if unparsable).
+
+    ``part`` selects the half of merged '09:0018:00' cells; a single clock
+    is used for either part.
+    """
+    s = pd.Series(values, dtype=object)
+    if len(s) == 0:
+        return np.empty(0, dtype=np.int32)
+    parts = s.astype("string").str.extract(_CLOCK_RE)
+    h, m = parts[0], parts[1]
+    if part == 1:
+        merged = parts[2].notna()
+        h, m = h.where(~merged, parts[2]), m.where(~merged, parts[3])
+    h = pd.to_numeric(h, errors='coerce')
+    m = pd.to_numeric(m, errors='coerce')
+    minutes = h * 60 + m
+    ok = (h < 24) & (m < 60)
+    return minutes.where(ok).fillna(NO_TIME).to_numpy(dtype=np.int32)
+
+
+def _text(df, col):
+    if col not in df.columns:
+        return np.full(len(df), None, dtype=object)
+    s = df[col].astype(object)
+    return s.where(s.notna(), None).to_numpy(dtype=object)
+
+
+def _columns(df):
+    """One raw chunk -> dict of typed arrays."""
+    df = df.rename(columns={k: v for k, v in RENAME_MAP.items() if v not in df.columns})
 
     # Проверка наличия нужных колонок
-    required = ['latitude', 'longitude']
-    for col in required:
+    for col in ('latitude', 'longitude'):
         if col not in df.columns:
             raise ValueError(f"В файле нет нужного столбца: {col}")
 
-    # Преобразования
-    df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
-    df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
+    n = len(df)
+    cols = {
+        'id': df['id'].to_numpy(dtype=object) if 'id' in df.columns else np.full(n, None, dtype=object),
+        'latitude': pd.to_numeric(df['latitude'], errors='coerce').to_numpy(dtype=np.float64),
+        'longitude': pd.to_numeric(df['longitude'], errors='coerce').to_numpy(dtype=np.float64),
+    }
+    for col in TEXT_COLUMNS:
+        cols[col] = _text(df, col)
+    # Обработка временных окон (в том числе объединённых в одну ячейку)
+    for col, part, merged_from in CLOCK_COLUMNS:
+        src = col
+        if (col not in df.columns or df[col].isna().all()) and merged_from in df.columns:
+            src = merged_from
+        cols[col] = (clock_minutes_column(df[src].to_numpy(dtype=object), part) if src in df.columns
+                     else np.full(n, NO_TIME, dtype=np.int32))
+    cols['service_time'] = (pd.to_numeric(df['service_time'], errors='coerce').to_numpy(dtype=np.float64)
+                            if 'service_time' in df.columns else np.full(n, np.nan))
+    return cols
+
+
+def read_chunks(path, chunksize=None):
+    """Yield raw DataFrames of an input file (one for Excel and small CSVs)."""
+    path = Path(path)
+    if path.suffix.lower() in ('.xlsx', '.xlsm', '.xls'):
+        header = pd.read_excel(path, nrows=0).columns
+        yield pd.read_excel(path, dtype=_dtypes(header))
+        return
+    header = pd.read_csv(path, nrows=0).columns
+    dtype = _dtypes(header)
+    if chunksize is None and path.stat().st_size > STREAM_MIN_BYTES:
+        chunksize = CHUNK_ROWS
+    # the C engine's default float parser can differ from pyarrow's in the last bit;
+    # round_trip parses like pyarrow, so chunked and whole-file reads give the same values
+    if chunksize:
+        yield from pd.read_csv(path, dtype=dtype, chunksize=chunksize, float_precision="round_trip")
+    elif HAS_PYARROW:
+        yield pd.read_csv(path, dtype=dtype, engine="pyarrow")
+    else:
+        yield pd.read_csv(path, dtype=dtype, float_precision="round_trip")
 
-    # Обработка временных окон (если объединены в одну ячейку)
-    if 'time_window_start' in df.columns and df['time_window_start'].dtype == object:
-        if 'time_window_end' not in df.columns or df['time_window_end'].isnull().all():
-            df[['time_window_start', 'time_window_end']] = df['time_window_start'].astype(str).str.extract(r'(.{5})(.{5})')
 
-    df['_tw_start_time'] = df['time_window_start'].apply(lambda x: parse_time_window(x)[0] if isinstance(x, str) else None)
-    df['_tw_end_time'] = df['time_window_end'].apply(lambda x: parse_time_window(x)[1] if isinstance(x, str) else None)
-    return df
+def load_input(path, chunksize=None):
+    """Read a CSV / Excel file into a dict of typed column arrays (see module docstring)."""
+    parts = [_columns(df) for df in read_chunks(path, chunksize)]
+    if not parts:  # header-only CSV read in chunks
+        return _columns(pd.read_csv(path, nrows=0))
+    if len(parts) == 1:
+        return parts[0]
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
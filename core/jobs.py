@@ -0,0 +1,227 @@
+"""Background job queue for pipeline runs.
+
+``JobManager.submit`` returns a job id immediately; pipelines run in a
+bounded process pool so the web request thread is never blocked. Worker
+processes report their current stage (see ``pipeline.STAGES``) through a
+multiprocessing queue that a daemon thread in the parent drains into the
+job table.
+
+Every run writes into its own ResultStore directory; an input already in
+the store completes instantly without touching the pool. Uploads
+submitted with ``remove_input=True`` are deleted once their job ends.
+
+The job table lives in this process: a web app serving it must run as a
+single server process (any number of pool workers), or status polls that
+land on another process find no such job.
+
+``add_listener`` registers a callback that receives ``(job_id, status)``
+on every state or stage change, so servers can push progress instead of
+polling; callbacks run on the drain / pool callback threads.
+
+Finished jobs feed latency histograms (queue-to-finish time and the wall
+time of every pipeline stage) into ``metrics``, a ``profiling.Histograms``.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from .config import Config
+from .profiling import REGISTRY
+from .result_store import ResultStore, input_key
+
+_progress_queue = None
+
+
+def _init_worker(queue, config):
+    global _progress_queue
+    _progress_queue = queue
+    # pay the backend load (torch import and model construction for 'torch') once per worker
+    from .inference import warmup
+    warmup(config)
+
+
+def _run_job(job_id, input_path, store, key, config):
+    from .pipeline import run_pipeline
+
+    def progress(stage):
+        if _progress_queue is not None:
+            _progress_queue.put((job_id, stage))
+
+    tmp = store.begin()
+    try:
+        out = run_pipeline(input_path, output_dir=tmp, config=config, progress=progress)
+    except BaseException:
+        store.abort(tmp)
+        raise
+    store.commit(tmp, key)
+    return out
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class JobManager:
+    def __init__(self, max_workers=2, max_pending=100, history=1000, start_method="spawn", config=None, store=None,
+                 metrics=REGISTRY):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.history = history
+        self.config = config if config is not None else Config()
+        self.store = store if store is not None else ResultStore.from_config(self.config)
+        self.metrics = metrics
+        self._ctx = multiprocessing.get_context(start_method)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._queue = None
+        self._listeners = []
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(max_workers=getattr(config, "JOB_WORKERS", 2),
+                   max_pending=getattr(config, "JOB_MAX_PENDING", 100),
+                   history=getattr(config, "JOB_HISTORY", 1000),
+                   start_method=getattr(config, "JOB_START_METHOD", "spawn"),
+                   config=config, store=ResultStore.from_config(config))
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            self._queue = self._ctx.Queue()
+            threading.Thread(target=self._drain, daemon=True).start()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._ctx,
+                                             initializer=_init_worker, initargs=(self._queue, self.config))
+
+    def _drain(self):
+        while True:
+            try:
+                job_id, stage = self._queue.get()
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job["state"] not in ("queued", "running"):
+                    continue
+                job["state"] = "running"
+                job["stage"] = stage
+            self._notify(job_id)
+
+    def add_listener(self, fn):
+        """Call ``fn(job_id, status)`` on every job state / stage change."""
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _notify(self, job_id):
+        if not self._listeners:
+            return
+        status = self.status(job_id)
+        for fn in list(self._listeners):
+            try:
+                fn(job_id, status)
+            except Exception:
+                pass  # a broken subscriber must not stop the drain thread
+
+    def _pending(self):
+        return sum(1 for j in self._jobs.values() if j["state"] in ("queued", "running"))
+
+    def submit(self, input_path, job_id=None, remove_input=False):
+        """Queue a pipeline run and return its job id (finished at once if the result is stored).
+
+        ``remove_input=True`` deletes ``input_path`` when the job ends, or
+        at once when it is answered from the store or rejected.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        try:
+            key = input_key(input_path, self.config)
+        except BaseException:
+            if remove_input:
+                _remove(input_path)
+            raise
+        job = {"id": job_id, "state": "queued", "stage": None, "error": None, "result": None,
+               "input": str(input_path), "run_key": key, "output_dir": str(self.store.run_dir(key)),
+               "cached": False, "created": time.time(), "finished": None, "remove_input": remove_input}
+        stored = self.store.lookup(key)
+        with self._lock:
+            if stored is not None:
+                job.update(state="done", stage="done", result=stored, cached=True, finished=time.time())
+                self._jobs[job_id] = job
+                self._trim()
+                if remove_input:
+                    _remove(input_path)
+                return job_id
+            if self._pending() >= self.max_pending:
+                if remove_input:
+                    _remove(input_path)
+                raise JobQueueFull("Too many jobs in progress")
+            self._ensure_pool()
+            self._jobs[job_id] = job
+            self._trim()
+            future = self._pool.submit(_run_job, job_id, str(input_path), self.store, key, self.config)
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def _finish(self, job_id, future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["finished"] = time.time()
+            exc = future.exception()
+            if exc is None:
+                job["state"] = "done"
+                job["stage"] = "done"
+                job["result"] = future.result()
+            else:
+                job["state"] = "failed"
+                job["error"] = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+            if job["remove_input"]:
+                _remove(job["input"])
+        self._notify(job_id)
+        self._observe(job, job["result"])
+
+    def _observe(self, job, result):
+        if self.metrics is None:
+            return
+        self.metrics.observe("pipeline_job_seconds", job["finished"] - job["created"], state=job["state"])
+        profile = ((result or {}).get("metrics") or {}).get("profile") or {}
+        for stage, t in profile.get("stages", {}).items():
+            if "." not in stage:  # top-level stages only, spans are nested in them
+                self.metrics.observe("pipeline_stage_seconds", t["wall_s"], stage=stage)
+
+    def _trim(self):
+        # forget the oldest finished jobs beyond the history limit
+        extra = len(self._jobs) - self.history
+        for job_id in [k for k, j in self._jobs.items() if j["state"] in ("done", "failed")][:max(0, extra)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def status(self, job_id):
+        """Public status dict (no result payload), or None for unknown ids."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        return {k: job[k] for k in ("id", "state", "stage", "error", "run_key", "cached", "created", "finished")}
+
+    def shutdown(self, wait=True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
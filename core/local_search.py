@@ -0,0 +1,201 @@
+"""Local search for open-path tours (fixed start, free end).
+
+Moves are evaluated with constant-time edge deltas instead of recomputing
+the whole tour length:
+
+- 2-opt: reverse a segment, replacing two edges;
+- Or-opt: relocate a segment of 1-3 stops next to one of its neighbours.
+
+Candidates are restricted to each node's k nearest neighbours, and
+don't-look bits keep the search on the part of the tour that changed
+recently. The search stops at a local optimum or when the wall-clock
+``time_budget`` (seconds) runs out, whichever comes first.
+
+The engine assumes symmetric distances; an asymmetric matrix is folded
+with ``min(d[i][j], d[j][i])``. Unreachable (``inf``) legs are replaced by
+a large finite penalty so deltas stay well defined.
+"""
+
+import time
+from collections import deque
+import numpy as np
+
+DEFAULT_NEIGHBORS = 10
+OR_OPT_MAX_SEGMENT = 3
+
+
+def neighbor_lists(dist, k=DEFAULT_NEIGHBORS, block_size=1024):
+    """The ``k`` nearest other nodes of every node, sorted by distance."""
+    d = np.asarray(dist)
+    n = len(d)
+    k = min(int(k), n - 1)
+    if k <= 0:
+        return [[] for _ in range(n)]
+    out = []
+    for s in range(0, n, block_size):
+        block = d[s:s + block_size].copy()
+        rows = np.arange(len(block))
+        block[rows, rows + s] = np.inf
+        idx = np.argpartition(block, k - 1, axis=1)[:, :k]
+        near = np.take_along_axis(block, idx, axis=1)
+        idx = np.take_along_axis(idx, np.argsort(near, axis=1, kind='stable'), axis=1)
+        out.extend(idx.tolist())
+    return out
+
+
+def _working_matrix(dist):
+    # float32 (shared) matrices are used as they are, without a float64 copy
+    d = np.asarray(dist)
+    if d.dtype.kind != 'f':
+        d = d.astype(float)
+    if not np.array_equal(d, d.T):
+        d = np.minimum(d, d.T)
+    finite = np.isfinite(d)
+    if not finite.all():
+        big = (d[finite].max() if finite.any() else 1.0) * 10.0 + 1e6
+        d = np.where(finite, d, big)
+    return d
+
+
+def improve_tour(order, dist, neighbors=None, k=DEFAULT_NEIGHBORS, time_budget=2.0, or_opt=True, stats=None,
+                 active=None, prepared=False):
+    """Improve an open-path ``order`` in place of the old full-recompute 2-opt.
+
+    ``order[0]`` stays fixed. ``neighbors`` may be precomputed with
+    :func:`neighbor_lists`. If ``stats`` is a dict, move counters are added
+    to it (``two_opt_moves``, ``or_opt_moves``, ``timed_out``). ``active``
+    limits the initial work queue to these nodes (default: every node), for
+    repairing a tour that only changed locally. ``prepared=True`` skips
+    the symmetry / finiteness pass when ``dist`` already went through it
+    (repeated calls on one matrix).
+    """
+    tour = list(order)
+    n = len(tour)
+    if n < 4:
+        return tour
+    D = dist if prepared else _working_matrix(dist)
+    d = D.item
+    if neighbors is None:
+        neighbors = neighbor_lists(D, k)
+    pos = [0] * len(D)
+    for i, c in enumerate(tour):
+        pos[c] = i
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+
+    def reverse(i, j):
+        tour[i:j + 1] = tour[i:j + 1][::-1]
+        for q in range(i, j + 1):
+            pos[tour[q]] = q
+
+    def try_two_opt(a):
+        pa = pos[a]
+        # successor edges (lo, lo+1), (hi, hi+1)  ->  (lo, hi), (lo+1, hi+1)
+        if pa < n - 1:
+            d_succ = d(a, tour[pa + 1])
+            for c in neighbors[a]:
+                if d_succ - d(a, c) <= 1e-9:
+                    break
+                pc = pos[c]
+                lo, hi = (pa, pc) if pa < pc else (pc, pa)
+                if hi - lo < 2:
+                    continue
+                x, y = tour[lo], tour[lo + 1]
+                gain = d(x, y) - d(x, tour[hi])
+                if hi + 1 < n:
+                    gain += d(tour[hi], tour[hi + 1]) - d(y, tour[hi + 1])
+                if gain > 1e-9:
+                    reverse(lo + 1, hi)
+                    return (x, y, tour[lo + 1]) + ((tour[hi + 1],) if hi + 1 < n else ())
+        # predecessor edges (lo-1, lo), (hi-1, hi)  ->  (lo-1, hi-1), (lo, hi)
+        if pa > 0:
+            d_pred = d(tour[pa - 1], a)
+            for c in neighbors[a]:
+                if d_pred - d(a, c) <= 1e-9:
+                    break
+                pc = pos[c]
+                if pc == 0:
+                    continue
+                lo, hi = (pc, pa) if pc < pa else (pa, pc)
+                if hi - lo < 2:
+                    continue
+                w, x, y, z = tour[lo - 1], tour[lo], tour[hi - 1], tour[hi]
+                gain = d(w, x) + d(y, z) - d(w, y) - d(x, z)
+                if gain > 1e-9:
+                    reverse(lo, hi - 1)
+                    return (w, x, y, z)
+        return None
+
+    def try_or_opt(a):
+        p = pos[a]
+        if p == 0:
+            return None
+        for L in range(1, OR_OPT_MAX_SEGMENT + 1):
+            if p + L > n:
+                break
+            s0, sL = tour[p], tour[p + L - 1]
+            prev = tour[p - 1]
+            nxt = tour[p + L] if p + L < n else None
+            removed = d(prev, s0) + (d(sL, nxt) - d(prev, nxt) if nxt is not None else 0.0)
+            for c in neighbors[s0]:
+                if removed - d(s0, c) <= 1e-9:
+                    break
+                pc = pos[c]
+                if p <= pc < p + L:
+                    continue
+                # insert as u + seg + v with s0 next to c:
+                # forward after c, or reversed before c
+                options = []
+                if pc + 1 >= n:
+                    options.append((d(c, s0), c, None, False))
+                elif not (p <= pc + 1 < p + L):
+                    v = tour[pc + 1]
+                    options.append((d(c, s0) + d(sL, v) - d(c, v), c, v, False))
+                if pc > 0 and not (p <= pc - 1 < p + L):
+                    u = tour[pc - 1]
+                    options.append((d(u, sL) + d(s0, c) - d(u, c), u, c, True))
+                for added, u, v, rev in options:
+                    if removed - added > 1e-9:
+                        seg = tour[p:p + L]
+                        if rev:
+                            seg.reverse()
+                        del tour[p:p + L]
+                        at = (pos[u] - L if pos[u] > p else pos[u]) + 1
+                        tour[at:at] = seg
+                        for q in range(min(p, at), min(n, max(p + L, at + L))):
+                            pos[tour[q]] = q
+                        return (prev, s0, sL, u) + tuple(x for x in (nxt, v) if x is not None)
+        return None
+
+    if active is None:
+        queue = deque(tour)
+    else:
+        in_tour = set(tour)
+        queue = deque(c for c in dict.fromkeys(active) if c in in_tour)
+    active = [False] * len(D)
+    for c in queue:
+        active[c] = True
+    two_opt_moves = or_opt_moves = 0
+    timed_out = False
+    while queue:
+        if deadline is not None and time.perf_counter() > deadline:
+            timed_out = True
+            break
+        a = queue.popleft()
+        active[a] = False
+        touched = try_two_opt(a)
+        if touched is not None:
+            two_opt_moves += 1
+        elif or_opt:
+            touched = try_or_opt(a)
+            if touched is not None:
+                or_opt_moves += 1
+        if touched is not None:
+            for c in touched + (a,):
+                if not active[c]:
+                    active[c] = True
+                    queue.append(c)
+    if stats is not None:
+        stats['two_opt_moves'] = stats.get('two_opt_moves', 0) + two_opt_moves
+        stats['or_opt_moves'] = stats.get('or_opt_moves', 0) + or_opt_moves
+        stats['timed_out'] = stats.get('timed_out', False) or timed_out
+    return tour
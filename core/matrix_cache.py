@@ -0,0 +1,156 @@
+"""Persistent cache for Distance Matrix API cells.
+
+Cells are stored in SQLite, keyed by routing profile and by origin and
+destination coordinates rounded to ``precision`` decimals (5 decimals is
+about 1 m). Entries older than ``ttl`` seconds are ignored and purged;
+when the table grows past ``max_entries`` the least recently used cells
+are evicted.
+
+A new connection is opened for every operation, so one cache file can be
+shared by threads and worker processes.
+"""
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cells (
+    profile TEXT NOT NULL,
+    olat INTEGER NOT NULL, olon INTEGER NOT NULL,
+    dlat INTEGER NOT NULL, dlon INTEGER NOT NULL,
+    distance REAL, duration REAL,
+    created REAL NOT NULL, accessed REAL NOT NULL,
+    PRIMARY KEY (profile, olat, olon, dlat, dlon)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cells_accessed ON cells (accessed);
+"""
+
+
+class MatrixCache:
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=2_000_000, precision=5):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.scale = 10 ** precision
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.executescript(_SCHEMA)
+
+    @classmethod
+    def from_config(cls, config):
+        """Cache configured by ``Config.MATRIX_CACHE_*``, or None when disabled."""
+        path = getattr(config, "MATRIX_CACHE_PATH", None)
+        if not path:
+            return None
+        return cls(path,
+                   ttl=getattr(config, "MATRIX_CACHE_TTL", 7 * 24 * 3600),
+                   max_entries=getattr(config, "MATRIX_CACHE_MAX_ENTRIES", 2_000_000),
+                   precision=getattr(config, "MATRIX_CACHE_PRECISION", 5))
+
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _key(self, lat, lon):
+        return int(round(float(lat) * self.scale)), int(round(float(lon) * self.scale))
+
+    def lookup(self, profile, origins, destinations):
+        """Cached ``(distance_m, duration_s)`` matrices for ``(lat, lon)`` lists; NaN where missing."""
+        n, m = len(origins), len(destinations)
+        dist = np.full((n, m), np.nan)
+        dur = np.full((n, m), np.nan)
+        if not n or not m:
+            return dist, dur
+        now = time.time()
+        dkeys = {}
+        for j, (lat, lon) in enumerate(destinations):
+            dkeys.setdefault(self._key(lat, lon), []).append(j)
+        touched = []
+        with self._connect() as con:
+            for i, (lat, lon) in enumerate(origins):
+                olat, olon = self._key(lat, lon)
+                rows = con.execute(
+                    "SELECT dlat, dlon, distance, duration FROM cells "
+                    "WHERE profile=? AND olat=? AND olon=? AND created>=?",
+                    (profile, olat, olon, now - self.ttl)).fetchall()
+                for dlat, dlon, d, t in rows:
+                    cols = dkeys.get((dlat, dlon))
+                    if cols is None:
+                        continue
+                    dist[i, cols] = np.nan if d is None else d
+                    dur[i, cols] = np.nan if t is None else t
+                    touched.append((now, profile, olat, olon, dlat, dlon))
+            if touched:
+                con.executemany(
+                    "UPDATE cells SET accessed=? WHERE profile=? AND olat=? AND olon=? AND dlat=? AND dlon=?",
+                    touched)
+        return dist, dur
+
+    def record(self, hits, misses):
+        """Add to the hit/miss counters reported in route metrics."""
+        self.hits += int(hits)
+        self.misses += int(misses)
+
+    def store(self, profile, origins, destinations, dist, dur=None):
+        """Store every finite cell of a fetched ``origins x destinations`` block."""
+        now = time.time()
+        rows = []
+        okeys = [self._key(*o) for o in origins]
+        dkeys = [self._key(*d) for d in destinations]
+        for i, (olat, olon) in enumerate(okeys):
+            for j, (dlat, dlon) in enumerate(dkeys):
+                d = dist[i][j]
+                if d is None or not np.isfinite(d):
+                    continue
+                t = None if dur is None or dur[i][j] is None or not np.isfinite(dur[i][j]) else float(dur[i][j])
+                rows.append((profile, olat, olon, dlat, dlon, float(d), t, now, now))
+        if not rows:
+            return 0
+        with self._connect() as con:
+            con.executemany("INSERT OR REPLACE INTO cells VALUES (?,?,?,?,?,?,?,?,?)", rows)
+        self.evict()
+        return len(rows)
+
+    def samples(self, profile, limit=None):
+        """Fresh cells of ``profile`` as arrays ``(olat, olon, dlat, dlon, distance_m, duration_s)``.
+
+        Coordinates are the rounded cache keys in degrees; missing durations
+        are NaN. ``limit`` keeps the most recently used cells.
+        """
+        sql = ("SELECT olat, olon, dlat, dlon, distance, duration FROM cells "
+               "WHERE profile=? AND created>=? AND distance IS NOT NULL ORDER BY accessed DESC")
+        args = (profile, time.time() - self.ttl)
+        if limit:
+            sql += " LIMIT ?"
+            args += (int(limit),)
+        with self._connect() as con:
+            rows = con.execute(sql, args).fetchall()
+        a = np.array(rows, dtype=float).reshape(-1, 6)
+        a[:, :4] /= self.scale
+        return tuple(a[:, c] for c in range(6))
+
+    def evict(self):
+        """Drop expired cells, then the least recently used ones above ``max_entries``."""
+        with self._connect() as con:
+            con.execute("DELETE FROM cells WHERE created<?", (time.time() - self.ttl,))
+            (count,) = con.execute("SELECT COUNT(*) FROM cells").fetchone()
+            extra = count - self.max_entries
+            if extra > 0:
+                con.execute(
+                    "DELETE FROM cells WHERE (profile, olat, olon, dlat, dlon) IN "
+                    "(SELECT profile, olat, olon, dlat, dlon FROM cells ORDER BY accessed LIMIT ?)",
+                    (extra,))
+
+    def __len__(self):
+        with self._connect() as con:
+            return con.execute("SELECT COUNT(*) FROM cells").fetchone()[0]
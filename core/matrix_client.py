@@ -0,0 +1,150 @@
+"""HTTP client for the Yandex Distance Matrix API.
+
+Large matrices are split into origin x destination tiles that respect the
+per-request limits (``tile_size`` points per side, optionally ``max_cells``
+cells per request). Tiles are fetched concurrently over one pooled
+``requests.Session`` with bounded parallelism, a shared request-rate limit
+and retry with exponential backoff, then stitched back into one matrix.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+YANDEX_MATRIX_URL = "https://api.routing.yandex.net/v2/distancematrix"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class MatrixClient:
+    def __init__(self, apikey, url=YANDEX_MATRIX_URL, profile="auto", tile_size=100, max_cells=None,
+                 max_workers=4, rate_limit=None, retries=3, backoff=0.5, timeout=15):
+        self.apikey = apikey
+        self.url = url
+        self.profile = profile
+        self.tile_size = max(1, int(tile_size))
+        self.max_cells = max_cells
+        self.max_workers = max(1, int(max_workers))
+        self.rate_limit = rate_limit  # requests per second across all threads
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.requests_made = 0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_config(cls, config, apikey=None):
+        return cls(apikey if apikey is not None else getattr(config, "YANDEX_API_KEY", None),
+                   url=getattr(config, "YANDEX_MATRIX_URL", YANDEX_MATRIX_URL),
+                   profile=getattr(config, "ROUTING_PROFILE", "auto"),
+                   tile_size=getattr(config, "MAX_POINTS", 100),
+                   max_cells=getattr(config, "MATRIX_MAX_CELLS", None),
+                   max_workers=getattr(config, "MATRIX_WORKERS", 4),
+                   rate_limit=getattr(config, "MATRIX_RATE_LIMIT", None),
+                   retries=getattr(config, "MATRIX_RETRIES", 3),
+                   backoff=getattr(config, "MATRIX_BACKOFF", 0.5))
+
+    def tiles(self, n, m):
+        """``(row_start, row_end, col_start, col_end)`` blocks covering an n x m matrix."""
+        rows = min(self.tile_size, n)
+        cols = min(self.tile_size, m)
+        if self.max_cells:
+            rows = max(1, min(rows, self.max_cells))
+            cols = max(1, min(cols, self.max_cells // rows))
+        return [(r, min(n, r + rows), c, min(m, c + cols))
+                for r in range(0, n, rows) for c in range(0, m, cols)]
+
+    def _throttle(self):
+        if not self.rate_limit:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate_limit
+        if slot > now:
+            time.sleep(slot - now)
+
+    def request(self, origins, destinations):
+        """POST one origins x destinations block (retrying transient failures).
+
+        Returns ``(distance_m, duration_s)`` arrays with NaN for cells the API
+        did not return. Raises on HTTP errors or a malformed response.
+        """
+        # Prepare POST body according to Yandex Distance Matrix API
+        body = {
+            "origins": [{"lat": lat, "lon": lon} for lat, lon in origins],
+            "destinations": [{"lat": lat, "lon": lon} for lat, lon in destinations],
+            "metrics": ["distance", "duration"],
+            "mode": self.profile,
+            "limit": len(destinations)
+        }
+        headers = {"Content-Type": "application/json", "Accept": "application/json",
+                   "Authorization": f"Api-Key {self.apikey}"}
+        for attempt in range(self.retries + 1):
+            self._throttle()
+            with self._lock:
+                self.requests_made += 1
+            try:
+                resp = self.session.post(self.url, headers=headers, json=body, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            else:
+                if resp.status_code == 200:
+                    return _parse_matrix(resp.json(), len(origins), len(destinations))
+                if resp.status_code not in RETRY_STATUS or attempt == self.retries:
+                    raise RuntimeError(f"Distance Matrix API returned HTTP {resp.status_code}")
+            time.sleep(self.backoff * 2 ** attempt)
+
+    def fetch(self, origins, destinations, need=None):
+        """Full ``(distance_m, duration_s)`` matrices, fetched tile by tile.
+
+        ``need`` is an optional boolean mask; tiles without any needed cell
+        are skipped and left as NaN.
+        """
+        n, m = len(origins), len(destinations)
+        dist = np.full((n, m), np.nan)
+        dur = np.full((n, m), np.nan)
+        tiles = [t for t in self.tiles(n, m) if need is None or need[t[0]:t[1], t[2]:t[3]].any()]
+
+        def run(tile):
+            r0, r1, c0, c1 = tile
+            return tile, self.request(origins[r0:r1], destinations[c0:c1])
+
+        if len(tiles) == 1 or self.max_workers == 1:
+            results = map(run, tiles)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = list(pool.map(run, tiles))
+        for (r0, r1, c0, c1), (d, t) in results:
+            dist[r0:r1, c0:c1] = d
+            dur[r0:r1, c0:c1] = t
+        return dist, dur
+
+
+def _parse_matrix(data, n, m):
+    # data expected to contain 'matrix' with distances (meters) between origins->destinations
+    matrix = data.get('matrix')
+    if matrix is None or len(matrix) != n:
+        raise ValueError("Distance Matrix API response has no matrix")
+    dist = np.full((n, m), np.nan)
+    dur = np.full_like(dist, np.nan)
+    for i, row in enumerate(matrix):
+        for j, cell in enumerate(row[:m]):
+            try:
+                d = cell.get('distance', {}).get('value')
+                t = cell.get('duration', {}).get('value')
+            except AttributeError:
+                continue
+            if d is not None:
+                dist[i, j] = float(d)
+            if t is not None:
+                dur[i, j] = float(t)
+    return dist, dur
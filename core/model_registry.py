@@ -0,0 +1,56 @@
+"""Per-process registry of warm GNN models.
+
+Building a ``SimpleGNN`` (and importing torch) on every request dominates
+small runs, so models are created once per worker and reused. A model is
+initialised from ``state_path`` (a saved ``state_dict``) when given, else
+with a fixed ``seed`` so every worker scores identically. torch is
+imported only when the first model is requested.
+"""
+
+import threading
+
+_models = {}
+_lock = threading.Lock()
+
+
+def get_model(in_dim, hidden_dim=32, state_path=None, seed=0):
+    """Shared eval-mode SimpleGNN for these settings, created on first use."""
+    key = (in_dim, hidden_dim, str(state_path) if state_path else None, seed)
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            import torch
+            from .gnn_model import SimpleGNN
+
+            with torch.random.fork_rng(devices=[]):
+                if seed is not None:
+                    torch.manual_seed(seed)
+                model = SimpleGNN(in_dim=in_dim, hidden_dim=hidden_dim)
+            if state_path:
+                model.load_state_dict(torch.load(state_path, map_location="cpu"))
+            model.eval()
+            _models[key] = model
+    return model
+
+
+def model_for_config(config, in_dim):
+    return get_model(in_dim,
+                     hidden_dim=getattr(config, "GNN_HIDDEN_DIM", 32),
+                     state_path=getattr(config, "GNN_STATE_PATH", None),
+                     seed=getattr(config, "GNN_SEED", 0))
+
+
+def warmup(config, in_dim=None):
+    """Import torch and build the configured model ahead of the first request."""
+    if in_dim is None:
+        names = getattr(config, "GNN_FEATURES", None)
+        in_dim = len(names) if names else 4
+    return model_for_config(config, in_dim)
+
+
+def clear():
+    with _lock:
+        _models.clear()
@@ -0,0 +1,209 @@
+"""Multi-start local search over a process pool.
+
+``multi_start_tour`` runs ``starts`` independent searches on the same
+distance matrix and keeps the shortest open path. Each start builds its
+own initial tour and improves it towards a local optimum, then runs
+iterated local search until its deadline: perturb the best tour found so
+far with a local double-bridge move, repair it with ``improve_tour``
+around the touched stops, keep it if it is shorter. All deadlines fall
+within one overall ``time_budget`` counted from the call.
+
+Constructions rotate between
+
+- plain nearest neighbour from the first stop (the single-start solver's
+  construction);
+- randomised nearest neighbour (each step picks among the few closest
+  unvisited stops);
+- a nearest-neighbour cycle from a random stop, cut open at the first stop.
+
+Every path starts at stop ``start`` (0 by default), which ``improve_tour``
+keeps fixed; callers holding a store-backed matrix pass the start instead
+of permuting the matrix, so it still reaches the workers as a file. Worker
+processes map the matrix read-only — the MatrixStore file when ``dist``
+comes from one, otherwise a copy made once in shared memory — and build
+the neighbour lists once each.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from .distance import tour_distance
+from .local_search import DEFAULT_NEIGHBORS, _working_matrix, improve_tour, neighbor_lists
+from .shared_matrix import MatrixHandle, handle
+
+# assumed pool start-up cost (seconds) until one has been measured for the start method
+STARTUP_ESTIMATE = {"fork": 0.05, "forkserver": 0.3, "spawn": 0.5}
+RANDOM_CHOICES = 3  # randomised nearest neighbour picks among this many closest stops
+PERTURB_WINDOW = 30  # double-bridge segments stay within this many tour positions
+
+_worker = {}
+_startup = {}  # start method -> last measured pool start-up seconds
+
+
+def nearest_neighbor_path(d, start=0, rng=None, choices=1):
+    """Greedy open path from ``start`` over working matrix ``d`` (``choices`` > 1 randomises)."""
+    n = len(d)
+    visited = np.zeros(n, dtype=bool)
+    order = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, d[order[-1]])
+        if choices > 1 and rng is not None:
+            m = min(choices, n - len(order))
+            near = np.argpartition(row, m - 1)[:m]
+            nxt = int(near[rng.integers(m)])
+        else:
+            nxt = int(np.argmin(row))
+        order.append(nxt)
+        visited[nxt] = True
+    return order
+
+
+def _cut_cycle(order, d, at=0):
+    """Open the cycle ``order`` at stop ``at``, dropping the longer of its two edges."""
+    i = order.index(at)
+    forward = order[i:] + order[:i]
+    backward = [forward[0]] + forward[:0:-1]
+    # forward drops edge (forward[-1], at), backward drops (forward[1], at)
+    return forward if d[forward[-1], at] >= d[forward[1], at] else backward
+
+
+def double_bridge(tour, rng, window=PERTURB_WINDOW):
+    """``A B C D -> A C B D`` with B and C short segments near a random position (the first stop stays)."""
+    n = len(tour)
+    if n < 8:
+        return list(tour), []
+    a = int(rng.integers(1, n - 3))
+    cuts = sorted(rng.choice(np.arange(a + 1, min(n, a + window) + 1), size=2, replace=False).tolist())
+    b, c = cuts
+    new = tour[:a] + tour[b:c] + tour[a:b] + tour[c:]
+    touched = [new[q] for q in {a - 1, a, a + c - b - 1, a + c - b, c - 1, min(c, n - 1)}]
+    return new, touched
+
+
+def _construct(kind, d, rng, start=0):
+    if kind == 0:
+        return nearest_neighbor_path(d, start=start)
+    if kind == 1:
+        return nearest_neighbor_path(d, start=start, rng=rng, choices=RANDOM_CHOICES)
+    origin = int(rng.integers(len(d)))
+    return _cut_cycle(nearest_neighbor_path(d, start=origin), d, at=start)
+
+
+def search(d, neighbors, index, seed, deadline, k=DEFAULT_NEIGHBORS, start=0):
+    """One start: construct, descend, then iterated local search until ``deadline``.
+
+    ``deadline`` is a ``time.time()`` value and bounds the first descent
+    too, so on a large input a start may return a tour short of a local
+    optimum rather than overrun the budget.
+    """
+    rng = np.random.default_rng([seed, index])
+    stats = {}
+    best = improve_tour(_construct(index % 3, d, rng, start), d, neighbors=neighbors, k=k,
+                        time_budget=max(deadline - time.time(), 0.0), stats=stats, prepared=True)
+    best_len = tour_distance(best, d)
+    rounds = 0
+    while time.time() < deadline and len(best) >= 8:
+        cand, touched = double_bridge(best, rng)
+        cand = improve_tour(cand, d, neighbors=neighbors, k=k, time_budget=max(deadline - time.time(), 0.0),
+                            stats=stats, active=touched, prepared=True)
+        rounds += 1
+        cand_len = tour_distance(cand, d)
+        if cand_len < best_len - 1e-9:
+            best, best_len = cand, cand_len
+    stats["ils_rounds"] = rounds
+    return best_len, best, stats
+
+
+def _attach(source, shape, dtype):
+    kind, name = source
+    if kind == "file":
+        return None, np.load(name, mmap_mode="r")
+    # the parent owns (and unlinks) the segment; before 3.13 attaching re-registers it with the
+    # resource tracker the children share with the parent, which is harmless
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _init_worker(source, shape, dtype, k):
+    shm, d = _attach(source, shape, dtype)
+    d.flags.writeable = False
+    _worker.update(shm=shm, d=d, k=k, neighbors=neighbor_lists(d, k))
+
+
+def _ready():
+    return True
+
+
+def _run_start(index, seed, deadline, start):
+    return search(_worker["d"], _worker["neighbors"], index, seed, deadline, k=_worker["k"], start=start)
+
+
+def multi_start_tour(dist, starts=8, workers=None, time_budget=2.0, seed=0, k=DEFAULT_NEIGHBORS,
+                     start_method="spawn", stats=None, start=0):
+    """Shortest open path (starting at stop ``start``) over ``starts`` parallel searches.
+
+    ``time_budget`` (seconds) bounds the whole call, counted from entry:
+    pool start-up, every start's first descent and its iterated local
+    search. What is left once the workers are ready is split evenly between
+    the waves of starts when there are more starts than workers;
+    ``workers=1`` runs them one after another in this process, as does a
+    budget shorter than the (measured) pool start-up. ``stats`` receives
+    summed move counters plus ``starts``, ``ils_rounds`` and
+    ``best_start``.
+    """
+    budget = time_budget if time_budget is not None else 2.0
+    deadline = time.time() + budget
+    d = np.ascontiguousarray(_working_matrix(dist))
+    n = len(d)
+    if n < 4:
+        return [start] + [i for i in range(n) if i != start]
+    workers = min(workers or os.cpu_count() or 1, starts)
+    if workers > 1 and budget < _startup.get(start_method, STARTUP_ESTIMATE.get(start_method, 0.5)):
+        workers = 1
+    if workers <= 1:
+        neighbors = neighbor_lists(d, k)
+        results = []
+        for i in range(starts):
+            share = (deadline - time.time()) / (starts - i)
+            results.append(search(d, neighbors, i, seed, time.time() + max(share, 0.0), k=k, start=start))
+    else:
+        stored = handle(dist)
+        shm = None
+        if isinstance(stored, MatrixHandle) and np.may_share_memory(d, dist):
+            source = ("file", stored.path)  # already symmetric and finite: map the store file
+        else:
+            shm = shared_memory.SharedMemory(create=True, size=d.nbytes)
+            np.ndarray(d.shape, dtype=d.dtype, buffer=shm.buf)[:] = d
+            source = ("shm", shm.name)
+        try:
+            ctx = multiprocessing.get_context(start_method)
+            t0 = time.time()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                     initargs=(source, d.shape, d.dtype.str, k)) as pool:
+                pool.submit(_ready).result()
+                ready = time.time()
+                _startup[start_method] = ready - t0
+                # wave w of the starts ends at its share of what is left of the budget
+                waves = -(-starts // workers)
+                ends = [ready + max(deadline - ready, 0.0) * (i // workers + 1) / waves for i in range(starts)]
+                futures = [pool.submit(_run_start, i, seed, ends[i], start) for i in range(starts)]
+                results = [f.result() for f in futures]
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+    best = min(range(len(results)), key=lambda i: (results[i][0], i))
+    if stats is not None:
+        for _, _, s in results:
+            for key, v in s.items():
+                stats[key] = (stats.get(key, False) or v) if isinstance(v, bool) else stats.get(key, 0) + v
+        stats["starts"] = starts
+        stats["best_start"] = best
+    return results[best][1]
@@ -3,13 +3,36 @@
 Provides:
 - try_yandex_route(points, apikey) -> dict or None
 - nearest_neighbor_route(points) -> (ordered_points, metrics)
+
+With a RoadModel (core.road_model) the API is asked only for candidate
+edges: each stop's nearest neighbours under the model, then the edges of
+the tour the solver settles on. Every other cell is the model's estimate.
 """
 
-import requests, math, time, json
+import math, time, json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from typing import List, Tuple
-from .utils import haversine
+from .distance import haversine_matrix, tour_distance
+from .local_search import improve_tour, neighbor_lists, DEFAULT_NEIGHBORS
+from .matrix_client import MatrixClient, YANDEX_MATRIX_URL
+from .points import PointSet, materialise, vip_mask
+
+TOUR_FETCH_ROUNDS = 3  # sparse matrix: fetch tour edges / re-optimise at most this often
+MIN_BLOCK_FILL = 0.5  # sparse matrix: least share of needed cells in one request block
+
+
+def vip_order(order, vip):
+    """Index form of the VIP rules: the first two VIP stops of ``order`` move to positions 0 and 1.
 
-YANDEX_MATRIX_URL = "https://api.routing.yandex.net/v2/distancematrix"
+    ``vip`` is a boolean mask over the point indices; the other stops keep
+    their relative order.
+    """
+    order = list(order)
+    front = [c for c in order if vip[c]][:2]
+    if not front:
+        return order
+    return front + [c for c in order if c not in front]
 
 def _apply_vip_rules(ordered_points):
     """After Yandex optimization, ensure VIP rules:
@@ -19,112 +42,272 @@ def _apply_vip_rules(ordered_points):
     """
     if not ordered_points:
         return ordered_points
-    vip_positions = [i for i, p in enumerate(ordered_points)
-                     if isinstance(p.get('priority'), str) and p.get('priority').strip().lower().startswith('vip')]
-    if not vip_positions:
-        return ordered_points
-    new_order = list(ordered_points)
-    # Move first VIP to position 0
-    first_idx = vip_positions[0]
-    first_item = new_order.pop(first_idx)
-    new_order.insert(0, first_item)
-    # If there is a second VIP, move it to position 1
-    if len(vip_positions) >= 2:
-        # The second VIP id from original ordering
-        second_vip = ordered_points[vip_positions[1]]
-        second_id = second_vip.get('id')
-        # find its index in new_order
-        sec_idx = next((i for i, p in enumerate(new_order) if p.get('id') == second_id), None)
-        if sec_idx is not None:
-            sec_item = new_order.pop(sec_idx)
-            new_order.insert(1, sec_item)
-    return new_order
-
-def try_yandex_route(points: List[dict], apikey: str):
+    vip = vip_mask([p.get('priority') for p in ordered_points])
+    return [ordered_points[i] for i in vip_order(range(len(ordered_points)), vip)]
+
+def fetch_distance_matrix(coords, apikey, cache=None, url=YANDEX_MATRIX_URL, profile="auto", client=None):
+    """Road distance matrix for ``(lat, lon)`` coords via the API and the local cache.
+
+    Only the origin rows / destination columns that contain cells missing
+    from ``cache`` are requested, in tiles through ``client`` (a
+    MatrixClient, built from ``apikey``/``url``/``profile`` if omitted);
+    fresh cells are written back. Returns ``(dist_km, stats)`` where
+    unreachable cells are ``inf``.
+    """
+    if client is None:
+        client = MatrixClient(apikey, url=url, profile=profile)
+    profile = client.profile
+    n = len(coords)
+    if cache is not None:
+        dist_m, dur_s = cache.lookup(profile, coords, coords)
+    else:
+        dist_m = np.full((n, n), np.nan); dur_s = np.full((n, n), np.nan)
+    np.fill_diagonal(dist_m, 0.0)
+    need = np.isnan(dist_m)
+    misses = int(need.sum())
+    hits = n * (n - 1) - misses
+    if cache is not None:
+        cache.record(hits, misses)
+    stats = {"matrix_cache_hits": hits, "matrix_cache_misses": misses, "matrix_cells_fetched": 0,
+             "matrix_requests": 0}
+    rows = np.flatnonzero(need.any(axis=1))
+    cols = np.flatnonzero(need.any(axis=0))
+    if rows.size:
+        origins = [coords[i] for i in rows]
+        destinations = [coords[j] for j in cols]
+        block = np.ix_(rows, cols)
+        before = client.requests_made
+        sub_d, sub_t = client.fetch(origins, destinations, need=need[block])
+        dist_m[block] = np.where(need[block], sub_d, dist_m[block])
+        stats["matrix_cells_fetched"] = int(np.isfinite(sub_d).sum())
+        stats["matrix_requests"] = client.requests_made - before
+        if cache is not None:
+            cache.store(profile, origins, destinations, sub_d, sub_t)
+    dist = dist_m / 1000.0  # meters -> km
+    dist[np.isnan(dist)] = np.inf
+    return dist, stats
+
+def spatial_order(lat, lon, bits=16):
+    """Point indices along a Z-order curve, so that consecutive indices are close on the map."""
+    def quantise(a):
+        a = np.asarray(a, dtype=float)
+        if not len(a):
+            return np.zeros(0, dtype=np.uint64)
+        span = a.max() - a.min()
+        return ((a - a.min()) / (span or 1.0) * (2 ** bits - 1)).astype(np.uint64)
+
+    x, y = quantise(lon), quantise(lat)
+    code = np.zeros(len(x), dtype=np.uint64)
+    one = np.uint64(1)
+    for b in range(bits):
+        b64 = np.uint64(b)
+        code |= ((x >> b64) & one) << np.uint64(2 * b) | ((y >> b64) & one) << np.uint64(2 * b + 1)
+    return np.argsort(code, kind="stable")
+
+def _column_runs(sub, max_cols, min_fill=MIN_BLOCK_FILL):
+    """Split the columns of boolean ``sub`` (rows x needed columns, in map order) into request blocks.
+
+    A run of columns grows while its needed cells fill at least
+    ``min_fill`` of the block spanned by the rows needing any of them, and
+    while it has at most ``max_cols`` columns. Yields ``(row_mask, columns)``.
+    """
+    start, rows, needed = 0, None, 0
+    for c in range(sub.shape[1]):
+        col = sub[:, c]
+        k = int(col.sum())
+        if rows is not None:
+            grown = rows | col
+            width = c - start + 1
+            if needed + k >= min_fill * int(grown.sum()) * width and width <= max_cols:
+                rows, needed = grown, needed + k
+                continue
+            yield rows, slice(start, c)
+        start, rows, needed = c, col, k
+    if rows is not None:
+        yield rows, slice(start, sub.shape[1])
+
+def fetch_cells(coords, need, client, cache=None):
+    """Request only the ``need`` cells of the ``coords`` x ``coords`` matrix.
+
+    Origins are grouped ``client.tile_size`` at a time along a Z-order
+    curve. Each group's needed destinations, also in Z-order, are cut into
+    runs whose block (the rows needing them x the run) is at least
+    ``MIN_BLOCK_FILL`` needed cells, so at most twice the needed cells
+    are billed. Blocks run concurrently on the client and are
+    written to ``cache``. Returns ``(distance_m, stats)`` with NaN outside
+    the fetched blocks; ``stats`` separates needed, billed (requested) and
+    fetched (returned) cells.
+    """
+    n = len(coords)
+    dist_m = np.full((n, n), np.nan)
+    lat = np.array([c[0] for c in coords], dtype=float)
+    lon = np.array([c[1] for c in coords], dtype=float)
+    order = spatial_order(lat, lon)
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    blocks = []
+    for s in range(0, n, client.tile_size):
+        rows = order[s:s + client.tile_size]
+        cols = np.flatnonzero(need[rows].any(axis=0))
+        cols = cols[np.argsort(rank[cols], kind="stable")]
+        sub = need[np.ix_(rows, cols)]
+        for mask, run in _column_runs(sub, client.tile_size):
+            r, c = rows[mask], cols[run]
+            for r0, r1, c0, c1 in client.tiles(len(r), len(c)):
+                if need[np.ix_(r[r0:r1], c[c0:c1])].any():
+                    blocks.append((r[r0:r1], c[c0:c1]))
+
+    def run(block):
+        r, c = block
+        origins = [coords[i] for i in r]
+        destinations = [coords[j] for j in c]
+        d, t = client.request(origins, destinations)
+        if cache is not None:
+            cache.store(client.profile, origins, destinations, d, t)
+        return block, d
+
+    before = client.requests_made
+    if len(blocks) <= 1 or client.max_workers == 1:
+        results = map(run, blocks)
+    else:
+        with ThreadPoolExecutor(max_workers=client.max_workers) as pool:
+            results = list(pool.map(run, blocks))
+    cells = 0
+    for (r, c), d in results:
+        dist_m[np.ix_(r, c)] = d
+        cells += int(np.isfinite(d).sum())
+    return dist_m, {"matrix_cells_needed": int(need.sum()),
+                    "matrix_cells_billed": sum(len(r) * len(c) for r, c in blocks),
+                    "matrix_cells_fetched": cells, "matrix_requests": client.requests_made - before}
+
+def _merge_fetched(dist, known, need, fetched_m):
+    # requested cells the API left empty are unreachable, as in fetch_distance_matrix
+    got = need & np.isfinite(fetched_m)
+    dist[got] = fetched_m[got] / 1000.0
+    dist[need & ~got] = np.inf
+    known |= need
+
+def sparse_distance_matrix(coords, client, road_model, cache=None, k=DEFAULT_NEIGHBORS):
+    """Road km matrix that is exact only where it matters for the solver.
+
+    Starts from ``road_model``'s estimate, takes every cached cell, then
+    fetches each stop's ``k`` nearest neighbours (both directions) that are
+    still unknown. Returns ``(dist_km, known, stats)``; ``known`` marks the
+    exact cells.
+    """
+    n = len(coords)
+    lat = np.array([c[0] for c in coords], dtype=float)
+    lon = np.array([c[1] for c in coords], dtype=float)
+    dist = road_model.predict_matrix(lat, lon)[0]
+    if cache is not None:
+        cached_m, _ = cache.lookup(client.profile, coords, coords)
+    else:
+        cached_m = np.full((n, n), np.nan)
+    np.fill_diagonal(cached_m, 0.0)
+    known = np.isfinite(cached_m)
+    dist[known] = cached_m[known] / 1000.0
+    near = np.asarray(neighbor_lists(dist, k), dtype=np.int64).reshape(n, -1)
+    need = np.zeros((n, n), dtype=bool)
+    need[np.repeat(np.arange(n), near.shape[1]), near.ravel()] = True
+    need |= need.T
+    need &= ~known
+    hits = int(known.sum()) - n
+    misses = int(need.sum())
+    if cache is not None:
+        cache.record(hits, misses)
+    fetched_m, stats = fetch_cells(coords, need, client, cache)
+    _merge_fetched(dist, known, need, fetched_m)
+    stats.update(matrix_cache_hits=hits, matrix_cache_misses=misses)
+    return dist, known, stats
+
+def _fetch_tour_edges(order, dist, known, coords, client, cache, stats):
+    """Fetch the unknown edges of ``order``; returns the stops they touch."""
+    a = np.asarray(order[:-1])
+    b = np.asarray(order[1:])
+    unknown = ~known[a, b]
+    if not unknown.any():
+        return []
+    need = np.zeros_like(known)
+    need[a[unknown], b[unknown]] = True
+    need |= need.T
+    need &= ~known
+    fetched_m, more = fetch_cells(coords, need, client, cache)
+    _merge_fetched(dist, known, need, fetched_m)
+    for key, v in more.items():
+        stats[key] = stats.get(key, 0) + v
+    stats["matrix_cache_misses"] = stats.get("matrix_cache_misses", 0) + int(need.sum())
+    if cache is not None:
+        cache.record(0, int(need.sum()))
+    return sorted(set(a[unknown].tolist()) | set(b[unknown].tolist()))
+
+def try_yandex_route(points: List[dict], apikey: str, time_budget=2.0, neighbors=DEFAULT_NEIGHBORS,
+                     cache=None, url=YANDEX_MATRIX_URL, profile="auto", client=None, stats=None,
+                     road_model=None, sparse_k=DEFAULT_NEIGHBORS):
     """
     Attempt to get optimized route via Yandex Distance Matrix API.
-    Returns dict: {'ordered_points': [...], 'metrics': {...}} or None on failure.
+    ``points`` is a PointSet or a list of point dicts.
+    Returns dict: {'order': [...], 'ordered_points': [...], 'metrics': {...}} or None on failure.
+    ``cache`` is an optional MatrixCache; only cells missing from it are requested.
+    ``client`` is an optional MatrixClient controlling tiling and concurrency.
+    ``stats`` is an optional dict receiving the local search move counters.
+    ``road_model`` (a RoadModel) switches to the sparse matrix: only the
+    ``sparse_k`` nearest neighbours of every stop and the edges of the
+    resulting tour are requested, the rest is estimated.
     """
     if not apikey or len(points) < 2:
         return None
-    # Build points list as "lon,lat" strings in required order
-    coords = []
-    for p in points:
-        lat = p.get('lat') or p.get('latitude') or p.get('y')
-        lon = p.get('lon') or p.get('longitude') or p.get('x')
-        if lat is None or lon is None:
-            coords.append(None)
-        else:
-            coords.append("{:.6f},{:.6f}".format(float(lon), float(lat)))
-    # Filter out None coords and keep mapping to original indices
-    idx_map = [i for i,c in enumerate(coords) if c is not None]
+    ps = PointSet.of(points)
+    # Filter out missing coords and keep mapping to original indices
+    idx_map = np.flatnonzero(ps.has_coords())
     if len(idx_map) < 2:
         return None
-    coord_list = [coords[i] for i in idx_map]
-    # Prepare POST body according to Yandex Distance Matrix API
-    body = {
-        "origins": [{"lat": float(points[i].get('lat') or points[i].get('latitude')),
-                     "lon": float(points[i].get('lon') or points[i].get('longitude'))} for i in idx_map],
-        "destinations": [{"lat": float(points[i].get('lat') or points[i].get('latitude')),
-                          "lon": float(points[i].get('lon') or points[i].get('longitude'))} for i in idx_map],
-        "metrics": ["distance"],
-        "limit": len(idx_map)
-    }
-    headers = {"Content-Type": "application/json", "Accept": "application/json", "Authorization": f"Api-Key {apikey}"}
+    coords = list(zip(ps.lat[idx_map].tolist(), ps.lon[idx_map].tolist()))
     try:
-        resp = requests.post(YANDEX_MATRIX_URL, headers=headers, json=body, timeout=15)
-        if resp.status_code != 200:
-            return None
-        data = resp.json()
-        # data expected to contain 'matrix' with distances (meters) between origins->destinations
-        matrix = data.get('matrix')
-        if matrix is None:
-            return None
-        n = len(matrix)
-        # Use a simple symmetric distance matrix (take min of [i][j] and [j][i] if asym)
-        dist = [[0.0]*n for _ in range(n)]
-        for i in range(n):
-            for j in range(n):
-                try:
-                    d = matrix[i][j].get('distance', {}).get('value', None)
-                    if d is None:
-                        dist[i][j] = float('inf')
-                    else:
-                        dist[i][j] = float(d) / 1000.0  # meters -> km
-                except Exception:
-                    dist[i][j] = float('inf')
-        # Solve simple TSP on this distance matrix using nearest neighbor + 2-opt
+        if road_model is None:
+            dist, matrix_stats = fetch_distance_matrix(coords, apikey, cache=cache, url=url, profile=profile,
+                                                       client=client)
+        else:
+            client = client or MatrixClient(apikey, url=url, profile=profile)
+            dist, known, matrix_stats = sparse_distance_matrix(coords, client, road_model, cache=cache, k=sparse_k)
+        # Solve simple TSP on this distance matrix using nearest neighbor + local search
+        moves = {}
         order_local = _nearest_neighbor_order_from_matrix(dist)
-        order_local = _two_opt(order_local, dist, max_iters=300)
-        # Map local order indices back to original points order
-        ordered_points = [points[idx_map[i]] for i in order_local]
-        total_km = sum(dist[order_local[i]][order_local[i+1]] for i in range(len(order_local)-1))
-        metrics = {"distance_km": total_km}
-        # Apply VIP rules after Yandex optimization
-        ordered_points = _apply_vip_rules(ordered_points)
-        return {"ordered_points": ordered_points, "metrics": metrics}
+        order_local = improve_tour(order_local, dist, k=neighbors, time_budget=time_budget, stats=moves)
+        if road_model is not None:
+            # exact lengths for the tour's estimated edges, then repair around them
+            for rnd in range(TOUR_FETCH_ROUNDS + 1):
+                touched = _fetch_tour_edges(order_local, dist, known, coords, client, cache, matrix_stats)
+                if not touched or rnd == TOUR_FETCH_ROUNDS:
+                    break
+                order_local = improve_tour(order_local, dist, k=neighbors, time_budget=time_budget, stats=moves,
+                                           active=touched)
+            n = len(coords)
+            matrix_stats["matrix_cells_estimated"] = n * (n - 1) - (int(known.sum()) - n)
+        if stats is not None:
+            stats.update(moves)
+        total_km = tour_distance(order_local, dist)
+        metrics = {"distance_km": total_km, **matrix_stats, **moves}
+        # Map local order indices back to original points and apply VIP rules
+        order = vip_order(idx_map[order_local].tolist(), ps.vip)
+        return {"order": order, "ordered_points": materialise(points, order), "metrics": metrics}
     except Exception:
         return None
 
 # Fallback simple solvers (nearest neighbor + 2-opt)
-def _nearest_neighbor_order_from_matrix(dist):
+def _nearest_neighbor_order_from_matrix(dist, start=0):
+    dist = np.asarray(dist, dtype=float)
     n = len(dist)
     if n == 0:
         return []
-    visited = [False]*n
-    order = [0]
-    visited[0] = True
+    visited = np.zeros(n, dtype=bool)
+    order = [start]
+    visited[start] = True
     for _ in range(n-1):
-        last = order[-1]
-        next_idx = None
-        best = float('inf')
-        for j in range(n):
-            if not visited[j] and dist[last][j] < best:
-                best = dist[last][j]; next_idx = j
-        if next_idx is None:
-            for j in range(n):
-                if not visited[j]:
-                    next_idx = j; break
+        row = np.where(visited, np.inf, dist[order[-1]])
+        next_idx = int(np.argmin(row))
+        if not np.isfinite(row[next_idx]):
+            # nothing reachable: take the first unvisited point
+            next_idx = int(np.flatnonzero(~visited)[0])
         order.append(next_idx); visited[next_idx] = True
     return order
 
@@ -135,6 +318,7 @@ def _tour_length(order, dist):
     return L
 
 def _two_opt(order, dist, max_iters=200):
+    """Reference full-recompute 2-opt, kept for benchmarks (see local_search.improve_tour)."""
     n = len(order)
     if n < 4:
         return order
@@ -156,31 +340,29 @@ def _two_opt(order, dist, max_iters=200):
         it += 1
     return best
 
-def nearest_neighbor_route(points):
-    # Build simple distance matrix using haversine
-    n = len(points)
-    dist = [[0.0]*n for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            if i==j: dist[i][j]=0.0; continue
-            try:
-                dist[i][j] = haversine(float(points[i].get('latitude') or points[i].get('lat')),
-                                       float(points[i].get('longitude') or points[i].get('lon')),
-                                       float(points[j].get('latitude') or points[j].get('lat')),
-                                       float(points[j].get('longitude') or points[j].get('lon')))
-            except Exception:
-                dist[i][j] = float('inf')
-    order = _nearest_neighbor_order_from_matrix(dist)
-    order = _two_opt(order, dist, max_iters=200)
-    ordered_points = [points[i] for i in order]
-    total_km = 0.0
-    for i in range(len(ordered_points)-1):
-        a = ordered_points[i]; b = ordered_points[i+1]
-        try:
-            total_km += haversine(float(a.get('latitude') or a.get('lat')), float(a.get('longitude') or a.get('lon')),
-                                  float(b.get('latitude') or b.get('lat')), float(b.get('longitude') or b.get('lon')))
-        except Exception:
-            pass
+def nearest_neighbor_route(points, dist=None, time_budget=2.0, neighbors=DEFAULT_NEIGHBORS, stats=None,
+                           starts=1, workers=None, seed=0, start=0):
+    """Nearest neighbour + local search (2-opt / Or-opt) tour over ``points``.
+
+    ``points`` is a PointSet or a list of point dicts. ``dist`` is an
+    optional precomputed km matrix aligned with ``points``; when omitted it
+    is built with the vectorised haversine engine. ``time_budget`` caps the
+    local search in seconds; ``stats`` (a dict) receives its move counters.
+    ``starts`` > 1 runs that many seeded searches over ``workers``
+    processes and keeps the shortest tour (see core.multistart). The tour
+    begins at point ``start``.
+    """
+    ps = PointSet.of(points)
+    if dist is None:
+        dist = haversine_matrix(ps.lat, ps.lon)
+    if starts > 1:
+        from .multistart import multi_start_tour
+        order = multi_start_tour(dist, starts=starts, workers=workers, time_budget=time_budget, seed=seed,
+                                 k=neighbors, stats=stats, start=start)
+    else:
+        order = _nearest_neighbor_order_from_matrix(dist, start=start)
+        order = improve_tour(order, dist, k=neighbors, time_budget=time_budget, stats=stats)
+    total_km = tour_distance(order, dist)
     # Apply VIP rules for fallback too
-    ordered_points = _apply_vip_rules(ordered_points)
-    return ordered_points, {"distance_km": total_km}
+    order = vip_order(order, ps.vip)
+    return materialise(points, order), {"distance_km": total_km}
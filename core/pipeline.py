@@ -1,210 +1,380 @@
 """Main pipeline: load data -> build graph -> GNN inference -> optimizer -> write outputs."""
 
-import os, json
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import torch
 from pathlib import Path
 from .io import load_input
-from .utils import haversine
-from .gnn_model import SimpleGNN
-from .optimizer import try_yandex_route, nearest_neighbor_route
+from .geocode import GeocodeCache, depot_grid, fill_coordinates, geocoder_from_config
+from .points import PointSet
+from .features import node_features, features_for_config
+from .utils import atomic_open
+from .distance import haversine_matrix, inverse_distance_adjacency, tour_distance
+from .neighbors import knn_adjacency
+from .inference import predict
+from .optimizer import vip_order, try_yandex_route, nearest_neighbor_route, fetch_distance_matrix
+from .vrptw import solve_vrptw
+from .fleet import solve_fleet
+from .matrix_cache import MatrixCache
+from .matrix_client import MatrixClient
+from .road_model import RoadModel
+from .shared_matrix import MatrixStore, attach, handle
+from .profiling import StageTimer, profiled, span, count
+from .render import write_route_json, write_route_binary, build_leaflet_html
 from .config import Config
 from urllib.parse import quote_plus
-def build_graph(df):
-    # Build nodes list and adjacency based on inverse distance (closer means stronger edge)
-    points = []
-    coords = []
-    for _, row in df.iterrows():
-        points.append({
-            "id": row.get("id"),
-            "client_name": row.get("client_name"),
-            "address": row.get("address"),
-            "lat": float(row.get("latitude")) if not np.isnan(row.get("latitude", float('nan'))) else None,
-            "lon": float(row.get("longitude")) if not np.isnan(row.get("longitude", float('nan'))) else None,
-            "priority": row.get("priority"),
-            "time_window_start": row.get("_tw_start_time"),
-            "time_window_end": row.get("_tw_end_time"),
-            "service_time": row.get("service_time")
-        })
-        coords.append((points[-1]['lat'], points[-1]['lon']))
-    n = len(points)
-    # adjacency: inverse haversine distance (with cap)
-    adj = np.zeros((n,n), dtype=float)
-    for i in range(n):
-        for j in range(n):
-            if i==j: continue
-            if points[i]['lat'] is None or points[j]['lat'] is None:
-                adj[i,j] = 0.0
-            else:
-                d = haversine(points[i]['lon'], points[i]['lat'], points[j]['lon'], points[j]['lat'])
-                adj[i,j] = 1.0/(d+1e-3)
-    return points, adj
+
+def extract_points(cols):
+    """Point dicts from the columnar arrays of ``load_input``."""
+    return PointSet.from_columns(cols).to_dicts()
+
+def build_adjacency(points, dist=None, mode="dense", k=8, radius_km=None):
+    """Inverse-distance adjacency: dense ndarray, or sparse CSR for ``mode='knn'``."""
+    ps = PointSet.of(points)
+    if mode == "knn":
+        return knn_adjacency(ps.lat, ps.lon, k=k, radius_km=radius_km)
+    if mode != "dense":
+        raise ValueError(f"Unknown graph mode: {mode}")
+    if dist is None:
+        dist = haversine_matrix(ps.lat, ps.lon)
+    return inverse_distance_adjacency(dist)
+
+def build_graph(cols, dist=None, mode="dense", k=8, radius_km=None):
+    # Build the PointSet and adjacency based on inverse distance (closer means stronger edge)
+    points = PointSet.from_columns(cols)
+    return points, build_adjacency(points, dist=dist, mode=mode, k=k, radius_km=radius_km)
 
 def compute_node_features(points):
-    # features: [latitude, longitude, is_vip(1/0), service_time(minutes or 0)]
-    import numpy as np
-    feats = []
-    for p in points:
-        lat = p['lat'] if p['lat'] is not None else 0.0
-        lon = p['lon'] if p['lon'] is not None else 0.0
-        is_vip = 1.0 if str(p.get('priority')).lower().startswith('vip') else 0.0
-        st = float(p.get('service_time') or 0.0)
-        feats.append([lat, lon, is_vip, st])
-    return np.array(feats, dtype=float)
-
-def run_pipeline(input_path, output_dir="results", config: Config = Config()):
-    p = Path(output_dir)
-    p.mkdir(parents=True, exist_ok=True)
-    df = load_input(input_path)
-    points, adj = build_graph(df)
+    # features: [latitude, longitude, is_vip(1/0), service_time(minutes or 0)], not normalised
+    return node_features(points, normalise=False)
+
+STAGES = ("load", "graph", "gnn", "route", "render")
+
+def prepare_graph(input_path, config: Config = Config(), report=None):
+    """Load an input file and build ``(points, dist, adj, feats)`` for the GNN; ``points`` is a PointSet."""
+    report = report or (lambda stage: None)
+    report("load")
+    cols = load_input(input_path, chunksize=getattr(config, "INPUT_CHUNK_ROWS", None))
+    geocoder = geocoder_from_config(config)
+    if geocoder is not None:
+        with span(report, "geocode"):
+            depots = getattr(config, "DEPOTS_PATH", None)
+            count(report, fill_coordinates(cols, geocoder, cache=GeocodeCache.from_config(config),
+                                           depots=depot_grid(depots) if depots else None,
+                                           max_km=getattr(config, "GEOCODE_MAX_KM", None)))
+    report("graph")
+    points = PointSet.from_columns(cols)
     if len(points)==0:
         raise ValueError("No points found in input.")
-    feats = compute_node_features(points)
-    # normalize coords
-    feats[:,0] = (feats[:,0] - feats[:,0].mean()) / (feats[:,0].std() + 1e-6)
-    feats[:,1] = (feats[:,1] - feats[:,1].mean()) / (feats[:,1].std() + 1e-6)
+    count(report, {"points": len(points)})
+    # one distance matrix per run, shared by the graph and the fallback solver;
+    # the sparse graph mode skips it and the solver builds its own if needed
+    # (float32 and memory-mapped from MATRIX_STORE_DIR when set, shared by every worker)
+    graph_mode = getattr(config, "GRAPH_MODE", "dense")
+    store = MatrixStore.from_config(config) if graph_mode == "dense" else None
+    with span(report, "distance_matrix"):
+        if store is not None:
+            dist = store.haversine(points.lat, points.lon)
+        else:
+            dist = haversine_matrix(points.lat, points.lon) if graph_mode == "dense" else None
+    with span(report, "adjacency"):
+        if store is not None:
+            adj = store.adjacency(points.lat, points.lon, dist)
+        else:
+            adj = build_adjacency(points, dist=dist, mode=graph_mode,
+                                  k=getattr(config, "GRAPH_K", 8),
+                                  radius_km=getattr(config, "GRAPH_RADIUS_KM", None))
+    if store is not None:
+        count(report, {"matrix_store_hits": store.hits, "matrix_store_misses": store.misses})
+    with span(report, "features"):
+        feats, hit = features_for_config(points, adj, config)
+    count(report, {"feature_cache_hits": int(hit)})
+    return points, dist, adj, feats
+
+def gnn_scores(feats, adj, config: Config = Config()):
+    """Node scores from the configured inference backend (see core.inference)."""
+    return predict(feats, adj, config)
+
+def run_pipeline(input_path, output_dir="results", config: Config = Config(), progress=None):
+    """Run the whole pipeline; ``progress`` is an optional callable receiving each stage name.
+
+    Stage timings, peak memory and solver counters go to ``metrics.profile``;
+    ``Config.PROFILER`` additionally dumps a cProfile / pyinstrument profile
+    into ``output_dir``.
+    """
+    report = StageTimer(progress, trace_memory=getattr(config, "PROFILE_MEMORY", False))
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    with profiled(getattr(config, "PROFILER", None), Path(output_dir) / "profile"):
+        points, dist, adj, feats = prepare_graph(input_path, config, report)
+        report("gnn")
+        scores = gnn_scores(feats, adj, config)
+        return route_and_write(points, scores, dist, output_dir, config, report)
 
-    # to torch
-    x = torch.tensor(feats, dtype=torch.float32)
-    adj_t = torch.tensor(adj, dtype=torch.float32)
+def batch_gnn_scores(feats_list, adj_list, config: Config = Config()):
+    """Score several graphs in one forward pass.
 
-    # model
-    model = SimpleGNN(in_dim=x.shape[1], hidden_dim=32)
-    model.eval()
-    with torch.no_grad():
-        scores = model(x, adj_t).numpy()
+    The graphs are packed into one block-diagonal sparse adjacency;
+    message passing never crosses blocks, so each graph gets the same
+    scores as on its own.
+    """
+    from scipy.sparse import block_diag
+    sizes = np.array([len(f) for f in feats_list])
+    scores = predict(np.concatenate(feats_list), block_diag(adj_list, format="csr"), config)
+    return np.split(scores, np.cumsum(sizes)[:-1])
 
+def run_pipeline_batch(input_paths, output_dir="results", config: Config = Config(), max_workers=None):
+    """Run several input files with one batched GNN pass.
+
+    Route optimisation then fans out per file over a process pool. Outputs of
+    each file go to ``output_dir/<file stem>``; the route dicts are returned
+    in input order.
+    """
+    input_paths = [Path(x) for x in input_paths]
+    if not input_paths:
+        return []
+    prepared = [prepare_graph(path, config) for path in input_paths]
+    scores = batch_gnn_scores([f for _, _, _, f in prepared], [a for _, _, a, _ in prepared], config)
+    out_dirs, seen = [], set()
+    for i, path in enumerate(input_paths):
+        name = path.stem if path.stem not in seen else f"{path.stem}_{i}"
+        seen.add(name)
+        out_dirs.append(Path(output_dir) / name)
+    # store-backed matrices travel to the pool as file handles and are mapped again there
+    jobs = [(points, sc, handle(dist), out_dir) for (points, dist, _, _), sc, out_dir in zip(prepared, scores, out_dirs)]
+    workers = min(max_workers or getattr(config, "BATCH_WORKERS", None) or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [route_and_write(*job, config) for job in jobs]
+    ctx = multiprocessing.get_context(getattr(config, "JOB_START_METHOD", "spawn"))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = [pool.submit(route_and_write, *job, config) for job in jobs]
+        return [f.result() for f in futures]
+
+def route_and_write(points, scores, dist, output_dir, config: Config = Config(), report=None):
+    """Order scored points into a route and write route.json, map.html and URL.txt."""
+    report = report or (lambda stage: None)
+    dist = attach(dist)
+    p = Path(output_dir)
+    p.mkdir(parents=True, exist_ok=True)
     # attach scores to points
-    for i,pnt in enumerate(points):
-        pnt['gnn_score'] = float(scores[i])
+    points = PointSet.of(points)
+    points.score = np.asarray(scores, dtype=float)
 
     # Order by score descending as initial ranking
-    ordered_by_score = sorted(points, key=lambda p: p['gnn_score'], reverse=True)
+    rank = np.argsort(-scores, kind='stable')
+    ordered_by_score = points.take(rank)
 
-    # Attempt Yandex Routing (requires API key)
+    report("route")
     api_key = getattr(config, "YANDEX_API_KEY", None)
-    yandex_result = try_yandex_route(ordered_by_score, api_key)
+    speed = getattr(config, "AVERAGE_SPEED_KMH", 40)
+    cache = MatrixCache.from_config(config)
+    client = MatrixClient.from_config(config, api_key)
+    road = RoadModel.from_config(config)
+    # the solvers below take points in input order, so a store-backed dist is used as mapped
+    if getattr(config, "SOLVER_MODE", "tsp") == "vrptw":
+        return _route_vrptw(points, dist, p, config, report, cache, client, road)
+    if getattr(config, "SOLVER_MODE", "tsp") == "fleet":
+        return _route_fleet(points, dist, p, config, report, cache, client, road)
+
+    # Attempt Yandex Routing (requires API key)
+    ls_budget = getattr(config, "LOCAL_SEARCH_TIME_BUDGET", 2.0)
+    ls_neighbors = getattr(config, "LOCAL_SEARCH_NEIGHBORS", 10)
+    ls_stats = {}
+    sparse = road is not None and getattr(config, "MATRIX_STRATEGY", "full") == "sparse"
+    with span(report, "yandex"):
+        yandex_result = try_yandex_route(ordered_by_score, api_key, time_budget=ls_budget, neighbors=ls_neighbors,
+                                         cache=cache, client=client, stats=ls_stats,
+                                         road_model=road if sparse else None,
+                                         sparse_k=getattr(config, "ROAD_KNN", 10))
+    cache_metrics = {"matrix_cache_hits": cache.hits, "matrix_cache_misses": cache.misses} if cache is not None else {}
     if yandex_result and isinstance(yandex_result, dict) and 'ordered_points' in yandex_result:
         ordered = yandex_result['ordered_points']
         metrics = yandex_result.get('metrics', {})
-        total_time_min = metrics.get("distance_km", 0) / 40 * 60  # rough assume avg speed 40 km/h -> minutes
+        # integer move / cell counters only; distance_km and friends are metrics, not counters
+        count(report, {k: v for k, v in {**ls_stats, **metrics}.items()
+                       if isinstance(v, int) and not isinstance(v, bool)})
+        total_time_min = _travel_minutes(ordered, metrics.get("distance_km", 0), road, speed)
         out = {
             "mode":"yandex",
             "ordered_ids":[p['id'] for p in ordered],
             "ordered_points": ordered,
             "metrics": {
                 "distance_km": metrics.get("distance_km"),
-                "estimated_travel_time_min": total_time_min
+                "estimated_travel_time_min": total_time_min,
+                "matrix_cells_fetched": metrics.get("matrix_cells_fetched", 0),
+                "matrix_requests": metrics.get("matrix_requests", 0),
+                **{key: metrics[key] for key in ("matrix_cells_needed", "matrix_cells_billed",
+                                                 "matrix_cells_estimated") if key in metrics},
+                **cache_metrics
             }
         }
-        with open(p/"route.json","w",encoding="utf-8") as f:
-            json.dump(out, f, ensure_ascii=False, indent=2)
-        # build simple Leaflet HTML
-        html = build_leaflet_html(ordered, out['metrics'])
-        with open(p/"map.html","w",encoding="utf-8") as f:
-            f.write(html)
-        # Create a Yandex Maps URL based on coordinates (lon,lat pairs)
-        coord_pairs = []
-        for pt in ordered:
-            lat = pt.get('latitude') or pt.get('lat')
-            lon = pt.get('longitude') or pt.get('lon')
-            if lat is not None and lon is not None:
-                coord_pairs.append(f"{lon},{lat}")
-        if coord_pairs:
-            yandex_url = f"https://yandex.ru/maps/?rtext={'~'.join(coord_pairs)}&rtt=auto"
-            out['map_url'] = yandex_url
-            url_path = p / "URL.txt"
-            with open(url_path, "w", encoding="utf-8") as f:
-                f.write(yandex_url + "\n")
-        return out
-
-    # Fallback optimizer
-    ordered, metrics = nearest_neighbor_route(ordered_by_score)
-    total_time_min = metrics.get("distance_km", 0) / 40 * 60  # rough assume avg speed 40 km/h -> minutes
+        return _write_outputs(p, out, report, url_by="coords", binary=getattr(config, "ROUTE_BINARY_FORMAT", None))
+
+    # Fallback optimizer: road model estimates when fitted, else haversine
+    ls_stats = {}
+    # input order from the top-scored stop: no permuted copy of dist, which multi-start then maps as is
+    fb_dist = dist
+    source = "haversine"
+    if road is not None and points.has_coords().all():
+        with span(report, "road_model"):
+            fb_dist = road.predict_matrix(points.lat, points.lon)[0]
+        source = "road_model"
+    with span(report, "local_search"):
+        ordered, metrics = nearest_neighbor_route(points, dist=fb_dist, start=int(rank[0]) if len(rank) else 0,
+                                                  time_budget=ls_budget, neighbors=ls_neighbors, stats=ls_stats,
+                                                  starts=getattr(config, "LOCAL_SEARCH_STARTS", 1),
+                                                  workers=getattr(config, "LOCAL_SEARCH_WORKERS", None),
+                                                  seed=getattr(config, "LOCAL_SEARCH_SEED", 0))
+    count(report, ls_stats)
+    total_time_min = _travel_minutes(ordered, None if source == "road_model" else metrics.get("distance_km", 0),
+                                     road if source == "road_model" else None, speed)
     out = {
         "mode":"fallback",
+        "distance_source": source,
         "ordered_ids":[p['id'] for p in ordered],
         "ordered_points": ordered,
         "metrics": {
             "distance_km": metrics.get("distance_km"),
-            "estimated_travel_time_min": total_time_min
+            "estimated_travel_time_min": total_time_min,
+            **cache_metrics
         }
     }
-    # write outputs
-    with open(p/"route.json","w",encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
-    # build simple Leaflet HTML
-    html = build_leaflet_html(ordered, out['metrics'])
-    with open(p/"map.html","w",encoding="utf-8") as f:
-        f.write(html)
-
-    # 🧭 создаём ссылку на интерактивную карту Яндекс с маршрутами
-    coord_pairs = [p['address'] for p in ordered if isinstance(p.get('address'), str) and p['address'].strip()]
+    return _write_outputs(p, out, report, url_by="address", binary=getattr(config, "ROUTE_BINARY_FORMAT", None))
+
+def _travel_minutes(ordered, km, road, speed):
+    # road model pace along the route when fitted, else the flat average speed
+    ps = PointSet.of(ordered)
+    if road is None or not len(ps) or not ps.has_coords().all():
+        return (km or 0) / speed * 60
+    return road.travel_minutes(ps.lat, ps.lon, total_km=km)
+
+def _solver_matrix(points, dist, cache, client, road=None):
+    # road distances when the API is available, the road model or haversine otherwise
+    if client.apikey and points.has_coords().all():
+        try:
+            coords = list(zip(points.lat.tolist(), points.lon.tolist()))
+            matrix, stats = fetch_distance_matrix(coords, client.apikey, cache=cache, client=client)
+            return matrix, "yandex", stats
+        except Exception:
+            pass
+    if road is not None and points.has_coords().all():
+        return road.predict_matrix(points.lat, points.lon)[0], "road_model", {}
+    if dist is None:
+        dist = haversine_matrix(points.lat, points.lon)
+    return dist, "haversine", {}
+
+def _route_vrptw(points, dist, p, config, report, cache, client, road=None):
+    with span(report, "matrix"):
+        dist, source, stats = _solver_matrix(points, dist, cache, client, road)
+    count(report, stats)
+    with span(report, "vrptw"):
+        ordered, metrics = solve_vrptw(points, dist,
+                                       speed_kmh=getattr(config, "AVERAGE_SPEED_KMH", 40),
+                                       day_start=getattr(config, "WORKDAY_START", "09:00"),
+                                       default_service=getattr(config, "DEFAULT_SERVICE_MIN", 10),
+                                       vip_first=getattr(config, "VIP_FIRST", True),
+                                       time_limit=getattr(config, "VRPTW_TIME_LIMIT", 5.0))
+    out = {
+        "mode": "vrptw",
+        "distance_source": source,
+        "ordered_ids": [pt['id'] for pt in ordered],
+        "ordered_points": ordered,
+        "metrics": {
+            **metrics,
+            "estimated_travel_time_min": metrics.get("travel_time_min"),
+            **stats
+        }
+    }
+    return _write_outputs(p, out, report, url_by="coords", binary=getattr(config, "ROUTE_BINARY_FORMAT", None))
+
+def _route_fleet(points, dist, p, config, report, cache, client, road=None):
+    with span(report, "matrix"):
+        dist, source, stats = _solver_matrix(points, dist, cache, client, road)
+    count(report, stats)
+    speed = getattr(config, "AVERAGE_SPEED_KMH", 40)
+    service = getattr(config, "DEFAULT_SERVICE_MIN", 10)
+    shift = getattr(config, "SHIFT_MINUTES", None)
+    fleet_stats = {}
+    with span(report, "fleet"):
+        routes = solve_fleet(points, dist, getattr(config, "VEHICLE_COUNT", 1),
+                             capacity=getattr(config, "VEHICLE_CAPACITY", None), shift_minutes=shift,
+                             method=getattr(config, "FLEET_PARTITION", "kmeans"), speed_kmh=speed,
+                             service_min=service, time_budget=getattr(config, "LOCAL_SEARCH_TIME_BUDGET", 2.0),
+                             neighbors=getattr(config, "LOCAL_SEARCH_NEIGHBORS", 10),
+                             max_workers=getattr(config, "FLEET_WORKERS", None),
+                             start_method=getattr(config, "JOB_START_METHOD", "spawn"), stats=fleet_stats)
+    out_routes = []
+    for vehicle, route in enumerate(routes, 1):
+        order = vip_order(route, points.vip)
+        ordered = points.to_dicts(order)
+        km = float(tour_distance(order, dist))
+        travel = km / speed * 60
+        out_routes.append({
+            "vehicle": vehicle,
+            "ordered_ids": [pt['id'] for pt in ordered],
+            "ordered_points": ordered,
+            "metrics": {
+                "stops": len(ordered),
+                "distance_km": km,
+                "estimated_travel_time_min": travel,
+                "shift_min": travel + service * len(ordered),
+                "over_shift": shift is not None and travel + service * len(ordered) > shift,
+            }
+        })
+    ordered = [pt for r in out_routes for pt in r["ordered_points"]]
+    out = {
+        "mode": "fleet",
+        "distance_source": source,
+        "routes": out_routes,
+        "ordered_ids": [pt['id'] for pt in ordered],
+        "ordered_points": ordered,
+        "metrics": {
+            "vehicles": len(out_routes),
+            "distance_km": sum(r["metrics"]["distance_km"] for r in out_routes),
+            "estimated_travel_time_min": sum(r["metrics"]["estimated_travel_time_min"] for r in out_routes),
+            "max_shift_min": max((r["metrics"]["shift_min"] for r in out_routes), default=0.0),
+            "over_shift_routes": sum(1 for r in out_routes if r["metrics"]["over_shift"]),
+            **stats
+        }
+    }
+    return _write_outputs(p, out, report, url_by="coords", binary=getattr(config, "ROUTE_BINARY_FORMAT", None))
+
+def _write_outputs(p, out, report, url_by="coords", binary=None):
+    """Write map.html, URL.txt and route.json (Yandex Maps link by coordinates or addresses).
+
+    ``binary`` ('npz' / 'msgpack') additionally writes a compact ``route.<binary>``.
+    route.json goes last so its ``metrics.profile`` covers the rendering too.
+    """
+    ordered = out["ordered_points"]
+    report("render")
+    # Leaflet map with the stops embedded once as GeoJSON
+    with span(report, "map_html"):
+        html = build_leaflet_html(ordered, out['metrics'])
+        with atomic_open(p/"map.html") as f:
+            f.write(html)
+
+    if url_by == "coords":
+        # Create a Yandex Maps URL based on coordinates (lon,lat pairs)
+        coord_pairs = []
+        for pt in ordered:
+            lat, lon = pt.get('lat'), pt.get('lon')
+            if lat is not None and lon is not None:
+                coord_pairs.append(f"{lon},{lat}")
+    else:
+        # 🧭 создаём ссылку на интерактивную карту Яндекс с маршрутами
+        coord_pairs = [pt['address'] for pt in ordered if isinstance(pt.get('address'), str) and pt['address'].strip()]
     if coord_pairs:
         yandex_url = f"https://yandex.ru/maps/?rtext={'~'.join(coord_pairs)}&rtt=auto"
         out["map_url"] = yandex_url
         url_path = p / "URL.txt"
-        with open(url_path, "w", encoding="utf-8") as f:
+        with atomic_open(url_path) as f:
             f.write(yandex_url + "\n")
 
+    if isinstance(report, StageTimer):
+        out["metrics"]["profile"] = report.metrics()
+    with atomic_open(p/"route.json") as f:
+        write_route_json(f, out)
+    if binary:
+        with atomic_open(p/f"route.{binary}", "wb") as f:
+            write_route_binary(f, out, binary)
     return out
-
-    # 🧭 создаём ссылку на интерактивную карту Яндекс по адресам (а не координатам)
-    # from urllib.parse import quote_plus
-
-    # address_list = [p['address'] for p in ordered if isinstance(p.get('address'), str) and p['address'].strip()]
-    # if address_list:
-    #     encoded_addresses = [quote_plus(addr) for addr in address_list]
-    #     yandex_url = f"https://yandex.ru/maps/?rtext={'~'.join(encoded_addresses)}&rtt=auto"
-    #     out["map_url"] = yandex_url
-    #     url_path = p / "URL.txt"
-    #     with open(url_path, "w", encoding="utf-8") as f:
-    #         f.write(yandex_url + "\n")
-
-def build_leaflet_html(points, metrics):
-    markers_js = []
-    lat0 = points[0]['lat'] if points and points[0]['lat'] else 0
-    lon0 = points[0]['lon'] if points and points[0]['lon'] else 0
-    for p in points:
-        markers_js.append(f" L.marker([{p['lat']},{p['lon']}]).bindPopup('{p.get('client_name', '')} (id:{p['id']})'); ")
-    poly = ",\n".join([f"[{p['lat']},{p['lon']}]" for p in points])
-
-    html = f"""<!doctype html>
-<html>
-<head>
-  <meta charset="utf-8"/>
-  <title>Route map</title>
-  <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <link rel="stylesheet" href="https://unpkg.com/leaflet/dist/leaflet.css"/>
-  <style> #map {{ height: 90vh; }} body {{ margin:0; padding:0; }} </style>
-</head>
-<body>
-<div id="map"></div>
-<script src="https://unpkg.com/leaflet/dist/leaflet.js"></script>
-<script>
-  var map = L.map('map').setView([{lat0},{lon0}], 12);
-  L.tileLayer('https://{{{{s}}}}.tile.openstreetmap.org/{{{{z}}}}/{{{{x}}}}/{{{{y}}}}.png', {{
-    maxZoom: 19
-  }}).addTo(map);
-
-  var latlngs = [{poly}];
-  var polyline = L.polyline(latlngs, {{weight:4}}).addTo(map);
-  map.fitBounds(polyline.getBounds());
-
-  {"".join(markers_js)}
-
-  var metrics = {json.dumps(metrics)};
-  var info = L.control();
-  info.onAdd = function(map) {{
-      var div = L.DomUtil.create('div', 'info');
-      div.style.background = 'white';
-      div.style.padding = '6px';
-      div.innerHTML = '<b>Estimated distance (км):</b> ' + metrics.distance_km.toFixed(2) + '<br>' +
-                      '<b>Estimated travel time (мин):</b> ' + metrics.estimated_travel_time_min.toFixed(0);
-      return div;
-  }};
-  info.addTo(map);
-</script>
-</body>
-</html>"""
-    return html
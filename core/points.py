@@ -0,0 +1,153 @@
+"""Columnar point store.
+
+A ``PointSet`` keeps every stop attribute in one NumPy array (or object
+array for text) instead of one dict per stop. Solvers index it with
+integer positions; dicts are only materialised for the JSON / map output
+by :meth:`PointSet.to_dicts`.
+
+Times are int32 minutes after midnight (``NO_TIME`` when missing),
+coordinates and service times float64 (NaN when missing). Ids and
+priorities are interned, so repeated values share one string object.
+"""
+
+import sys
+import numpy as np
+from .io import clock_minutes_column, NO_TIME
+from .distance import point_coords
+
+CLOCK_FIELDS = ("time_window_start", "time_window_end", "lunch_start", "lunch_end")
+
+
+def _interned(values):
+    out = np.empty(len(values), dtype=object)
+    for i, v in enumerate(values):
+        if isinstance(v, np.generic):
+            v = v.item()
+        if isinstance(v, float) and v != v:
+            v = None
+        out[i] = sys.intern(v) if isinstance(v, str) else v
+    return out
+
+
+def vip_mask(priority):
+    return np.array([isinstance(v, str) and v.strip().lower().startswith('vip') for v in priority], dtype=bool)
+
+
+def _hhmm(m):
+    return f"{m // 60:02d}:{m % 60:02d}" if m != NO_TIME else None
+
+
+def _num(x):
+    return float(x) if not np.isnan(x) else None
+
+
+class PointSet:
+    """Stop attributes as parallel arrays; row ``i`` is stop ``i``."""
+
+    __slots__ = ("ids", "client_name", "address", "priority", "lat", "lon", "tw_start", "tw_end",
+                 "lunch_start", "lunch_end", "service", "vip", "score")
+
+    def __init__(self, ids, lat, lon, client_name=None, address=None, priority=None, tw_start=None,
+                 tw_end=None, lunch_start=None, lunch_end=None, service=None, score=None):
+        n = len(lat)
+
+        def text(v):
+            return _interned(v) if v is not None else np.full(n, None, dtype=object)
+
+        def clock(v):
+            return np.asarray(v, dtype=np.int32) if v is not None else np.full(n, NO_TIME, dtype=np.int32)
+
+        self.ids = _interned(ids)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.client_name = text(client_name)
+        self.address = text(address)
+        self.priority = text(priority)
+        self.tw_start, self.tw_end = clock(tw_start), clock(tw_end)
+        self.lunch_start, self.lunch_end = clock(lunch_start), clock(lunch_end)
+        self.service = np.asarray(service, dtype=np.float64) if service is not None else np.full(n, np.nan)
+        self.vip = vip_mask(self.priority)
+        self.score = None if score is None else np.asarray(score, dtype=np.float64)
+
+    @classmethod
+    def from_columns(cls, cols):
+        """Build from the column dict returned by ``io.load_input``."""
+        return cls(cols["id"], cols["latitude"], cols["longitude"], client_name=cols["client_name"],
+                   address=cols["address"], priority=cols["priority"],
+                   tw_start=cols["time_window_start"], tw_end=cols["time_window_end"],
+                   lunch_start=cols["lunch_start"], lunch_end=cols["lunch_end"], service=cols["service_time"])
+
+    @classmethod
+    def from_dicts(cls, points):
+        """Build from point dicts (``lat``/``latitude`` keys, 'HH:MM' or ``time`` clocks)."""
+        lat, lon = point_coords(points)
+        clocks = {f: clock_minutes_column([p.get(f) for p in points]) for f in CLOCK_FIELDS}
+        service = np.array([_service(p.get('service_time')) for p in points], dtype=np.float64)
+        return cls([p.get('id') for p in points], lat, lon,
+                   client_name=[p.get('client_name') for p in points],
+                   address=[p.get('address') for p in points],
+                   priority=[p.get('priority') for p in points],
+                   tw_start=clocks["time_window_start"], tw_end=clocks["time_window_end"],
+                   lunch_start=clocks["lunch_start"], lunch_end=clocks["lunch_end"], service=service)
+
+    @classmethod
+    def of(cls, points):
+        """``points`` itself if it already is a PointSet, else one built from dicts."""
+        return points if isinstance(points, cls) else cls.from_dicts(points)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def take(self, idx):
+        """A new PointSet with the rows ``idx`` (any integer index array), in that order."""
+        idx = np.asarray(idx, dtype=np.intp)
+        new = object.__new__(PointSet)
+        for k in self.__slots__:
+            v = getattr(self, k)
+            setattr(new, k, None if v is None else v[idx])
+        return new
+
+    def has_coords(self):
+        """Boolean mask of the points with both coordinates."""
+        return np.isfinite(self.lat) & np.isfinite(self.lon)
+
+    def to_dicts(self, order=None):
+        """Point dicts for the rows in ``order`` (all rows by default), ready for JSON."""
+        idx = np.arange(len(self)) if order is None else np.asarray(order, dtype=np.intp)
+        lat, lon, service = self.lat[idx].tolist(), self.lon[idx].tolist(), self.service[idx].tolist()
+        clocks = [[_hhmm(m) for m in getattr(self, f)[idx].tolist()]
+                  for f in ("tw_start", "tw_end", "lunch_start", "lunch_end")]
+        score = self.score[idx].tolist() if self.score is not None else None
+        out = []
+        for j, i in enumerate(idx.tolist()):
+            p = {
+                "id": self.ids[i],
+                "client_name": self.client_name[i],
+                "address": self.address[i],
+                "lat": _num(lat[j]),
+                "lon": _num(lon[j]),
+                "priority": self.priority[i],
+                "time_window_start": clocks[0][j],
+                "time_window_end": clocks[1][j],
+                "lunch_start": clocks[2][j],
+                "lunch_end": clocks[3][j],
+                "service_time": _num(service[j]),
+            }
+            if score is not None:
+                p["gnn_score"] = score[j]
+            out.append(p)
+        return out
+
+
+def materialise(points, order):
+    """Output dicts for ``order``: built from a PointSet, or the caller's own dicts for a list."""
+    if isinstance(points, PointSet):
+        return points.to_dicts(order)
+    return [points[i] for i in order]
+
+
+def _service(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
@@ -0,0 +1,191 @@
+"""Lightweight instrumentation for pipeline runs and the web app.
+
+``StageTimer`` is the ``progress`` callback of a run: every reported stage
+(see ``pipeline.STAGES``) closes the previous one, and ``span`` times
+finer steps inside a stage. For each it records wall and CPU seconds and
+peak memory — the tracemalloc peak of the stage when ``trace_memory`` is
+on, otherwise the process peak RSS so far. Counters (matrix cells fetched,
+2-opt moves, ...) are collected alongside; ``metrics()`` is what ends up
+in ``route.json`` under ``metrics.profile``.
+
+``profiled`` optionally wraps a whole run in cProfile or pyinstrument,
+and ``Histograms`` aggregates latencies across runs and HTTP requests in
+the Prometheus text format served by ``/metrics``.
+"""
+
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # bytes on macOS, KiB elsewhere
+
+
+class StageTimer:
+    def __init__(self, progress=None, trace_memory=False):
+        self.progress = progress
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.counters = {}
+        self._current = None
+        self._t0 = time.perf_counter()
+        self._own_trace = trace_memory and not tracemalloc.is_tracing()
+        if self._own_trace:
+            tracemalloc.start()
+
+    def __call__(self, stage):
+        self._close()
+        self._current = (stage, self._start())
+        if self.progress is not None:
+            self.progress(stage)
+
+    def _start(self):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        return time.perf_counter(), time.process_time()
+
+    def _record(self, name, start):
+        wall, cpu = start
+        entry = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "peak_mb": 0.0})
+        entry["wall_s"] += time.perf_counter() - wall
+        entry["cpu_s"] += time.process_time() - cpu
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if self.trace_memory else peak_rss_mb()
+        entry["peak_mb"] = max(entry["peak_mb"], peak or 0.0)
+
+    def _close(self):
+        if self._current is not None:
+            self._record(*self._current)
+            self._current = None
+
+    @contextmanager
+    def span(self, name):
+        """Time a step inside the current stage as ``<stage>.<name>``."""
+        stage = self._current[0] if self._current is not None else None
+        start = (time.perf_counter(), time.process_time())
+        try:
+            yield
+        finally:
+            self._record(f"{stage}.{name}" if stage else name, start)
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def metrics(self):
+        """Close the running stage and return ``{stages, counters, total_wall_s, peak_rss_mb}``."""
+        self._close()
+        if self._own_trace:
+            tracemalloc.stop()
+            self._own_trace = self.trace_memory = False
+        return {
+            "stages": {k: {m: round(v, 6) for m, v in e.items()} for k, e in self.stages.items()},
+            "counters": dict(self.counters),
+            "total_wall_s": round(time.perf_counter() - self._t0, 6),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def span(report, name):
+    """``report.span(name)`` when ``report`` is a StageTimer, else a no-op context."""
+    return report.span(name) if isinstance(report, StageTimer) else nullcontext()
+
+
+def count(report, counters):
+    """Add a dict of numeric counters to ``report`` when it is a StageTimer."""
+    if isinstance(report, StageTimer):
+        for k, v in counters.items():
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                report.count(k, v)
+
+
+@contextmanager
+def profiled(kind, path):
+    """Profile the block with ``kind`` ('cprofile' / 'pyinstrument' / None) into ``path`` + suffix."""
+    if not kind:
+        yield
+        return
+    path = Path(path)
+    if kind == "cprofile":
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            prof.dump_stats(str(path.with_suffix(".pstats")))
+    elif kind == "pyinstrument":
+        from pyinstrument import Profiler
+        prof = Profiler()
+        prof.start()
+        try:
+            yield
+        finally:
+            prof.stop()
+            path.with_suffix(".html").write_text(prof.output_html(), encoding="utf-8")
+    else:
+        raise ValueError(f"Unknown profiler: {kind}")
+
+
+class Histograms:
+    """Thread-safe latency histograms rendered in the Prometheus text format."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = {"counts": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            for i, b in enumerate(self.buckets):
+                if seconds <= b:
+                    s["counts"][i] += 1
+            s["count"] += 1
+            s["sum"] += seconds
+
+    def render(self):
+        lines, typed = [], set()
+        with self._lock:
+            series = sorted(self._series.items())
+            snapshot = [(k, {"counts": list(s["counts"]), "count": s["count"], "sum": s["sum"]}) for k, s in series]
+        for (name, labels), s in snapshot:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            base = [f'{k}="{_escape(v)}"' for k, v in labels]
+            for b, c in zip(self.buckets, s["counts"]):
+                lines.append(f"{name}_bucket{_labels(base, b)} {c}")
+            lines.append(f"{name}_bucket{_labels(base, '+Inf')} {s['count']}")
+            lines.append(f"{name}_sum{_labels(base)} {s['sum']}")
+            lines.append(f"{name}_count{_labels(base)} {s['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(base, le=None):
+    parts = base + ([f'le="{le}"'] if le is not None else [])
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = Histograms()
@@ -0,0 +1,147 @@
+"""Route outputs: route.json, optional binary route file, Leaflet map.
+
+``route.json`` is encoded incrementally straight into the file, without
+indentation, so the whole document never exists as one string. Machine
+consumers can additionally get a compact ``route.npz`` (NumPy arrays, no
+extra dependency) or ``route.msgpack`` (needs the ``msgpack`` package).
+
+The map embeds the stops once as a GeoJSON FeatureCollection; markers,
+popups and the route line are built from it in the browser and markers
+are clustered, so the page stays small and fast for thousands of stops.
+"""
+
+import json
+import numpy as np
+
+BINARY_FORMATS = ("npz", "msgpack")
+_CHUNK_CHARS = 1 << 16
+
+
+def write_route_json(f, out):
+    """Stream ``out`` as compact JSON into the text file ``f``."""
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    buf, size = [], 0
+    for chunk in encoder.iterencode(out):
+        buf.append(chunk)
+        size += len(chunk)
+        if size >= _CHUNK_CHARS:
+            f.write("".join(buf))
+            buf, size = [], 0
+    f.write("".join(buf))
+
+
+def _floats(points, key):
+    return np.array([np.nan if p.get(key) is None else p[key] for p in points], dtype=np.float64)
+
+
+def route_arrays(out):
+    """Columnar view of a route dict: per-stop arrays plus the metrics as a JSON string."""
+    points = out["ordered_points"]
+    arrays = {
+        "id": np.array(["" if p.get("id") is None else str(p["id"]) for p in points], dtype=str),
+        "lat": _floats(points, "lat"),
+        "lon": _floats(points, "lon"),
+        "gnn_score": _floats(points, "gnn_score"),
+        "vip": np.array([str(p.get("priority") or "").strip().lower().startswith("vip") for p in points]),
+        "mode": np.array(out.get("mode", "")),
+        "metrics": np.array(json.dumps(out.get("metrics", {}), ensure_ascii=False)),
+    }
+    if "routes" in out:
+        arrays["vehicle"] = np.concatenate(
+            [np.full(len(r["ordered_points"]), r["vehicle"], dtype=np.int32) for r in out["routes"]]
+            or [np.empty(0, dtype=np.int32)])
+    return arrays
+
+
+def write_route_binary(f, out, fmt):
+    """Write the compact ``fmt`` ('npz' or 'msgpack') encoding of ``out`` into the binary file ``f``."""
+    if fmt not in BINARY_FORMATS:
+        raise ValueError(f"Unknown route binary format: {fmt}")
+    if fmt == "npz":
+        np.savez_compressed(f, **route_arrays(out))
+    else:
+        import msgpack
+        f.write(msgpack.packb(out, use_bin_type=True))
+
+
+def route_geojson(points):
+    """FeatureCollection of the stops in route order (stops without coordinates are skipped)."""
+    features = []
+    for seq, p in enumerate(points, 1):
+        if p.get("lat") is None or p.get("lon") is None:
+            continue
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [p["lon"], p["lat"]]},
+            "properties": {"seq": seq, "id": p.get("id"), "client_name": p.get("client_name"),
+                           "address": p.get("address"), "priority": p.get("priority")},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _script_json(obj):
+    # JSON that is safe inside a <script> element
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).replace("</", "<\\/")
+
+
+def build_leaflet_html(points, metrics):
+    data = _script_json(route_geojson(points))
+    return f"""<!doctype html>
+<html>
+<head>
+  <meta charset="utf-8"/>
+  <title>Route map</title>
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <link rel="stylesheet" href="https://unpkg.com/leaflet/dist/leaflet.css"/>
+  <link rel="stylesheet" href="https://unpkg.com/leaflet.markercluster/dist/MarkerCluster.css"/>
+  <link rel="stylesheet" href="https://unpkg.com/leaflet.markercluster/dist/MarkerCluster.Default.css"/>
+  <style> #map {{ height: 90vh; }} body {{ margin:0; padding:0; }} </style>
+</head>
+<body>
+<div id="map"></div>
+<script type="application/json" id="route-data">{data}</script>
+<script type="application/json" id="route-metrics">{_script_json(metrics)}</script>
+<script src="https://unpkg.com/leaflet/dist/leaflet.js"></script>
+<script src="https://unpkg.com/leaflet.markercluster/dist/leaflet.markercluster.js"></script>
+<script>
+  var route = JSON.parse(document.getElementById('route-data').textContent);
+  var metrics = JSON.parse(document.getElementById('route-metrics').textContent);
+  var map = L.map('map');
+  L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
+    maxZoom: 19
+  }}).addTo(map);
+
+  var latlngs = route.features.map(function(f) {{
+    return [f.geometry.coordinates[1], f.geometry.coordinates[0]];
+  }});
+  if (latlngs.length) {{
+    var polyline = L.polyline(latlngs, {{weight:4}}).addTo(map);
+    map.fitBounds(polyline.getBounds());
+  }} else {{
+    map.setView([0, 0], 2);
+  }}
+
+  function popup(layer) {{
+    var p = layer.feature.properties;
+    var div = document.createElement('div');
+    div.textContent = p.seq + '. ' + (p.client_name || p.address || '') + ' (id:' + p.id + ')';
+    return div;
+  }}
+  var markers = L.markerClusterGroup({{chunkedLoading: true}});
+  var layer = L.geoJSON(route, {{onEachFeature: function(f, marker) {{ marker.bindPopup(popup); }}}});
+  markers.addLayers(layer.getLayers());
+  map.addLayer(markers);
+
+  var info = L.control();
+  info.onAdd = function(map) {{
+      var div = L.DomUtil.create('div', 'info');
+      div.style.background = 'white';
+      div.style.padding = '6px';
+      div.innerHTML = '<b>Estimated distance (км):</b> ' + (metrics.distance_km || 0).toFixed(2) + '<br>' +
+                      '<b>Estimated travel time (мин):</b> ' + (metrics.estimated_travel_time_min || 0).toFixed(0);
+      return div;
+  }};
+  info.addTo(map);
+</script>
+</body>
+</html>"""
@@ -0,0 +1,150 @@
+"""Content-addressed storage for pipeline results.
+
+Every run gets its own directory ``<root>/<key>``, where the key hashes
+the input file contents together with the result-relevant configuration.
+A run is written into a temporary directory and renamed into place only
+when complete, so readers never see partial results and concurrent
+workers never clobber each other. Re-uploading an identical file returns
+the stored result without recomputing.
+
+Retention is bounded by ``max_runs`` and ``max_age`` (seconds); the least
+recently used runs are evicted first.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+# settings that only affect how jobs are executed, not what they produce
+_IGNORED_SETTINGS = ("JOB_", "RESULT_", "MATRIX_CACHE_", "MATRIX_STORE_MAX_BYTES", "MATRIX_WORKERS",
+                     "MATRIX_RATE_LIMIT", "MATRIX_RETRIES", "MATRIX_BACKOFF", "FLEET_WORKERS", "TIMEZONE")
+_SECRET_SETTINGS = ("YANDEX_API_KEY", "YANDEX_GEOCODER_KEY")
+# settings naming a file whose contents change results (retrained or edited in place)
+_FILE_SETTINGS = ("ROAD_MODEL_PATH", "GNN_STATE_PATH", "GNN_EXPORT_PATH", "DEPOTS_PATH", "GEOCODE_STUB_PATH")
+
+KEY_LENGTH = 32  # hex digits of a run key
+_KEY_RE = re.compile(f"[0-9a-f]{{{KEY_LENGTH}}}")
+
+_digests = {}  # path -> ((mtime_ns, size), sha256), so unchanged files are not re-read per upload
+
+
+def _file_digest(path):
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = _digests.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    except (OSError, TypeError):  # unset or not created yet
+        return None
+    _digests[path] = (stamp, h.hexdigest())
+    return h.hexdigest()
+
+
+def config_fingerprint(config):
+    """Stable JSON of the uppercase Config settings that can change a result."""
+    settings = {}
+    for name in dir(config):
+        if not name.isupper() or name.startswith(_IGNORED_SETTINGS):
+            continue
+        value = getattr(config, name)
+        if name in _SECRET_SETTINGS:
+            value = bool(value)  # never hash the secret itself
+        elif name in _FILE_SETTINGS:
+            value = [value, _file_digest(value)]
+        settings[name] = value
+    return json.dumps(settings, sort_keys=True, default=repr)
+
+
+def input_key(input_path, config):
+    h = hashlib.sha256()
+    with open(input_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    h.update(b"\0")
+    h.update(config_fingerprint(config).encode("utf-8"))
+    return h.hexdigest()[:KEY_LENGTH]
+
+
+def is_run_key(key):
+    """True for a well-formed run key (lowercase hex); check keys from requests before ``run_dir``."""
+    return isinstance(key, str) and _KEY_RE.fullmatch(key) is not None
+
+
+class ResultStore:
+    def __init__(self, root="results/runs", max_runs=200, max_age=30 * 24 * 3600):
+        self.root = Path(root)
+        self.max_runs = max_runs
+        self.max_age = max_age
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(getattr(config, "RESULT_STORE_DIR", "results/runs"),
+                   max_runs=getattr(config, "RESULT_MAX_RUNS", 200),
+                   max_age=getattr(config, "RESULT_MAX_AGE", 30 * 24 * 3600))
+
+    def run_dir(self, key):
+        return self.root / key
+
+    def lookup(self, key):
+        """Stored ``route.json`` of a completed run (refreshing its LRU time), or None."""
+        route = self.run_dir(key) / "route.json"
+        try:
+            with open(route, encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(self.run_dir(key))
+        return result
+
+    def begin(self):
+        """Create a private temporary directory for a run in progress."""
+        tmp = self.root / f".tmp-{uuid.uuid4().hex}"
+        tmp.mkdir(parents=True)
+        return tmp
+
+    def commit(self, tmp, key):
+        """Atomically publish ``tmp`` as run ``key``; if another worker won the race, keep theirs."""
+        final = self.run_dir(key)
+        try:
+            os.rename(tmp, final)
+        except OSError:
+            if not (final / "route.json").exists():
+                raise
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+        return final
+
+    def abort(self, tmp):
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    def evict(self):
+        """Remove runs older than ``max_age`` and the least recently used beyond ``max_runs``."""
+        if not self.root.exists():
+            return
+        now = time.time()
+        runs = []
+        for d in self.root.iterdir():
+            if not d.is_dir():
+                continue
+            try:
+                mtime = d.stat().st_mtime
+            except OSError:
+                continue
+            # stale temp dirs of crashed workers are dropped after max_age too
+            if now - mtime > self.max_age:
+                shutil.rmtree(d, ignore_errors=True)
+            elif not d.name.startswith(".tmp-"):
+                runs.append((mtime, d))
+        runs.sort()
+        for _, d in runs[:max(0, len(runs) - self.max_runs)]:
+            shutil.rmtree(d, ignore_errors=True)
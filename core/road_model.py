@@ -0,0 +1,272 @@
+"""Road distance / travel time estimated from coordinates.
+
+``RoadModel`` is fitted on cells already in the MatrixCache and predicts
+road distance as ``haversine x detour factor``, and travel time as
+``road distance x pace`` (seconds per km). Both are log-linear in a few
+pair features — straight-line length, direction, where the pair lies
+relative to the data centre — plus a correction per (origin cell,
+destination cell) of a coarse grid, shrunk towards zero for rarely seen
+pairs. The grid term is what learns local structure such as the few
+bridges over the Don: pairs on opposite banks get a larger factor than
+pairs of the same length on one bank.
+
+Prediction is vectorised over row blocks, so a full N x N approximation
+is as cheap as a haversine matrix. It replaces the plain haversine /
+fixed-speed fallback, and with ``MATRIX_STRATEGY = 'sparse'`` it fills
+every cell the solver does not need exactly, so only candidate (kNN and
+tour) edges are requested from the Distance Matrix API.
+
+Fit and save from the configured cache with::
+
+    python -m core.road_model --out models/road_model.npz
+"""
+
+import argparse
+import math
+import numpy as np
+from .distance import DEFAULT_BLOCK_SIZE, EARTH_RADIUS_KM, haversine_matrix
+
+N_FEATURES = 11
+MIN_SAMPLES = 50
+MIN_KM = 0.05  # shorter pairs carry no usable detour information
+RIDGE = 1e-3
+SHRINK = 2.0  # pseudo-count pulling sparse grid cells towards the global fit
+MAX_CELLS = 32  # grid cells per axis
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def _features(h, olat, olon, dlat, dlon, center):
+    """The ``N_FEATURES`` pair features, each broadcast to the shape of ``h``."""
+    lat0, lon0, cos0 = center
+    dy = (dlat - olat) * KM_PER_DEG
+    dx = (dlon - olon) * KM_PER_DEG * cos0
+    b = np.arctan2(dx, dy)
+    my = ((olat + dlat) / 2 - lat0) * KM_PER_DEG / 10.0
+    mx = ((olon + dlon) / 2 - lon0) * KM_PER_DEG * cos0 / 10.0
+    lh = np.log1p(h)
+    ones = np.ones_like(h)
+    return [ones, lh, 1.0 / (h + 0.5), np.sin(b), np.cos(b), np.sin(2 * b), np.cos(2 * b),
+            my * ones, mx * ones, my * lh, mx * lh]
+
+
+def _ridge(X, y):
+    A = X.T @ X + RIDGE * len(X) * np.eye(X.shape[1])
+    A[0, 0] -= RIDGE * len(X)  # do not shrink the intercept
+    return np.linalg.solve(A, X.T @ y)
+
+
+class RoadModel:
+    def __init__(self, beta_d, table_d, grid, center, beta_t=None, table_t=None, speed_kmh=40.0):
+        self.beta_d = np.asarray(beta_d, dtype=np.float64)
+        self.table_d = np.asarray(table_d, dtype=np.float32)
+        self.beta_t = None if beta_t is None else np.asarray(beta_t, dtype=np.float64)
+        self.table_t = None if table_t is None else np.asarray(table_t, dtype=np.float32)
+        self.grid = tuple(float(x) for x in grid)  # lat0, lon0, cell_lat, cell_lon, rows, cols
+        self.center = tuple(float(x) for x in center)
+        self.speed_kmh = speed_kmh
+
+    # -- grid ---------------------------------------------------------------------------------
+
+    def _cells(self, lat, lon):
+        lat0, lon0, clat, clon, rows, cols = self.grid
+        i = np.floor((np.asarray(lat, dtype=float) - lat0) / clat)
+        j = np.floor((np.asarray(lon, dtype=float) - lon0) / clon)
+        ok = (i >= 0) & (i < rows) & (j >= 0) & (j < cols)
+        return np.where(ok, i * cols + j, -1).astype(np.int64)
+
+    @staticmethod
+    def _grid_for(lat, lon, cell_km):
+        lat0, lat1 = float(np.min(lat)), float(np.max(lat))
+        lon0, lon1 = float(np.min(lon)), float(np.max(lon))
+        cos0 = math.cos(math.radians((lat0 + lat1) / 2))
+        clat = max(cell_km / KM_PER_DEG, (lat1 - lat0) / MAX_CELLS + 1e-9)
+        clon = max(cell_km / (KM_PER_DEG * cos0), (lon1 - lon0) / MAX_CELLS + 1e-9)
+        rows = int((lat1 - lat0) // clat) + 1
+        cols = int((lon1 - lon0) // clon) + 1
+        return lat0, lon0, clat, clon, rows, cols
+
+    # -- fitting ------------------------------------------------------------------------------
+
+    @classmethod
+    def fit(cls, olat, olon, dlat, dlon, dist_m, dur_s=None, cell_km=4.0, speed_kmh=40.0):
+        """Fit on API cells (metres / seconds); pairs shorter than ``MIN_KM`` are ignored.
+
+        Raises ValueError with fewer than ``MIN_SAMPLES`` usable cells.
+        """
+        olat, olon, dlat, dlon = (np.asarray(a, dtype=float) for a in (olat, olon, dlat, dlon))
+        road = np.asarray(dist_m, dtype=float) / 1000.0
+        h = _pairwise_haversine(olat, olon, dlat, dlon)
+        ok = np.isfinite(road) & (h >= MIN_KM) & (road > 0)
+        if ok.sum() < MIN_SAMPLES:
+            raise ValueError(f"Need at least {MIN_SAMPLES} cached cells to fit a road model, got {int(ok.sum())}")
+        lat_all = np.concatenate([olat[ok], dlat[ok]])
+        lon_all = np.concatenate([olon[ok], dlon[ok]])
+        center = (float(lat_all.mean()), float(lon_all.mean()), math.cos(math.radians(lat_all.mean())))
+        grid = cls._grid_for(lat_all, lon_all, cell_km)
+        model = cls(np.zeros(N_FEATURES), np.zeros(1), grid, center, speed_kmh=speed_kmh)
+        g = int(grid[4] * grid[5])
+        pair = model._cells(olat[ok], olon[ok]) * g + model._cells(dlat[ok], dlon[ok])
+        X = np.column_stack(_features(h[ok], olat[ok], olon[ok], dlat[ok], dlon[ok], center))
+
+        def fit_target(y, rows):
+            beta = _ridge(X[rows], y)
+            resid = y - X[rows] @ beta
+            sums = np.bincount(pair[rows], weights=resid, minlength=g * g)
+            counts = np.bincount(pair[rows], minlength=g * g)
+            return beta, (sums / (counts + SHRINK)).reshape(g, g)
+
+        # detour factor is at least 1 (up to rounding of the cache keys)
+        model.beta_d, model.table_d = fit_target(np.log(np.maximum(road[ok] / h[ok], 1.0)), np.arange(ok.sum()))
+        if dur_s is not None:
+            dur = np.asarray(dur_s, dtype=float)[ok]
+            timed = np.flatnonzero(np.isfinite(dur) & (dur > 0))
+            if len(timed) >= MIN_SAMPLES:
+                model.beta_t, model.table_t = fit_target(np.log(dur[timed] / road[ok][timed]), timed)
+        return model
+
+    @classmethod
+    def from_cache(cls, cache, profile="auto", limit=None, **kwargs):
+        """Fit on the cells of a MatrixCache (see ``MatrixCache.samples``)."""
+        return cls.fit(*cache.samples(profile, limit=limit), **kwargs)
+
+    # -- prediction ---------------------------------------------------------------------------
+
+    def _log_terms(self, h, olat, olon, dlat, dlon, oc, dc):
+        """Log detour factor and log pace (or None) for broadcastable pair arrays."""
+        f = _features(h, olat, olon, dlat, dlon, self.center)
+        inside = (oc >= 0) & (dc >= 0)
+        oc, dc = np.maximum(oc, 0), np.maximum(dc, 0)
+        out = []
+        for beta, table in ((self.beta_d, self.table_d), (self.beta_t, self.table_t)):
+            if beta is None:
+                out.append(None)
+                continue
+            out.append(sum(b * x for b, x in zip(beta, f)) + np.where(inside, table[oc, dc], 0.0))
+        return out
+
+    def _predict(self, h, olat, olon, dlat, dlon, oc, dc):
+        log_d, log_t = self._log_terms(h, olat, olon, dlat, dlon, oc, dc)
+        road = h * np.maximum(np.exp(log_d), 1.0)
+        dur = road * np.exp(log_t) if log_t is not None else road / self.speed_kmh * 3600.0
+        return road, dur
+
+    def predict_matrix(self, lat, lon, lat2=None, lon2=None, block_size=DEFAULT_BLOCK_SIZE // 8):
+        """``(distance_km, duration_s)`` matrices between origins and destinations (default: all pairs).
+
+        Computed ``block_size`` origin rows at a time. Unknown coordinates
+        give NaN features and therefore ``nan`` cells.
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        square = lat2 is None
+        lat2 = lat if square else np.asarray(lat2, dtype=float)
+        lon2 = lon if square else np.asarray(lon2, dtype=float)
+        n, m = len(lat), len(lat2)
+        dist = np.empty((n, m))
+        dur = np.empty((n, m))
+        oc, dc = self._cells(lat, lon), self._cells(lat2, lon2)
+        for s in range(0, n, block_size):
+            e = min(n, s + block_size)
+            h = haversine_matrix(lat[s:e], lon[s:e], lat2, lon2)
+            dist[s:e], dur[s:e] = self._predict(h, lat[s:e, None], lon[s:e, None], lat2[None, :], lon2[None, :],
+                                                oc[s:e, None], dc[None, :])
+        if square and n:
+            np.fill_diagonal(dist, 0.0)
+            np.fill_diagonal(dur, 0.0)
+        return dist, dur
+
+    def predict_pairs(self, olat, olon, dlat, dlon):
+        """``(distance_km, duration_s)`` for origin i -> destination i."""
+        olat, olon, dlat, dlon = (np.asarray(a, dtype=float) for a in (olat, olon, dlat, dlon))
+        h = _pairwise_haversine(olat, olon, dlat, dlon)
+        return self._predict(h, olat, olon, dlat, dlon, self._cells(olat, olon), self._cells(dlat, dlon))
+
+    def travel_minutes(self, lat, lon, total_km=None):
+        """Predicted driving minutes along the path through ``lat``/``lon`` in order.
+
+        With ``total_km`` (e.g. the road length reported by the API) the
+        predicted pace is applied to that distance instead of the predicted one.
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        if len(lat) < 2:
+            return 0.0
+        km, sec = self.predict_pairs(lat[:-1], lon[:-1], lat[1:], lon[1:])
+        km, sec = float(np.nansum(km)), float(np.nansum(sec))
+        if total_km is not None and km > 0:
+            sec *= total_km / km
+        return sec / 60.0
+
+    def error(self, olat, olon, dlat, dlon, dist_m):
+        """Median absolute relative error of the predicted road distances, and of plain haversine."""
+        road = np.asarray(dist_m, dtype=float) / 1000.0
+        pred = self.predict_pairs(olat, olon, dlat, dlon)[0]
+        h = _pairwise_haversine(olat, olon, dlat, dlon)
+        ok = np.isfinite(road) & (road > MIN_KM)
+        return (float(np.median(np.abs(pred[ok] - road[ok]) / road[ok])),
+                float(np.median(np.abs(h[ok] - road[ok]) / road[ok])))
+
+    # -- persistence --------------------------------------------------------------------------
+
+    def save(self, path):
+        arrays = {"beta_d": self.beta_d, "table_d": self.table_d, "grid": np.array(self.grid),
+                  "center": np.array(self.center), "speed_kmh": np.array(self.speed_kmh)}
+        if self.beta_t is not None:
+            arrays.update(beta_t=self.beta_t, table_t=self.table_t)
+        np.savez(path, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["beta_d"], data["table_d"], data["grid"], data["center"],
+                       beta_t=data["beta_t"] if "beta_t" in data else None,
+                       table_t=data["table_t"] if "table_t" in data else None,
+                       speed_kmh=float(data["speed_kmh"]))
+
+    @classmethod
+    def from_config(cls, config):
+        """Model saved at ``Config.ROAD_MODEL_PATH``, or None when unset or not fitted yet."""
+        from pathlib import Path
+
+        path = getattr(config, "ROAD_MODEL_PATH", None)
+        if not path or not Path(path).exists():
+            return None
+        return cls.load(path)
+
+
+def _pairwise_haversine(olat, olon, dlat, dlon):
+    """Element-wise great-circle km between origin i and destination i."""
+    la1, lo1, la2, lo2 = (np.radians(np.asarray(a, dtype=float)) for a in (olat, olon, dlat, dlon))
+    a = np.sin((la2 - la1) / 2) ** 2 + np.cos(la1) * np.cos(la2) * np.sin((lo2 - lo1) / 2) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def main():
+    from .config import Config
+    from .matrix_cache import MatrixCache
+
+    ap = argparse.ArgumentParser(description="Fit the road distance model on the Distance Matrix cache.")
+    ap.add_argument("--out", default=None, help="output .npz (default: Config.ROAD_MODEL_PATH)")
+    ap.add_argument("--cell-km", type=float, default=4.0)
+    ap.add_argument("--holdout", type=float, default=0.1, help="share of cells kept back for the error report")
+    args = ap.parse_args()
+    config = Config()
+    cache = MatrixCache.from_config(config)
+    if cache is None:
+        raise SystemExit("MATRIX_CACHE_PATH is not set")
+    cols = cache.samples(getattr(config, "ROUTING_PROFILE", "auto"))
+    test = np.random.default_rng(0).random(len(cols[0])) < args.holdout
+    model = RoadModel.fit(*(c[~test] for c in cols), cell_km=args.cell_km,
+                          speed_kmh=getattr(config, "AVERAGE_SPEED_KMH", 40))
+    if test.any():
+        err, base = model.error(*(c[test] for c in cols[:5]))
+        print(f"holdout median relative error: model {err:.1%}, haversine {base:.1%} ({int(test.sum())} cells)")
+    out = args.out or getattr(config, "ROAD_MODEL_PATH", None)
+    if not out:
+        raise SystemExit("no --out and no ROAD_MODEL_PATH")
+    print(f"saved to {model.save(out)}")
+
+
+if __name__ == "__main__":
+    main()
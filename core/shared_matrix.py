@@ -0,0 +1,160 @@
+"""Distance and adjacency matrices shared between processes through memory-mapped files.
+
+``MatrixStore`` keeps dense float32 matrices as ``.npy`` files under one
+directory, named by a hash of the point coordinates and the matrix kind.
+The first process to need a matrix builds it straight into a file-backed
+array and renames it into place; every other worker, job process or pool
+process opens the same file with ``mmap_mode='r'`` and shares the pages
+through the OS page cache instead of holding a private copy.
+
+Arrays that cross a process boundary are passed as a ``MatrixHandle``
+(``handle`` / ``attach``), so pickling sends a path instead of N x N
+floats.
+
+The directory is bounded by ``max_bytes``; least recently used files go
+first. Unlinking a file that is still mapped is safe on POSIX, the
+mapping stays valid until it is closed.
+"""
+
+import hashlib
+import os
+import uuid
+from collections import namedtuple
+from pathlib import Path
+import numpy as np
+from .distance import DEFAULT_BLOCK_SIZE, haversine_matrix, inverse_distance_adjacency
+
+DTYPE = np.float32
+
+MatrixHandle = namedtuple("MatrixHandle", "path")
+
+
+def matrix_key(kind, lat, lon, **params):
+    """Hash of the matrix kind, its parameters and the coordinate arrays."""
+    h = hashlib.sha256(repr((kind, sorted(params.items()), np.dtype(DTYPE).str)).encode("utf-8"))
+    h.update(np.ascontiguousarray(lat, dtype=np.float64).tobytes())
+    h.update(b"\0")
+    h.update(np.ascontiguousarray(lon, dtype=np.float64).tobytes())
+    return h.hexdigest()[:32]
+
+
+def _whole_file(a):
+    """True when memmap ``a`` maps the complete array of its ``.npy`` file (not a view into it)."""
+    fmt = np.lib.format
+    try:
+        with open(a.filename, "rb") as f:
+            version = fmt.read_magic(f)
+            read_header = fmt.read_array_header_1_0 if version == (1, 0) else fmt.read_array_header_2_0
+            shape, fortran, _ = read_header(f)
+            offset = f.tell()
+    except (OSError, ValueError):  # evicted or not an .npy file
+        return False
+    return a.offset == offset and a.shape == shape and not fortran and a.flags.c_contiguous
+
+
+def handle(a):
+    """A picklable ``MatrixHandle`` for a store-backed array, else ``a`` unchanged."""
+    if isinstance(a, np.memmap) and a.filename and _whole_file(a):
+        return MatrixHandle(str(a.filename))
+    return a
+
+
+def attach(a):
+    """The read-only mapped array behind a ``MatrixHandle``, else ``a`` unchanged."""
+    if isinstance(a, MatrixHandle):
+        return np.load(a.path, mmap_mode="r")
+    return a
+
+
+class MatrixStore:
+    def __init__(self, directory, max_bytes=4 * 2 ** 30):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config):
+        """Store configured by ``Config.MATRIX_STORE_*``, or None when disabled."""
+        directory = getattr(config, "MATRIX_STORE_DIR", None)
+        if not directory:
+            return None
+        return cls(directory, max_bytes=getattr(config, "MATRIX_STORE_MAX_BYTES", 4 * 2 ** 30))
+
+    def path(self, key):
+        return self.directory / f"{key}.npy"
+
+    def get(self, key):
+        """Mapped read-only matrix for ``key``, or None."""
+        path = self.path(key)
+        try:
+            a = np.load(path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            os.utime(path)  # recency for eviction
+        except OSError:
+            pass
+        return a
+
+    def get_or_build(self, key, shape, fill):
+        """Mapped matrix for ``key``; on a miss ``fill(out)`` writes it into a new file first."""
+        a = self.get(key)
+        if a is not None:
+            self.hits += 1
+            return a
+        self.misses += 1
+        path = self.path(key)
+        tmp = path.with_name(f".{path.stem}.{uuid.uuid4().hex}.tmp")
+        try:
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=DTYPE, shape=shape)
+            fill(out)
+            out.flush()
+            del out
+            os.replace(tmp, path)
+        except BaseException:
+            if tmp.exists():
+                tmp.unlink()
+            raise
+        self._evict(keep=path)
+        return np.load(path, mmap_mode="r")
+
+    def haversine(self, lat, lon, block_size=DEFAULT_BLOCK_SIZE):
+        """Shared square haversine matrix (km) for these coordinates."""
+        n = len(lat)
+        return self.get_or_build(matrix_key("haversine", lat, lon), (n, n),
+                                 lambda out: haversine_matrix(lat, lon, block_size=block_size, dtype=DTYPE, out=out))
+
+    def adjacency(self, lat, lon, dist=None, eps=1e-3):
+        """Shared dense inverse-distance adjacency for these coordinates."""
+        n = len(lat)
+
+        def fill(out):
+            d = dist if dist is not None else self.haversine(lat, lon)
+            inverse_distance_adjacency(d, eps=eps, out=out)
+
+        return self.get_or_build(matrix_key("adjacency", lat, lon, eps=eps), (n, n), fill)
+
+    def _evict(self, keep=None):
+        files = []
+        for p in self.directory.glob("*.npy"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in files)
+        for _, size, p in sorted(files, key=lambda f: f[0]):
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            try:
+                p.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def __len__(self):
+        return sum(1 for _ in self.directory.glob("*.npy"))
@@ -1,5 +1,9 @@
 import math
+import os
+import tempfile
+from contextlib import contextmanager
 from datetime import datetime, time
+from pathlib import Path
 
 def haversine(lon1, lat1, lon2, lat2):
     # returns kilometers
@@ -11,6 +15,20 @@ def haversine(lon1, lat1, lon2, lat2):
     c = 2 * math.asin(math.sqrt(a))
     return R * c
 
+def parse_clock(s):
+    # 'HH:MM' (or 'H:MM', 'HH:MM:SS') -> datetime.time, else None
+    if isinstance(s, time):
+        return s
+    if not isinstance(s, str):
+        return None
+    s = s.strip()
+    for fmt in ("%H:%M", "%H:%M:%S"):
+        try:
+            return datetime.strptime(s, fmt).time()
+        except ValueError:
+            pass
+    return None
+
 def parse_time_window(s):
     # input like '09:0010:00' -> ('09:00','10:00')
     if not isinstance(s, str):
@@ -32,3 +50,17 @@ def parse_time_window(s):
         return t0, t1
     except Exception:
         return None, None
+
+@contextmanager
+def atomic_open(path, mode="w", encoding="utf-8"):
+    """Write to a temp file next to ``path`` and rename it into place on success."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
@@ -0,0 +1,268 @@
+"""Time-window aware single-vehicle routing (VRPTW mode).
+
+Stops are scheduled from the start of the working day: the courier
+arrives, waits for the client's working hours to open, never serves
+during the client's lunch break, and spends the service time on site.
+Windows are soft: finishing after closing time counts as lateness, which
+is penalised far above travel time, so a schedule always exists.
+
+VIP priority is a hard precedence constraint: every VIP stop is visited
+before any standard stop. Within that constraint the route is built by
+cheapest insertion (earliest deadlines first) and improved with
+relocate / swap moves until a local optimum or the time limit.
+
+Insertions are priced in O(1) from the current schedule's forward time
+slack: how far each stop's arrival can slip before some later stop
+turns late or runs into its lunch break. Only insertions that exceed it
+are re-simulated, and only while their lower bound can still win.
+"""
+
+import time
+import numpy as np
+from .io import NO_TIME
+from .local_search import neighbor_lists
+from .points import PointSet
+from .utils import parse_clock
+
+DAY_MINUTES = 24 * 60
+LATE_WEIGHT = 1000.0  # cost of one minute of lateness, in route minutes
+SWAP_NEIGHBORS = 10  # swap moves only pair a stop with its nearest stops
+
+
+def clock_minutes(v):
+    """'HH:MM' / datetime.time -> minutes after midnight, or None."""
+    t = parse_clock(v)
+    return None if t is None else t.hour * 60 + t.minute
+
+
+def minutes_clock(m):
+    m = int(round(m))
+    return f"{(m // 60) % 24:02d}:{m % 60:02d}"
+
+
+class _Stops:
+    def __init__(self, ps, default_service):
+        # plain lists: _simulate reads single cells in its inner loop
+        self.open = np.where(ps.tw_start != NO_TIME, ps.tw_start, 0).astype(float).tolist()
+        self.close = np.where(ps.tw_end != NO_TIME, ps.tw_end, DAY_MINUTES).astype(float).tolist()
+        lunch = (ps.lunch_start != NO_TIME) & (ps.lunch_end != NO_TIME) & (ps.lunch_end > ps.lunch_start)
+        self.lunch = [(float(a), float(b)) if ok else None
+                      for a, b, ok in zip(ps.lunch_start.tolist(), ps.lunch_end.tolist(), lunch.tolist())]
+        self.service = np.where(np.isfinite(ps.service), ps.service, float(default_service)).tolist()
+        self.vip = ps.vip.tolist()
+
+
+def _visit(i, arrival, stops):
+    """``(service_start, finish)`` at stop ``i`` when arriving at ``arrival``."""
+    start = max(arrival, stops.open[i])
+    lunch = stops.lunch[i]
+    if lunch is not None and start < lunch[1] and start + stops.service[i] > lunch[0]:
+        start = lunch[1]
+    return start, start + stops.service[i]
+
+
+def _simulate(order, travel, stops, day_start, detail=False):
+    t = day_start
+    prev = None
+    travel_total = wait = late = 0.0
+    late_stops = 0
+    rows = [] if detail else None
+    for i in order:
+        if prev is not None:
+            tt = travel[prev][i]
+            t += tt
+            travel_total += tt
+        arrival = t
+        start, finish = _visit(i, t, stops)
+        lateness = max(0.0, finish - stops.close[i])
+        wait += start - arrival
+        late += lateness
+        late_stops += lateness > 0
+        if detail:
+            rows.append((arrival, start, finish, start - arrival, lateness))
+        t = finish
+        prev = i
+    cost = (t - day_start) + LATE_WEIGHT * late
+    if detail:
+        return cost, {"travel": travel_total, "wait": wait, "late": late, "late_stops": late_stops,
+                      "end": t, "rows": rows}
+    return cost
+
+
+class _Schedule:
+    """Arrival / finish times of a route plus what ``insertion`` needs to price a stop in O(1).
+
+    ``slack[p]`` is the largest delay of the arrival at position ``p`` that
+    only shifts later stops (absorbed by waiting) without making any of
+    them late or pushing a service into its lunch break; ``waits[p]`` is
+    the waiting time from ``p`` to the end of the route.
+    """
+
+    def __init__(self, route, travel, stops, day_start):
+        self.route, self.travel, self.stops, self.day_start = route, travel, stops, day_start
+        n = len(route)
+        self.arrival = [0.0] * n
+        self.finish = [0.0] * n
+        wait = [0.0] * n
+        cap = [0.0] * n
+        t, late = day_start, 0.0
+        for p, i in enumerate(route):
+            if p:
+                t += travel[route[p - 1]][i]
+            start, finish = _visit(i, t, stops)
+            self.arrival[p], self.finish[p], wait[p] = t, finish, start - t
+            late += max(0.0, finish - stops.close[i])
+            c = max(0.0, stops.close[i] - finish)
+            lunch = stops.lunch[i]
+            if lunch is not None and finish <= lunch[0]:
+                c = min(c, lunch[0] - finish)
+            cap[p] = c
+            t = finish
+        self.end = t
+        self.cost = (t - day_start) + LATE_WEIGHT * late
+        self.slack = [float("inf")] * (n + 1)
+        self.waits = [0.0] * (n + 1)
+        for p in range(n - 1, -1, -1):
+            self.slack[p] = wait[p] + min(cap[p], self.slack[p + 1])
+            self.waits[p] = wait[p] + self.waits[p + 1]
+
+    def insertion(self, i, pos):
+        """``(cost increase, exact)`` of inserting stop ``i`` at ``pos``.
+
+        When ``exact`` is False the value is a lower bound (later stops are
+        delayed beyond their slack); ``_simulate`` gives the true cost.
+        """
+        route, travel, stops = self.route, self.travel, self.stops
+        t = self.day_start if pos == 0 else self.finish[pos - 1] + travel[route[pos - 1]][i]
+        _, finish = _visit(i, t, stops)
+        own = LATE_WEIGHT * max(0.0, finish - stops.close[i])
+        if pos == len(route):
+            return finish - self.end + own, True
+        delay = finish + travel[i][route[pos]] - self.arrival[pos]
+        return max(0.0, delay - self.waits[pos]) + own, 0.0 <= delay <= self.slack[pos] + 1e-9
+
+
+def solve_vrptw(points, dist, speed_kmh=40.0, day_start="09:00", default_service=10.0,
+                vip_first=True, time_limit=5.0):
+    """Schedule ``points`` respecting working hours, lunch and service time.
+
+    ``points`` is a PointSet or a list of point dicts; ``dist`` is a km
+    matrix aligned with it. Returns
+    ``(ordered_points, metrics)``; each returned point is a copy annotated
+    with its ``arrival``, ``service_start``, ``wait_min`` and ``late_min``.
+    """
+    n = len(points)
+    if n == 0:
+        return [], {"distance_km": 0.0}
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    t0 = time.perf_counter()
+    ps = PointSet.of(points)
+    stops = _Stops(ps, default_service)
+    start_min = float(clock_minutes(day_start) or 0)
+    d = np.asarray(dist, dtype=float)
+    finite = np.isfinite(d)
+    km = np.where(finite, d, (d[finite].max() if finite.any() else 1.0) * 10.0)
+    km_rows = km.tolist()
+    travel = (km / float(speed_kmh) * 60.0).tolist()
+    vip = stops.vip if vip_first else [False] * n
+
+    def out_of_time():
+        return deadline is not None and time.perf_counter() > deadline
+
+    def allowed(route, i):
+        # insertion positions keeping all VIP stops ahead of standard ones
+        nv = sum(1 for j in route if vip[j])
+        return range(0, nv + 1) if vip[i] else range(nv, len(route) + 1)
+
+    def best_insertion(sched, i, positions, bound=None):
+        # cheapest position; inexact prices are lower bounds, simulated only while they can still win
+        best = None
+        for pos in positions:
+            cost, exact = sched.insertion(i, pos)
+            limit = best[0] if best is not None else bound
+            if limit is not None and cost >= limit - 1e-9:
+                continue
+            if not exact:
+                route = sched.route
+                cost = _simulate(route[:pos] + [i] + route[pos:], travel, stops, start_min) - sched.cost
+                if limit is not None and cost >= limit - 1e-9:
+                    continue
+            best = (cost, pos)
+        return best
+
+    def distance_insert(route, j):
+        # out of time: plain cheapest insertion by kilometres
+        def added(pos):
+            prev = route[pos - 1] if pos > 0 else None
+            nxt = route[pos] if pos < len(route) else None
+            if prev is None:
+                return km_rows[j][nxt] if nxt is not None else 0.0
+            if nxt is None:
+                return km_rows[prev][j]
+            return km_rows[prev][j] + km_rows[j][nxt] - km_rows[prev][nxt]
+        route.insert(min(allowed(route, j), key=added), j)
+
+    # cheapest insertion, VIPs and earliest closing times first, then by GNN score when scored
+    tie = range(n) if ps.score is None else np.argsort(np.argsort(-ps.score, kind="stable")).tolist()
+    pending = sorted(range(n), key=lambda i: (not vip[i], stops.close[i], tie[i]))
+    route = []
+    timed_out = False
+    for idx, i in enumerate(pending):
+        if out_of_time():
+            timed_out = True
+            for j in pending[idx:]:
+                distance_insert(route, j)
+            break
+        sched = _Schedule(route, travel, stops, start_min)
+        route.insert(best_insertion(sched, i, allowed(route, i))[1], i)
+
+    # relocate / swap local search
+    best_cost = _simulate(route, travel, stops, start_min)
+    near = neighbor_lists(km, SWAP_NEIGHBORS)
+    improved = not timed_out
+    while improved and not timed_out:
+        improved = False
+        where = {c: p for p, c in enumerate(route)}
+        for k in range(n):
+            if out_of_time():
+                timed_out = True
+                break
+            i = route[k]
+            rest = route[:k] + route[k + 1:]
+            sched = _Schedule(rest, travel, stops, start_min)
+            move = best_insertion(sched, i, [pos for pos in allowed(rest, i) if pos != k],
+                                  bound=best_cost - 1e-6 - sched.cost)
+            if move is not None:
+                route = rest[:move[1]] + [i] + rest[move[1]:]
+                best_cost, improved = _simulate(route, travel, stops, start_min), True
+                break
+            for m in sorted(where[c] for c in near[i]):
+                if m == k or vip[route[m]] != vip[i]:
+                    continue
+                cand = list(route)
+                cand[k], cand[m] = cand[m], cand[k]
+                cost = _simulate(cand, travel, stops, start_min)
+                if cost < best_cost - 1e-6:
+                    route, best_cost, improved = cand, cost, True
+                    break
+            if improved:
+                break
+
+    _, info = _simulate(route, travel, stops, start_min, detail=True)
+    ordered = points.to_dicts(route) if isinstance(points, PointSet) else [dict(points[i]) for i in route]
+    for p, (arrival, start, finish, wait, late) in zip(ordered, info["rows"]):
+        p.update(arrival=minutes_clock(arrival), service_start=minutes_clock(start),
+                 wait_min=round(wait, 1), late_min=round(late, 1))
+    legs = [km[route[j]][route[j + 1]] for j in range(n - 1) if finite[route[j], route[j + 1]]]
+    metrics = {
+        "distance_km": float(sum(legs)),
+        "travel_time_min": info["travel"],
+        "wait_time_min": info["wait"],
+        "lateness_min": info["late"],
+        "late_stops": info["late_stops"],
+        "route_start": minutes_clock(start_min),
+        "route_end": minutes_clock(info["end"]),
+        "solve_time_s": time.perf_counter() - t0,
+        "timed_out": timed_out,
+    }
+    return ordered, metrics
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from core.utils import haversine
+
+os.environ.setdefault("FLASK_SECRET_KEY", "test-secret")  # app.py / asgi.py refuse to start without one
+
+
+class MatrixStub:
+    """Local Distance Matrix API: road distance = 1.3 x haversine, in meters.
+
+    Only the requested ``metrics`` are answered; request bodies are kept
+    in ``bodies``.
+    """
+
+    def __init__(self, max_cells=None):
+        self.max_cells = max_cells
+        self.fail_next = 0  # answer this many requests with HTTP 503
+        self.requests = []
+        self.bodies = []
+        self.url = None
+
+
+def _handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            origins, dests = body['origins'], body['destinations']
+            stub.requests.append((len(origins), len(dests)))
+            stub.bodies.append(body)
+            if stub.fail_next > 0:
+                stub.fail_next -= 1
+                self.send_response(503)
+                self.end_headers()
+                return
+            if stub.max_cells is not None and len(origins) * len(dests) > stub.max_cells:
+                self.send_response(400)
+                self.end_headers()
+                return
+            per_km = {"distance": 1300.0, "duration": 120.0}
+            metrics = [k for k in body.get('metrics', []) if k in per_km]
+            matrix = [[{k: {"value": per_km[k] * haversine(o['lon'], o['lat'], d['lon'], d['lat'])} for k in metrics}
+                       for d in dests] for o in origins]
+            data = json.dumps({"matrix": matrix}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+
+@pytest.fixture
+def matrix_server():
+    stub = MatrixStub()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _handler(stub))
+    stub.url = f"http://127.0.0.1:{server.server_address[1]}/v2/distancematrix"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+import asgi
+from core.config import Config
+from core.jobs import JobManager
+
+SAMPLE = Path(__file__).parent.parent / 'data' / 'verification_list.csv'
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    config = Config()
+    config.YANDEX_API_KEY = None
+    config.MATRIX_CACHE_PATH = None
+    config.LOCAL_SEARCH_TIME_BUDGET = 0.5
+    config.RESULT_STORE_DIR = str(tmp_path / 'runs')
+    manager = JobManager(max_workers=1, config=config)
+    monkeypatch.setattr(asgi, 'jobs', manager)
+    monkeypatch.setattr(asgi, 'DATA_DIR', tmp_path / 'data')
+    with TestClient(asgi.app) as c:
+        yield c
+    manager.shutdown()
+
+
+def _upload(client, name='list.csv'):
+    return client.post('/upload', files={'file': (name, SAMPLE.read_bytes(), 'text/csv')})
+
+
+def _events(client, url):
+    events = []
+    with client.stream('GET', url) as resp:
+        assert resp.headers['content-type'].startswith('text/event-stream')
+        for line in resp.iter_lines():
+            if line.startswith('data: '):
+                events.append(json.loads(line[len('data: '):]))
+    return events
+
+
+def test_upload_streams_progress_and_serves_the_result(client, tmp_path):
+    resp = _upload(client)
+    assert resp.status_code == 202
+    body = resp.json()
+
+    events = _events(client, body['events_url'])
+    assert events[-1]['state'] == 'done', events
+    assert not list((tmp_path / 'data').iterdir())  # the upload is deleted with its job
+    result = client.get(f"/jobs/{body['job_id']}/result").json()
+    assert result['mode'] == 'fallback' and len(result['ordered_ids']) == 20
+    assert client.get('/last_url').text.startswith('https://yandex.ru/maps/')
+
+    # a cached job ends its event stream at once
+    again = _upload(client).json()
+    assert [e['state'] for e in _events(client, again['events_url'])] == ['done']
+    assert not list((tmp_path / 'data').iterdir())
+    assert 'http_request_duration_seconds' in client.get('/metrics').text
+
+
+def test_rejected_uploads_and_unknown_jobs(client):
+    assert _upload(client, name='list.exe').status_code == 400
+    assert client.post('/upload', data={'other': 'x'}).status_code == 400
+    assert client.get('/jobs/nope').status_code == 404
+    assert client.get('/jobs/nope/events').status_code == 404
+    assert client.get('/jobs/nope/result').status_code == 404
+    assert client.post('/runs/%2E%2E/delta', json={'remove': [1]}).status_code == 400
+    assert client.post(f"/runs/{'0' * 32}/delta", json={'remove': [1]}).status_code == 404
@@ -0,0 +1,38 @@
+from pathlib import Path
+import numpy as np
+from core.config import Config
+from core.pipeline import prepare_graph, gnn_scores, batch_gnn_scores, run_pipeline_batch
+
+SAMPLE = Path(__file__).parent.parent / 'data' / 'verification_list.csv'
+
+
+def _inputs(tmp_path):
+    lines = SAMPLE.read_text(encoding='utf-8-sig').splitlines()
+    small = tmp_path / 'small.csv'
+    small.write_text('\n'.join(lines[:8]) + '\n', encoding='utf-8')
+    return [SAMPLE, small]
+
+
+def _config():
+    config = Config()
+    config.YANDEX_API_KEY = None
+    config.MATRIX_CACHE_PATH = None
+    config.LOCAL_SEARCH_TIME_BUDGET = 0.5
+    return config
+
+
+def test_batched_scores_match_single_graphs(tmp_path):
+    config = _config()
+    for mode in ('dense', 'knn'):
+        config.GRAPH_MODE = mode
+        prepared = [prepare_graph(p, config) for p in _inputs(tmp_path)]
+        batched = batch_gnn_scores([g[3] for g in prepared], [g[2] for g in prepared], config)
+        for (_, _, adj, feats), scores in zip(prepared, batched):
+            assert np.allclose(scores, gnn_scores(feats, adj, config), atol=1e-5)
+
+
+def test_run_pipeline_batch_writes_one_route_per_file(tmp_path):
+    outs = run_pipeline_batch(_inputs(tmp_path), output_dir=tmp_path / 'out', config=_config(), max_workers=2)
+    assert [len(o['ordered_ids']) for o in outs] == [20, 7]
+    assert (tmp_path / 'out' / 'verification_list' / 'route.json').exists()
+    assert (tmp_path / 'out' / 'small' / 'route.json').exists()
@@ -0,0 +1,22 @@
+import math
+import numpy as np
+from core.utils import haversine
+from core.distance import haversine_matrix, inverse_distance_adjacency, points_distance_matrix
+
+
+def test_haversine_matrix_matches_scalar():
+    lat = np.array([47.2289, 47.2601, 47.2150, 47.2400])
+    lon = np.array([39.7192, 39.7190, 39.6900, 39.7800])
+    d = haversine_matrix(lat, lon, block_size=3)
+    for i in range(4):
+        for j in range(4):
+            assert math.isclose(d[i, j], haversine(lon[i], lat[i], lon[j], lat[j]), abs_tol=1e-9)
+
+
+def test_missing_coordinates_are_masked():
+    points = [{'lat': 47.2, 'lon': 39.7}, {'lat': None, 'lon': None}, {'latitude': 47.3, 'longitude': 39.8}]
+    d = points_distance_matrix(points)
+    assert d[0, 1] == np.inf and d[1, 2] == np.inf
+    assert d[1, 1] == 0.0 and np.isfinite(d[0, 2])
+    adj = inverse_distance_adjacency(d)
+    assert adj[0, 1] == 0.0 and adj[1, 1] == 0.0 and adj[0, 2] > 0
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from core.config import Config
+from core.distance import haversine_matrix, inverse_distance_adjacency
+from core.features import FeatureCache, feature_key, features_for_config, node_features
+from core.points import PointSet
+
+
+def _points():
+    return PointSet.from_dicts([
+        {'id': 1, 'lat': 47.20, 'lon': 39.70, 'priority': 'VIP', 'service_time': 15,
+         'time_window_start': '09:00', 'time_window_end': '18:00', 'lunch_start': '13:00', 'lunch_end': '14:00'},
+        {'id': 2, 'lat': 47.25, 'lon': 39.75, 'priority': 'Standart',
+         'time_window_start': '14:00', 'time_window_end': '17:00', 'lunch_start': '13:00', 'lunch_end': '15:00'},
+        {'id': 3, 'lat': 47.30, 'lon': 39.60},
+    ])
+
+
+def test_default_features_match_the_original_layout():
+    ps = _points()
+    raw = node_features(ps, normalise=False)
+    assert raw.tolist() == [[47.20, 39.70, 1.0, 15.0], [47.25, 39.75, 0.0, 0.0], [47.30, 39.60, 0.0, 0.0]]
+    feats = node_features(ps)
+    assert np.allclose(feats[:, :2].mean(axis=0), 0.0) and np.allclose(feats[:, 2:], raw[:, 2:])
+
+
+def test_extra_features():
+    ps = _points()
+    adj = inverse_distance_adjacency(haversine_matrix(ps.lat, ps.lon))
+    raw = node_features(ps, adj, names=("tw_width", "lunch_overlap", "degree"), normalise=False)
+    assert raw[:, 0].tolist() == [9.0, 3.0, 0.0]
+    assert raw[:, 1].tolist() == [1.0, 1.0, 0.0]
+    assert np.allclose(raw[:, 2], np.log1p(adj.sum(axis=1)))
+    with pytest.raises(ValueError):
+        node_features(ps, names=("nope",))
+
+
+def test_features_are_cached_by_content():
+    config = Config()
+    cache = FeatureCache(max_entries=1)
+    first, hit = features_for_config(_points(), None, config, cache=cache)
+    assert not hit
+    again, hit = features_for_config(_points(), None, config, cache=cache)
+    assert hit and again is first and not again.flags.writeable
+    moved = _points()
+    moved.lat[0] += 0.01
+    assert feature_key(moved) != feature_key(_points())
+    assert not features_for_config(moved, None, config, cache=cache)[1]
+    assert cache.get(feature_key(_points())) is None  # evicted
+
+
+def test_feature_cache_directory(tmp_path):
+    FeatureCache(directory=tmp_path).put("k", np.ones((2, 2)))
+    assert FeatureCache(directory=tmp_path).get("k").tolist() == [[1.0, 1.0], [1.0, 1.0]]
@@ -0,0 +1,96 @@
+from pathlib import Path
+import numpy as np
+import pytest
+from core.config import Config
+from core.distance import haversine_matrix, point_coords
+from core.fleet import partition, exchange_pass, polish_route, repair_shifts, solve_fleet
+from core.pipeline import run_pipeline
+
+SAMPLE = Path(__file__).parent.parent / 'data' / 'verification_list.csv'
+
+
+def _blobs(per_blob=15, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = [(47.20, 39.60), (47.30, 39.80), (47.20, 39.85)]
+    return [{'id': f'{b}-{i}', 'lat': float(c[0] + rng.normal(0, 0.01)), 'lon': float(c[1] + rng.normal(0, 0.01))}
+            for b, c in enumerate(centers) for i in range(per_blob)]
+
+
+@pytest.mark.parametrize('method', ['kmeans', 'sweep'])
+def test_partition_respects_capacity(method):
+    points = _blobs()
+    labels = partition(*point_coords(points), 3, method=method, capacity=16)
+    assert len(set(labels)) == 3
+    assert np.bincount(labels).max() <= 16
+
+
+def test_kmeans_separates_blobs():
+    points = _blobs()
+    labels = partition(*point_coords(points), 3)
+    for b in range(3):
+        assert len(set(labels[b * 15:(b + 1) * 15])) == 1
+
+
+def test_partition_rejects_too_small_fleet():
+    with pytest.raises(ValueError):
+        partition(np.zeros(10), np.zeros(10), 2, capacity=4)
+
+
+def test_exchange_moves_misplaced_stop():
+    x = np.array([0.0, 1.0, 2.0, 10.0, 11.0, 3.0])
+    dist = np.abs(x[:, None] - x[None, :])
+    routes = [[0, 1, 2], [3, 4, 5]]
+    assert exchange_pass(routes, dist) >= 1
+    assert routes == [[0, 1, 2, 5], [3, 4]]
+
+
+def test_repair_shifts_moves_stops_to_routes_with_room():
+    x = np.array([0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 20.0])
+    dist = np.abs(x[:, None] - x[None, :])
+    routes = [[0, 1, 2, 3, 4, 5], [6]]
+    # 10 min service per stop: the first route needs 65 min, the second 10
+    left = repair_shifts(routes, dist, shift_minutes=55, speed_kmh=60, service_min=10)
+    assert left == 0 and sorted(routes[0] + routes[1]) == list(range(7))
+    assert all(len(r) * 10 + sum(abs(x[r[i]] - x[r[i + 1]]) for i in range(len(r) - 1)) <= 55 for r in routes)
+
+
+def test_solve_fleet_reports_unfixable_shifts():
+    points = _blobs()
+    dist = haversine_matrix(*point_coords(points))
+    stats = {}
+    routes = solve_fleet(points, dist, 3, shift_minutes=1, service_min=10, time_budget=0.3, stats=stats)
+    assert stats['over_shift_routes'] == len(routes)
+
+
+def test_polish_route_stays_inside_the_route():
+    rng = np.random.default_rng(1)
+    lat, lon = rng.uniform(47.15, 47.32, 400), rng.uniform(39.55, 39.85, 400)
+    dist = haversine_matrix(lat, lon)
+    route = rng.permutation(400)[:100].tolist()
+    stats = {}
+    polished = polish_route(route, dist, 5.0, stats=stats)
+    assert not stats['timed_out'] and polished[0] == route[0]
+    assert sorted(polished) == sorted(route)
+    length = lambda r: sum(dist[r[i], r[i + 1]] for i in range(len(r) - 1))
+    assert length(polished) < length(route)
+
+
+def test_solve_fleet_covers_every_stop():
+    points = _blobs()
+    dist = haversine_matrix(*point_coords(points))
+    routes = solve_fleet(points, dist, 3, capacity=20, time_budget=0.5)
+    assert len(routes) == 3
+    assert sorted(i for r in routes for i in r) == list(range(len(points)))
+
+
+def test_pipeline_fleet_mode(tmp_path):
+    config = Config()
+    config.YANDEX_API_KEY = None
+    config.MATRIX_CACHE_PATH = None
+    config.SOLVER_MODE = 'fleet'
+    config.VEHICLE_COUNT = 3
+    out = run_pipeline(SAMPLE, output_dir=tmp_path, config=config)
+    assert out['mode'] == 'fleet' and out['metrics']['vehicles'] == 3
+    assert sum(len(r['ordered_ids']) for r in out['routes']) == 20
+    assert out['metrics']['distance_km'] == pytest.approx(sum(r['metrics']['distance_km'] for r in out['routes']))
+    assert (tmp_path / 'route.json').exists()
@@ -0,0 +1,85 @@
+import numpy as np
+from core.distance import haversine_matrix
+from core import geocode
+from core.geocode import GeocodeCache, SpatialGrid, StubGeocoder, depot_grid, fill_coordinates, normalise_address
+
+
+def test_normalise_address_merges_spelling_variants():
+    a = normalise_address("344000, г. Ростов-на-Дону, улица Пушкинская, дом 10")
+    b = normalise_address("Город Ростов-на-Дону,  ул. ПУШКИНСКАЯ д.10")
+    assert a == b
+    assert normalise_address("Ёлочная") == normalise_address("елочная")
+    assert normalise_address(None) == ""
+
+
+def test_cache_round_trip_with_negative_entries(tmp_path):
+    cache = GeocodeCache(tmp_path / "geo.sqlite")
+    cache.store({"a": (47.2, 39.7), "b": None})
+    assert cache.lookup(["a", "b", "c"]) == {"a": (47.2, 39.7), "b": None}
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert len(cache) == 2
+    expired = GeocodeCache(tmp_path / "geo.sqlite", ttl=-1)
+    assert expired.lookup(["a"]) == {}
+    misses_expired = GeocodeCache(tmp_path / "geo.sqlite", negative_ttl=-1)
+    assert misses_expired.lookup(["a", "b"]) == {"a": (47.2, 39.7)}
+
+
+def _cols(addresses, lat, lon):
+    return {"address": np.array(addresses, dtype=object), "latitude": np.array(lat, dtype=float),
+            "longitude": np.array(lon, dtype=float)}
+
+
+def test_fill_coordinates_geocodes_each_address_once(tmp_path):
+    geocoder = StubGeocoder({"ул. Садовая, д. 1": (47.22, 39.71), "Other city street": (55.75, 37.62)})
+    cache = GeocodeCache(tmp_path / "geo.sqlite")
+    cols = _cols(["улица Садовая, дом 1", "ул Садовая д 1", "Other city street", "unknown", "kept"],
+                 [np.nan, np.nan, np.nan, np.nan, 47.0], [np.nan, np.nan, np.nan, np.nan, 39.0])
+    depots = SpatialGrid([47.23], [39.72], cell_km=2.0)
+    stats = fill_coordinates(cols, geocoder, cache, depots=depots, max_km=50)
+    assert geocoder.requests_made == 3
+    assert stats["geocode_rows"] == 4 and stats["geocode_unresolved"] == 2
+    assert cols["latitude"][:2].tolist() == [47.22, 47.22]
+    assert np.isnan(cols["latitude"][2])  # Moscow is too far from every depot
+    assert cols["latitude"][4] == 47.0
+
+    again = _cols(["ул. Садовая, д. 1"], [np.nan], [np.nan])
+    stats = fill_coordinates(again, StubGeocoder(), cache)
+    assert stats["geocode_cache_hits"] == 1 and stats["geocode_requests"] == 0
+    assert again["longitude"][0] == 39.71
+    # the stub's "not found" is not cached for a later real geocoder
+    assert cache.lookup(["unknown"]) == {}
+
+
+def test_spatial_grid_matches_brute_force():
+    rng = np.random.default_rng(0)
+    lat = 47.2 + rng.normal(0, 0.05, 300)
+    lon = 39.7 + rng.normal(0, 0.08, 300)
+    lat[7] = np.nan
+    grid = SpatialGrid(lat, lon, cell_km=0.5)
+    assert len(grid) == 299
+    ok = ~np.isnan(lat)
+    for qlat, qlon in [(47.2, 39.7), (47.35, 39.5), (48.0, 41.0)]:
+        d = haversine_matrix([qlat], [qlon], np.nan_to_num(lat), np.nan_to_num(lon))[0]
+        d[~ok] = np.inf
+        idx, km = grid.nearest(qlat, qlon)
+        assert idx == int(np.argmin(d)) and abs(km - d.min()) < 1e-9
+        near = grid.within(qlat, qlon, 3.0)
+        assert sorted(near.tolist()) == sorted(np.flatnonzero(d <= 3.0).tolist())
+    assert grid.nearest(48.0, 41.0, max_km=10) is None
+    assert SpatialGrid([], []).nearest(47.2, 39.7) is None
+
+
+def test_depot_grid_is_built_once_per_file_version(tmp_path, monkeypatch):
+    built = []
+
+    def from_file(path, cell_km=1.0):
+        built.append(path)
+        return SpatialGrid([47.23], [39.72], cell_km=cell_km)
+
+    monkeypatch.setattr(geocode.SpatialGrid, 'from_file', from_file)
+    path = tmp_path / 'depots.csv'
+    path.write_text('a\n')
+    assert depot_grid(path) is depot_grid(str(path))
+    path.write_text('a,b\n')
+    depot_grid(path)
+    assert len(built) == 2
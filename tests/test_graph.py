@@ -0,0 +1,37 @@
+import numpy as np
+import torch
+from core.distance import haversine_matrix, inverse_distance_adjacency
+from core.neighbors import knn_adjacency
+from core.gnn_model import SimpleGNN, adjacency_to_torch
+
+
+def _coords(n=30, seed=1):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(47.15, 47.32, n), rng.uniform(39.55, 39.85, n)
+
+
+def test_sparse_full_knn_matches_dense_scores():
+    lat, lon = _coords()
+    lat[3] = np.nan  # missing point has no edges in either mode
+    n = len(lat)
+    dense = inverse_distance_adjacency(haversine_matrix(lat, lon))
+    sparse = knn_adjacency(lat, lon, k=n - 1)
+    assert np.allclose(sparse.toarray(), dense)
+
+    torch.manual_seed(0)
+    model = SimpleGNN(in_dim=2).eval()
+    x = torch.tensor(np.column_stack([np.nan_to_num(lat), lon]), dtype=torch.float32)
+    with torch.no_grad():
+        s_dense = model(x, adjacency_to_torch(dense))
+        s_sparse = model(x, adjacency_to_torch(sparse))
+    assert torch.allclose(s_dense, s_sparse, atol=1e-5)
+
+
+def test_knn_degree_and_radius():
+    lat, lon = _coords(50)
+    adj = knn_adjacency(lat, lon, k=5)
+    assert (np.diff(adj.indptr) == 5).all()
+    assert adj.diagonal().sum() == 0
+    near = knn_adjacency(lat, lon, radius_km=2.0)
+    d = haversine_matrix(lat, lon)
+    assert near.nnz == int(((d <= 2.0) & (d > 0)).sum())
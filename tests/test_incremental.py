@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from core.config import Config
+from core.incremental import apply_delta, cheapest_insertion, reoptimise_run
+from core.result_store import ResultStore
+from core.utils import atomic_open
+from core.render import write_route_json
+
+
+def _line(x):
+    x = np.asarray(x, dtype=float)
+    return np.abs(x[:, None] - x[None, :])
+
+
+def test_cheapest_insertion_fills_the_gap():
+    dist = _line([0, 1, 3, 4, 2, 10])
+    assert cheapest_insertion([0, 1, 2, 3], [4, 5], dist) == [0, 1, 4, 2, 3, 5]
+
+
+def _route(n=30):
+    points = [{'id': i, 'lat': 47.2 + 0.002 * i, 'lon': 39.7, 'priority': 'VIP' if i == 5 else 'Standart'}
+              for i in range(n)]
+    return {'mode': 'fallback', 'ordered_ids': list(range(n)), 'ordered_points': points,
+            'metrics': {'distance_km': 0.0}}
+
+
+def _config():
+    config = Config()
+    config.YANDEX_API_KEY = None
+    config.MATRIX_CACHE_PATH = None
+    return config
+
+
+def test_apply_delta_adds_and_removes():
+    out = apply_delta(_route(), added=[{'id': 'new', 'latitude': 47.2 + 0.002 * 10.5, 'longitude': 39.7}],
+                      removed=['7', 20], config=_config())
+    ids = out['ordered_ids']
+    assert sorted(map(str, ids)) == sorted([str(i) for i in range(30) if i not in (7, 20)] + ['new'])
+    assert ids[0] == 5  # VIP rule still applies
+    assert ids.index('new') == ids.index(10) + 1
+    assert out['metrics']['added'] == 1 and out['metrics']['removed'] == 2
+
+
+def test_apply_delta_rejects_bad_input():
+    with pytest.raises(ValueError):
+        apply_delta(_route(), removed=['nope'], config=_config())
+    with pytest.raises(ValueError):
+        apply_delta(_route(), added=[{'id': 'x'}], config=_config())
+    with pytest.raises(ValueError):
+        apply_delta({**_route(), 'mode': 'fleet'}, config=_config())
+
+
+def test_reoptimise_run_stores_a_child_run(tmp_path):
+    store = ResultStore(tmp_path / 'runs')
+    tmp = store.begin()
+    with atomic_open(tmp / 'route.json') as f:
+        write_route_json(f, _route())
+    store.commit(tmp, 'parent')
+    key, out = reoptimise_run(store, 'parent', removed=[3], config=_config())
+    assert out['parent_run'] == 'parent' and 3 not in out['ordered_ids']
+    assert store.lookup(key)['ordered_ids'] == out['ordered_ids']
+    assert reoptimise_run(store, 'missing', removed=[3], config=_config()) is None
@@ -0,0 +1,72 @@
+import subprocess
+import sys
+import numpy as np
+import pytest
+import torch
+from core import inference, model_registry
+from core.config import Config
+from core.distance import haversine_matrix, inverse_distance_adjacency
+from core.gnn_model import adjacency_to_torch
+from core.neighbors import knn_adjacency
+
+
+def _graph(n=40, seed=3):
+    rng = np.random.default_rng(seed)
+    lat, lon = rng.uniform(47.15, 47.32, n), rng.uniform(39.55, 39.85, n)
+    feats = np.column_stack([lat - lat.mean(), lon - lon.mean(), rng.random(n) < 0.2, rng.uniform(0, 20, n)])
+    return feats, lat, lon
+
+
+def _eager(model, feats, adj):
+    with torch.no_grad():
+        return model(torch.tensor(feats, dtype=torch.float32), adjacency_to_torch(adj)).numpy()
+
+
+def _config(kind, path):
+    config = Config()
+    config.GNN_BACKEND = kind
+    config.GNN_EXPORT_PATH = str(path)
+    return config
+
+
+def test_numpy_backend_matches_eager(tmp_path):
+    model = model_registry.get_model(4, seed=11)
+    path = inference.export_model(model, tmp_path / 'gnn.npz', 'npz')
+    feats, lat, lon = _graph()
+    config = _config('numpy', path)
+    for adj in (inverse_distance_adjacency(haversine_matrix(lat, lon)), knn_adjacency(lat, lon, k=6)):
+        assert np.allclose(inference.predict(feats, adj, config), _eager(model, feats, adj), atol=1e-5)
+    inference.clear()
+    model_registry.clear()
+
+
+@pytest.mark.parametrize('fmt, kind, module', [('torchscript', 'torchscript', None),
+                                                ('onnx', 'onnxruntime', 'onnxruntime')])
+def test_exported_graph_matches_eager(tmp_path, fmt, kind, module):
+    if module:
+        pytest.importorskip(module)
+        pytest.importorskip('onnx')
+    model = model_registry.get_model(4, seed=11)
+    path = inference.export_model(model, tmp_path / f'gnn{inference.EXPORT_FORMATS[fmt]}', fmt)
+    feats, lat, lon = _graph(n=25)
+    adj = knn_adjacency(lat, lon, k=5)
+    scores = inference.predict(feats, adj, _config(kind, path))
+    assert np.allclose(scores, _eager(model, feats, adj), atol=1e-5)
+    inference.clear()
+    model_registry.clear()
+
+
+def test_backend_config_errors():
+    with pytest.raises(ValueError):
+        inference.backend_for_config(_config('tensorflow', 'x'))
+    with pytest.raises(ValueError):
+        inference.backend_for_config(_config('numpy', ''))
+
+
+def test_numpy_backend_does_not_load_torch(tmp_path):
+    path = inference.export_model(model_registry.get_model(4, seed=11), tmp_path / 'gnn.npz', 'npz')
+    code = ("import sys, numpy as np; from core.config import Config; from core.inference import predict; "
+            f"c = Config(); c.GNN_BACKEND = 'numpy'; c.GNN_EXPORT_PATH = {str(path)!r}; "
+            "predict(np.ones((3, 4)), np.ones((3, 3)), c); assert 'torch' not in sys.modules")
+    subprocess.run([sys.executable, '-c', code], check=True)
+    model_registry.clear()
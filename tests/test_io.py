@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from core.io import load_input, clock_minutes_column, NO_TIME
+from core.pipeline import extract_points
+
+
+def test_clock_minutes_column():
+    cells = ['09:00', '9:30', '13:00:00', '09:0018:00', '0900-1800', None, 'closed', '25:00']
+    assert clock_minutes_column(cells).tolist() == [540, 570, 780, 540, 540, NO_TIME, NO_TIME, NO_TIME]
+    assert clock_minutes_column(cells, part=1).tolist()[:5] == [540, 570, 780, 1080, 1080]
+
+
+def _frame(n=7):
+    return pd.DataFrame({
+        'Номер объекта': range(1, n + 1),
+        'Географическая широта': np.linspace(47.2, 47.3, n),
+        'Географическая долгота': np.linspace(39.6, 39.8, n),
+        'Уровень клиента': ['VIP'] + ['Standart'] * (n - 1),
+        'Время начала рабочего дня': ['09:0018:00'] * n,
+        'Время начала обеда': ['13:00'] * n,
+        'Время окончания обеда': ['14:00'] * n,
+    })
+
+
+def test_csv_chunks_match_whole_file(tmp_path):
+    path = tmp_path / 'points.csv'
+    _frame().to_csv(path, index=False)
+    whole, chunked = load_input(path), load_input(path, chunksize=3)
+    assert set(whole) == set(chunked)
+    for k in whole:
+        np.testing.assert_array_equal(whole[k], chunked[k])
+    assert whole['latitude'].dtype == np.float64 and whole['lunch_start'].dtype == np.int32
+    # the merged working-hours cell fills both window columns
+    assert whole['time_window_start'][0] == 540 and whole['time_window_end'][0] == 1080
+    assert np.isnan(whole['service_time']).all()
+
+
+def test_xlsx_is_read_as_excel(tmp_path):
+    path = tmp_path / 'points.xlsx'
+    _frame().to_excel(path, index=False)
+    points = extract_points(load_input(path))
+    assert len(points) == 7 and points[0]['priority'] == 'VIP'
+    assert points[0]['time_window_end'] == '18:00' and points[0]['lunch_start'] == '13:00'
+    assert points[0]['service_time'] is None
@@ -0,0 +1,60 @@
+import io
+import time
+from pathlib import Path
+import pytest
+import app as webapp
+from core.config import Config
+from core.jobs import JobManager
+
+SAMPLE = Path(__file__).parent.parent / 'data' / 'verification_list.csv'
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    config = Config()
+    config.YANDEX_API_KEY = None
+    config.MATRIX_CACHE_PATH = None
+    config.LOCAL_SEARCH_TIME_BUDGET = 0.5
+    config.RESULT_STORE_DIR = str(tmp_path / 'runs')
+    manager = JobManager(max_workers=1, config=config)
+    monkeypatch.setattr(webapp, 'jobs', manager)
+    monkeypatch.setattr(webapp, 'DATA_DIR', tmp_path / 'data')
+    yield webapp.app.test_client()
+    manager.shutdown()
+
+
+def _upload(client):
+    return client.post('/upload', data={'file': (io.BytesIO(SAMPLE.read_bytes()), 'list.csv')},
+                       content_type='multipart/form-data')
+
+
+def test_upload_returns_job_and_result_can_be_polled(client, tmp_path):
+    resp = _upload(client)
+    assert resp.status_code == 202
+    job_id = resp.get_json()['job_id']
+    deadline = time.time() + 120
+    while True:
+        status = client.get(f'/jobs/{job_id}').get_json()
+        if status['state'] in ('done', 'failed') or time.time() > deadline:
+            break
+        assert client.get(f'/jobs/{job_id}/result').status_code == 202
+        time.sleep(0.2)
+    assert status['state'] == 'done', status
+    result = client.get(f'/jobs/{job_id}/result').get_json()
+    assert result['mode'] == 'fallback' and len(result['ordered_ids']) == 20
+    assert (tmp_path / 'runs' / status['run_key'] / 'route.json').exists()
+    assert not list((tmp_path / 'data').iterdir())  # the upload is deleted with its job
+    assert client.get('/last_url').get_data(as_text=True).startswith('https://yandex.ru/maps/')
+
+    # an identical upload is served from the result store without recomputing
+    again = _upload(client).get_json()['job_id']
+    status = client.get(f'/jobs/{again}').get_json()
+    assert status['state'] == 'done' and status['cached']
+    assert client.get(f'/jobs/{again}/result').get_json()['ordered_ids'] == result['ordered_ids']
+
+
+def test_unknown_job(client):
+    assert client.get('/jobs/nope').status_code == 404
+    assert client.get('/jobs/nope/result').status_code == 404
+    assert client.post('/runs/nope/delta', json={'remove': [1]}).status_code == 400
+    assert client.post(f"/runs/{'0' * 32}/delta", json={'remove': [1]}).status_code == 404
@@ -0,0 +1,37 @@
+import numpy as np
+from core.distance import haversine_matrix, tour_distance
+from core.local_search import improve_tour, neighbor_lists
+from core.optimizer import _nearest_neighbor_order_from_matrix, _two_opt
+
+
+def _dist(n, seed):
+    rng = np.random.default_rng(seed)
+    return haversine_matrix(rng.uniform(47.15, 47.32, n), rng.uniform(39.55, 39.85, n))
+
+
+def test_improve_tour_is_valid_and_not_worse():
+    for seed in range(20):
+        dist = _dist(60, seed)
+        start = list(np.random.default_rng(seed).permutation(60))
+        tour = improve_tour(start, dist)
+        assert sorted(tour) == list(range(60)) and tour[0] == start[0]
+        assert tour_distance(tour, dist) < tour_distance(start, dist)
+
+
+def test_small_instances_are_two_opt_optimal():
+    # with full neighbour lists the gain criterion finds every improving 2-opt move
+    for seed in range(50):
+        dist = _dist(9, seed)
+        tour = improve_tour(list(range(9)), dist)
+        assert tour_distance(_two_opt(tour, dist), dist) >= tour_distance(tour, dist) - 1e-6
+
+
+def test_neighbor_lists_and_time_budget():
+    dist = _dist(300, 0)
+    nb = neighbor_lists(dist, k=5, block_size=64)
+    assert all(len(row) == 5 and i not in row for i, row in enumerate(nb))
+    assert nb[0] == list(np.argsort(dist[0])[1:6])
+    stats = {}
+    start = _nearest_neighbor_order_from_matrix(dist)
+    improve_tour(start, dist, time_budget=0.0, stats=stats)
+    assert stats['timed_out'] and stats['two_opt_moves'] == 0
@@ -0,0 +1,52 @@
+import time
+import numpy as np
+from core.matrix_cache import MatrixCache
+from core.optimizer import fetch_distance_matrix, try_yandex_route
+
+COORDS = [(47.2289, 39.7192), (47.2601, 39.7190), (47.2150, 39.6900), (47.2400, 39.7800)]
+
+
+def test_fetches_only_missing_pairs(matrix_server, tmp_path):
+    cache = MatrixCache(tmp_path / 'm.sqlite')
+    d1, s1 = fetch_distance_matrix(COORDS[:3], 'key', cache=cache, url=matrix_server.url)
+    assert s1['matrix_cache_hits'] == 0 and s1['matrix_cache_misses'] == 6
+    d2, s2 = fetch_distance_matrix(COORDS[:3], 'key', cache=cache, url=matrix_server.url)
+    assert s2['matrix_cache_hits'] == 6 and s2['matrix_cells_fetched'] == 0
+    assert np.allclose(d1, d2) and len(matrix_server.requests) == 1
+    d3, s3 = fetch_distance_matrix(COORDS, 'key', cache=cache, url=matrix_server.url)
+    assert s3['matrix_cache_hits'] == 6 and s3['matrix_cache_misses'] == 6
+    assert matrix_server.requests[-1] == (4, 4)
+    assert np.allclose(d3[:3, :3], d1)
+    # another routing profile does not share cells
+    _, s4 = fetch_distance_matrix(COORDS, 'key', cache=cache, url=matrix_server.url, profile='truck')
+    assert s4['matrix_cache_hits'] == 0
+    assert (cache.hits, cache.misses) == (12, 24)
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = MatrixCache(tmp_path / 'm.sqlite', max_entries=3)
+    for i, o in enumerate(COORDS):
+        cache.store('auto', [o], [COORDS[0]], [[1000.0 + i]])
+        time.sleep(0.01)
+    assert len(cache) == 3
+    dist, _ = cache.lookup('auto', COORDS, [COORDS[0]])
+    assert np.isnan(dist[0, 0]) and dist[3, 0] == 1003.0
+    cache.ttl = -1
+    assert np.isnan(cache.lookup('auto', COORDS, [COORDS[0]])[0]).all()
+
+
+def test_try_yandex_route_reports_cache_metrics(matrix_server, tmp_path):
+    points = [{'id': i, 'lat': lat, 'lon': lon} for i, (lat, lon) in enumerate(COORDS)]
+    cache = MatrixCache(tmp_path / 'm.sqlite')
+    res = try_yandex_route(points, 'key', cache=cache, url=matrix_server.url)
+    assert sorted(p['id'] for p in res['ordered_points']) == [0, 1, 2, 3]
+    res = try_yandex_route(points, 'key', cache=cache, url=matrix_server.url)
+    assert res['metrics']['matrix_cache_hits'] == 12 and res['metrics']['matrix_cells_fetched'] == 0
+
+
+def test_try_yandex_route_fills_stats(matrix_server):
+    points = [{'id': i, 'lat': lat, 'lon': lon} for i, (lat, lon) in enumerate(COORDS)]
+    stats = {}
+    res = try_yandex_route(points, 'key', url=matrix_server.url, stats=stats)
+    assert {'two_opt_moves', 'or_opt_moves', 'timed_out'} <= set(stats)
+    assert 'matrix_requests' in res['metrics']
@@ -0,0 +1,45 @@
+import numpy as np
+from core.distance import haversine_matrix
+from core.matrix_client import MatrixClient
+from core.optimizer import fetch_distance_matrix
+
+
+def _coords(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return list(zip(rng.uniform(47.15, 47.32, n), rng.uniform(39.55, 39.85, n)))
+
+
+def test_tiles_respect_limits():
+    client = MatrixClient('key', tile_size=10, max_cells=50)
+    tiles = client.tiles(23, 23)
+    assert all((r1 - r0) <= 10 and (r1 - r0) * (c1 - c0) <= 50 for r0, r1, c0, c1 in tiles)
+    covered = np.zeros((23, 23), dtype=int)
+    for r0, r1, c0, c1 in tiles:
+        covered[r0:r1, c0:c1] += 1
+    assert (covered == 1).all()
+
+
+def test_stitched_matrix_under_tile_limit(matrix_server):
+    matrix_server.max_cells = 100
+    coords = _coords(37)
+    client = MatrixClient('key', url=matrix_server.url, tile_size=10, max_workers=4)
+    dist, stats = fetch_distance_matrix(coords, 'key', client=client)
+    lat, lon = np.array(coords).T
+    assert np.allclose(dist, 1.3 * haversine_matrix(lat, lon))
+    assert stats['matrix_requests'] == 16 == len(matrix_server.requests)
+    assert max(o * d for o, d in matrix_server.requests) <= 100
+
+
+def test_retries_transient_errors(matrix_server):
+    matrix_server.fail_next = 2
+    client = MatrixClient('key', url=matrix_server.url, backoff=0.01, rate_limit=100)
+    dist, _ = client.fetch(_coords(3), _coords(3))
+    assert np.isfinite(dist).all() and len(matrix_server.requests) == 3
+
+
+def test_requests_distance_and_duration(matrix_server):
+    coords = _coords(4)
+    client = MatrixClient('key', url=matrix_server.url)
+    dist, dur = client.request(coords, coords)
+    assert set(matrix_server.bodies[0]['metrics']) == {'distance', 'duration'}
+    assert np.allclose(dur, dist / 1300.0 * 120.0)
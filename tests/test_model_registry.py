@@ -0,0 +1,25 @@
+import subprocess
+import sys
+import torch
+from core import model_registry
+
+
+def test_model_is_reused_and_deterministic(tmp_path):
+    model_registry.clear()
+    a = model_registry.get_model(4, seed=7)
+    assert model_registry.get_model(4, seed=7) is a
+    model_registry.clear()
+    b = model_registry.get_model(4, seed=7)
+    assert b is not a and not b.training
+    assert all(torch.equal(p, q) for p, q in zip(a.parameters(), b.parameters()))
+
+    path = tmp_path / 'gnn.pt'
+    torch.save(a.state_dict(), path)
+    c = model_registry.get_model(4, state_path=path, seed=None)
+    assert all(torch.equal(p, q) for p, q in zip(a.parameters(), c.parameters()))
+    model_registry.clear()
+
+
+def test_app_import_does_not_load_torch():
+    code = "import sys, app; assert 'torch' not in sys.modules"
+    subprocess.run([sys.executable, '-c', code], check=True)
@@ -0,0 +1,51 @@
+import time
+import numpy as np
+from core.distance import haversine_matrix, tour_distance
+from core.local_search import improve_tour, neighbor_lists
+from core.multistart import _cut_cycle, double_bridge, multi_start_tour, search
+from core.optimizer import _nearest_neighbor_order_from_matrix, nearest_neighbor_route
+
+
+def _dist(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return haversine_matrix(rng.uniform(47.15, 47.32, n), rng.uniform(39.55, 39.85, n))
+
+
+def test_double_bridge_and_cut_cycle_keep_a_valid_path():
+    rng = np.random.default_rng(1)
+    tour = list(range(50))
+    for _ in range(100):
+        new, touched = double_bridge(tour, rng)
+        assert sorted(new) == tour and new[0] == 0 and new != tour and touched
+    d = _dist(6)
+    path = _cut_cycle([3, 1, 0, 5, 2, 4], d)
+    assert path[0] == 0 and sorted(path) == list(range(6))
+
+
+def test_multi_start_is_valid_and_not_worse_than_single_start():
+    dist = _dist(150, seed=4)
+    single = improve_tour(_nearest_neighbor_order_from_matrix(dist), dist, time_budget=None)
+    for workers in (1, 2):
+        stats = {}
+        tour = multi_start_tour(dist, starts=4, workers=workers, time_budget=1.0, seed=0, stats=stats)
+        assert sorted(tour) == list(range(150)) and tour[0] == 0
+        assert tour_distance(tour, dist) <= tour_distance(single, dist) + 1e-9
+        assert stats['starts'] == 4 and stats['ils_rounds'] > 0
+
+
+def test_nearest_neighbor_route_multi_start():
+    rng = np.random.default_rng(2)
+    points = [{'id': i, 'lat': rng.uniform(47.15, 47.32), 'lon': rng.uniform(39.55, 39.85),
+               'priority': 'VIP' if i == 9 else 'Standart'} for i in range(40)]
+    ordered, metrics = nearest_neighbor_route(points, time_budget=0.3, starts=3, workers=1)
+    assert ordered[0]['id'] == 9 and len(ordered) == 40
+    single, base = nearest_neighbor_route(points, time_budget=0.3)
+    assert metrics['distance_km'] <= base['distance_km'] + 1e-9
+
+
+
+def test_first_descent_stops_at_the_deadline():
+    d = _dist(2000, seed=5)
+    _, tour, stats = search(d, neighbor_lists(d, 10), 0, 0, deadline=time.time())
+    assert stats['timed_out'] and stats['ils_rounds'] == 0
+    assert sorted(tour) == list(range(2000))
@@ -1,8 +1,23 @@
 from core.pipeline import run_pipeline
 from core.config import Config
-from pathlib import Path
+from core.io import load_input
+from benchmarks.synthetic import write_csv
 
-def test_run_pipeline_smoke():
-    input_path = Path(__file__).parent.parent / 'data' / 'test_list.csv'
-    out = run_pipeline(input_path, output_dir=str(Path(__file__).parent.parent / 'results'), config=Config())
-    assert 'ordered_points' in out or 'yandex_payload' in out
+def _offline_config():
+    config = Config()
+    config.YANDEX_API_KEY = None
+    config.MATRIX_CACHE_PATH = None
+    config.LOCAL_SEARCH_TIME_BUDGET = 0.5
+    return config
+
+def test_run_pipeline_smoke(tmp_path):
+    input_path = write_csv(tmp_path / 'points.csv', 60, seed=1)
+    out = run_pipeline(input_path, output_dir=str(tmp_path / 'out'), config=_offline_config())
+    assert 'ordered_points' in out
+    assert sorted(p['id'] for p in out['ordered_points']) == list(range(1, 61))
+
+def test_synthetic_instances_are_reproducible(tmp_path):
+    a = load_input(write_csv(tmp_path / 'a.csv', 200, seed=3, merged=True))
+    b = load_input(write_csv(tmp_path / 'b.csv', 200, seed=3, merged=True))
+    assert (a['latitude'] == b['latitude']).all() and (a['priority'] == b['priority']).all()
+    assert (a['time_window_end'] > a['time_window_start']).all()
@@ -0,0 +1,38 @@
+import pickle
+import numpy as np
+from core.io import NO_TIME
+from core.optimizer import vip_order, _apply_vip_rules, nearest_neighbor_route
+from core.points import PointSet
+
+
+def _dicts():
+    return [{'id': f'p{i}', 'lat': 47.2 + i / 100, 'lon': 39.7, 'priority': 'VIP' if i in (2, 4) else 'Standart',
+             'time_window_start': '09:00', 'time_window_end': '18:00'} for i in range(6)]
+
+
+def test_from_dicts_is_columnar():
+    ps = PointSet.from_dicts(_dicts() + [{'id': 'x', 'latitude': '47.3', 'longitude': None}])
+    assert len(ps) == 7 and ps.lat.dtype == np.float64
+    assert ps.vip.tolist() == [False, False, True, False, True, False, False]
+    assert ps.tw_start[0] == 540 and ps.tw_end[0] == 1080 and ps.tw_start[6] == NO_TIME
+    assert ps.has_coords().tolist() == [True] * 6 + [False]
+    assert ps.priority[0] is ps.priority[1]  # interned
+
+
+def test_take_and_to_dicts():
+    ps = PointSet.from_dicts(_dicts())
+    ps.score = np.arange(6, dtype=float)
+    sub = pickle.loads(pickle.dumps(ps.take([5, 2])))
+    out = sub.to_dicts()
+    assert [p['id'] for p in out] == ['p5', 'p2']
+    assert out[1]['time_window_end'] == '18:00' and out[1]['gnn_score'] == 2.0
+    assert out[0]['lunch_start'] is None and out[0]['service_time'] is None
+
+
+def test_vip_order_matches_dict_rules():
+    points = _dicts()
+    ps = PointSet.from_dicts(points)
+    assert vip_order(range(6), ps.vip) == [2, 4, 0, 1, 3, 5]
+    assert [p['id'] for p in _apply_vip_rules(points)] == ['p2', 'p4', 'p0', 'p1', 'p3', 'p5']
+    ordered, _ = nearest_neighbor_route(ps)
+    assert [p['id'] for p in ordered[:2]] == ['p2', 'p4']
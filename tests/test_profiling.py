@@ -0,0 +1,61 @@
+import json
+import time
+from pathlib import Path
+from core.config import Config
+from core.pipeline import run_pipeline, STAGES
+from core.profiling import StageTimer, Histograms
+
+SAMPLE = Path(__file__).parent.parent / 'data' / 'verification_list.csv'
+
+
+def test_stage_timer_records_stages_spans_and_counters():
+    seen = []
+    timer = StageTimer(seen.append, trace_memory=True)
+    timer('load')
+    with timer.span('read'):
+        time.sleep(0.01)
+    timer('graph')
+    timer.count('two_opt_moves', 3)
+    timer.count('two_opt_moves')
+    m = timer.metrics()
+    assert seen == ['load', 'graph']
+    assert set(m['stages']) == {'load', 'load.read', 'graph'}
+    assert m['stages']['load']['wall_s'] >= m['stages']['load.read']['wall_s'] >= 0.01
+    assert m['counters'] == {'two_opt_moves': 4}
+
+
+def test_histograms_render_prometheus_text():
+    h = Histograms(buckets=(0.1, 1.0))
+    h.observe('lat_seconds', 0.05, endpoint='/upload')
+    h.observe('lat_seconds', 0.5, endpoint='/upload')
+    text = h.render()
+    assert '# TYPE lat_seconds histogram' in text
+    assert 'lat_seconds_bucket{endpoint="/upload",le="0.1"} 1' in text
+    assert 'lat_seconds_bucket{endpoint="/upload",le="+Inf"} 2' in text
+    assert 'lat_seconds_count{endpoint="/upload"} 2' in text
+
+
+def test_run_pipeline_writes_profile(tmp_path):
+    config = Config()
+    config.YANDEX_API_KEY = None
+    config.MATRIX_CACHE_PATH = None
+    config.LOCAL_SEARCH_TIME_BUDGET = 0.5
+    config.PROFILER = 'cprofile'
+    out = run_pipeline(SAMPLE, output_dir=tmp_path, config=config)
+    profile = json.loads((tmp_path / 'route.json').read_text(encoding='utf-8'))['metrics']['profile']
+    assert set(STAGES) <= set(profile['stages']) and 'graph.features' in profile['stages']
+    assert profile['counters']['points'] == 20 and 'two_opt_moves' in profile['counters']
+    assert out['metrics']['profile'] == profile
+    assert (tmp_path / 'profile.pstats').exists()
+
+
+def test_yandex_route_counts_only_integer_counters(tmp_path, matrix_server):
+    config = Config()
+    config.YANDEX_API_KEY = 'key'
+    config.YANDEX_MATRIX_URL = matrix_server.url
+    config.MATRIX_CACHE_PATH = None
+    config.LOCAL_SEARCH_TIME_BUDGET = 0.5
+    out = run_pipeline(SAMPLE, output_dir=tmp_path, config=config)
+    counters = out['metrics']['profile']['counters']
+    assert out['mode'] == 'yandex' and counters['matrix_requests'] >= 1
+    assert 'distance_km' not in counters and all(isinstance(v, int) for v in counters.values())
@@ -0,0 +1,35 @@
+import io
+import json
+import numpy as np
+from core.render import write_route_json, write_route_binary, build_leaflet_html
+
+
+def _out(n=50):
+    points = [{'id': i, 'client_name': f'</script>{i}', 'lat': 47.2 + i / 1000, 'lon': 39.7,
+               'priority': 'VIP' if i == 3 else 'Standart', 'gnn_score': i / n} for i in range(n)]
+    points[7]['lat'] = None
+    return {'mode': 'fallback', 'ordered_ids': [p['id'] for p in points], 'ordered_points': points,
+            'metrics': {'distance_km': 12.5, 'estimated_travel_time_min': 18.75}}
+
+
+def test_streamed_json_round_trips():
+    out, f = _out(), io.StringIO()
+    write_route_json(f, out)
+    assert json.loads(f.getvalue()) == out
+    assert '\n' not in f.getvalue()
+
+
+def test_npz_columns():
+    f = io.BytesIO()
+    write_route_binary(f, _out(), 'npz')
+    f.seek(0)
+    data = np.load(f)
+    assert data['id'][:3].tolist() == ['0', '1', '2'] and data['vip'].sum() == 1
+    assert np.isnan(data['lat'][7]) and json.loads(str(data['metrics']))['distance_km'] == 12.5
+
+
+def test_map_embeds_points_once():
+    html = build_leaflet_html(_out()['ordered_points'], _out()['metrics'])
+    assert 'L.marker(' not in html and 'markerClusterGroup' in html
+    assert html.count('"type":"Feature"') == 49  # the stop without coordinates is skipped
+    assert '</script>1' not in html
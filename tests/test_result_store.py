@@ -0,0 +1,66 @@
+import os
+import time
+from core.config import Config
+from core.result_store import ResultStore, input_key, is_run_key
+
+
+def test_key_depends_on_content_and_config(tmp_path):
+    a = tmp_path / 'a.csv'
+    a.write_text('x\n1\n')
+    config = Config()
+    key = input_key(a, config)
+    config.GRAPH_MODE = 'knn'
+    knn_key = input_key(a, config)
+    assert knn_key != key
+    config.JOB_WORKERS = 99  # execution-only setting
+    assert input_key(a, config) == knn_key
+    config.YANDEX_GEOCODER_KEY = 'old'
+    with_key = input_key(a, config)
+    config.YANDEX_GEOCODER_KEY = 'rotated'  # secrets only count as set / unset
+    assert input_key(a, config) == with_key
+    assert is_run_key(key) and not is_run_key('..') and not is_run_key(key.upper())
+
+
+def test_key_follows_road_model_contents(tmp_path):
+    a = tmp_path / 'a.csv'
+    a.write_text('x\n1\n')
+    config = Config()
+    config.ROAD_MODEL_PATH = str(tmp_path / 'road.npz')
+    missing = input_key(a, config)
+    (tmp_path / 'road.npz').write_bytes(b'v1')
+    fitted = input_key(a, config)
+    (tmp_path / 'road.npz').write_bytes(b'v2')
+    assert len({missing, fitted, input_key(a, config)}) == 3
+
+
+def test_key_follows_depots_and_gnn_state_contents(tmp_path):
+    a = tmp_path / 'a.csv'
+    a.write_text('x\n1\n')
+    config = Config()
+    config.DEPOTS_PATH = str(tmp_path / 'depots.csv')
+    config.GNN_STATE_PATH = str(tmp_path / 'gnn.pt')
+    (tmp_path / 'depots.csv').write_text('lat,lon\n47.2,39.7\n')
+    (tmp_path / 'gnn.pt').write_bytes(b'v1')
+    before = input_key(a, config)
+    (tmp_path / 'depots.csv').write_text('lat,lon\n47.31,39.8\n')
+    edited = input_key(a, config)
+    (tmp_path / 'gnn.pt').write_bytes(b'v2 retrained')
+    assert len({before, edited, input_key(a, config)}) == 3
+
+
+def test_commit_is_atomic_and_evicts_lru(tmp_path):
+    store = ResultStore(tmp_path / 'runs', max_runs=2)
+    for i, key in enumerate(['k1', 'k2', 'k3']):
+        tmp = store.begin()
+        assert store.lookup(key) is None
+        (tmp / 'route.json').write_text('{"n": %d}' % i)
+        store.commit(tmp, key)
+        os.utime(store.run_dir(key), (time.time() + i, time.time() + i))
+    assert store.lookup('k1') is None
+    assert store.lookup('k3') == {'n': 2}
+    # a losing concurrent writer keeps the published run
+    tmp = store.begin()
+    (tmp / 'route.json').write_text('{"n": -1}')
+    store.commit(tmp, 'k3')
+    assert store.lookup('k3') == {'n': 2}
+    assert not any(p.name.startswith('.tmp-') for p in store.root.iterdir())
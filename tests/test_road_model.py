@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from core.distance import haversine_matrix, tour_distance
+from core.local_search import neighbor_lists
+from core.matrix_cache import MatrixCache
+from core.matrix_client import MatrixClient
+from core.optimizer import fetch_cells, spatial_order, try_yandex_route
+from core.road_model import RoadModel
+
+RIVER_LAT = 47.23  # crossing it costs a detour
+
+
+def _coords(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(47.15, 47.32, n), rng.uniform(39.55, 39.85, n)
+
+
+def _samples(lat, lon):
+    h = haversine_matrix(lat, lon)
+    cross = (lat[:, None] < RIVER_LAT) != (lat[None, :] < RIVER_LAT)
+    road = h * np.where(cross, 1.8, 1.3)
+    i, j = np.nonzero(~np.eye(len(lat), dtype=bool))
+    return lat[i], lon[i], lat[j], lon[j], road[i, j] * 1000.0, road[i, j] * 90.0, cross[i, j]
+
+
+def test_fit_learns_detour_and_pace():
+    lat, lon = _coords(80)
+    olat, olon, dlat, dlon, dist_m, dur_s, cross = _samples(lat, lon)
+    model = RoadModel.fit(olat, olon, dlat, dlon, dist_m, dur_s)
+    err, base = model.error(olat, olon, dlat, dlon, dist_m)
+    assert err < 0.1 and err < base / 2
+    km, sec = model.predict_pairs(olat, olon, dlat, dlon)
+    h = dist_m / 1000.0 / np.where(cross, 1.8, 1.3)
+    assert np.median(km[cross] / h[cross]) > np.median(km[~cross] / h[~cross]) + 0.2
+    assert np.allclose(np.median(sec / km), 90.0, rtol=0.05)
+
+
+def test_predict_matrix_matches_pairs(tmp_path):
+    lat, lon = _coords()
+    olat, olon, dlat, dlon, dist_m, dur_s, _ = _samples(lat, lon)
+    model = RoadModel.fit(olat, olon, dlat, dlon, dist_m)
+    dist, dur = model.predict_matrix(lat, lon, block_size=7)
+    assert dist.shape == (60, 60) and np.all(np.diag(dist) == 0)
+    assert np.all(dist >= haversine_matrix(lat, lon) - 1e-9)
+    km, sec = model.predict_pairs(lat[:5], lon[:5], lat[5:10], lon[5:10])
+    assert np.allclose(km, dist[np.arange(5), np.arange(5, 10)])
+    # no durations in the samples: flat average speed
+    assert np.allclose(sec, km / model.speed_kmh * 3600.0)
+    path = model.save(tmp_path / 'road.npz')
+    again = RoadModel.load(path)
+    assert np.allclose(again.predict_matrix(lat, lon)[0], dist)
+
+    class Cfg:
+        ROAD_MODEL_PATH = str(tmp_path / 'missing.npz')
+    assert RoadModel.from_config(Cfg) is None
+    Cfg.ROAD_MODEL_PATH = str(path)
+    assert isinstance(RoadModel.from_config(Cfg), RoadModel)
+
+
+def test_fit_needs_enough_samples():
+    lat, lon = _coords(5)
+    with pytest.raises(ValueError):
+        RoadModel.fit(*_samples(lat, lon)[:6])
+
+
+def test_from_cache(tmp_path):
+    lat, lon = _coords(12)
+    coords = list(zip(lat.tolist(), lon.tolist()))
+    road_m = haversine_matrix(lat, lon) * 1300.0
+    cache = MatrixCache(tmp_path / 'm.sqlite')
+    cache.store('auto', coords, coords, road_m)
+    cols = cache.samples('auto')
+    assert len(cols[0]) == 12 * 12 and np.isnan(cols[5]).all()
+    assert len(cache.samples('auto', limit=10)[0]) == 10 and len(cache.samples('truck')[0]) == 0
+    model = RoadModel.from_cache(cache)
+    i, j = np.nonzero(~np.eye(12, dtype=bool))
+    assert model.error(lat[i], lon[i], lat[j], lon[j], road_m[i, j])[0] < 0.02
+
+
+def test_fetch_cells_requests_only_needed_blocks(matrix_server):
+    lat, lon = _coords(40)
+    coords = list(zip(lat.tolist(), lon.tolist()))
+    order = spatial_order(lat, lon)
+    assert sorted(order.tolist()) == list(range(40))
+    need = np.zeros((40, 40), dtype=bool)
+    need[3, 7] = need[20, 21] = True
+    client = MatrixClient('key', url=matrix_server.url, tile_size=10)
+    dist_m, stats = fetch_cells(coords, need, client)
+    assert stats['matrix_requests'] == len(matrix_server.requests) <= 2
+    assert sum(o * d for o, d in matrix_server.requests) < 40 * 40 / 4
+    assert np.isfinite(dist_m[need]).all()
+
+
+def test_fetch_cells_bills_at_most_twice_the_needed_cells(matrix_server):
+    lat, lon = _coords(300, seed=3)
+    coords = list(zip(lat.tolist(), lon.tolist()))
+    near = np.asarray(neighbor_lists(haversine_matrix(lat, lon), 10))
+    need = np.zeros((300, 300), dtype=bool)
+    need[np.repeat(np.arange(300), 10), near.ravel()] = True
+    need |= need.T
+    client = MatrixClient('key', url=matrix_server.url, tile_size=50, max_workers=1)
+    dist_m, stats = fetch_cells(coords, need, client)
+    billed = sum(o * d for o, d in matrix_server.requests)
+    assert stats['matrix_cells_needed'] == need.sum()
+    assert stats['matrix_cells_billed'] == billed <= 2 * need.sum()
+    assert np.isfinite(dist_m[need]).all()
+
+
+def test_sparse_route_fetches_candidate_edges(matrix_server, tmp_path):
+    lat, lon = _coords(40)
+    olat, olon, dlat, dlon, dist_m, _, _ = _samples(lat, lon)
+    model = RoadModel.fit(olat, olon, dlat, dlon, dist_m)
+    points = [{'id': i, 'lat': a, 'lon': b} for i, (a, b) in enumerate(zip(lat, lon))]
+    cache = MatrixCache(tmp_path / 'm.sqlite')
+    client = MatrixClient('key', url=matrix_server.url, tile_size=10)
+    res = try_yandex_route(points, 'key', cache=cache, client=client, road_model=model, sparse_k=5)
+    m = res['metrics']
+    assert 0 < m['matrix_cells_fetched'] < 40 * 39 and m['matrix_cells_estimated'] > 0
+    # every edge of the returned tour is an API distance (the stub answers 1.3 x haversine)
+    exact = haversine_matrix(lat, lon) * 1.3
+    assert np.isclose(m['distance_km'], tour_distance(res['order'], exact), rtol=1e-6)
+    assert sorted(res['order']) == list(range(40))
@@ -0,0 +1,74 @@
+import pickle
+import numpy as np
+from core import multistart
+from core.config import Config
+from core.distance import haversine_matrix, inverse_distance_adjacency
+from core.multistart import multi_start_tour
+from core.pipeline import route_and_write
+from core.shared_matrix import MatrixHandle, MatrixStore, attach, handle
+
+
+def _coords(n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(47.15, 47.32, n), rng.uniform(39.55, 39.85, n)
+
+
+def test_store_builds_once_and_maps_read_only(tmp_path):
+    lat, lon = _coords()
+    store = MatrixStore(tmp_path)
+    dist = store.haversine(lat, lon)
+    assert dist.dtype == np.float32 and not dist.flags.writeable
+    assert np.allclose(dist, haversine_matrix(lat, lon), atol=1e-3)
+    again = MatrixStore(tmp_path).haversine(lat, lon)
+    assert np.array_equal(again, dist) and (store.hits, store.misses) == (0, 1)
+    adj = store.adjacency(lat, lon, dist)
+    assert np.allclose(adj, inverse_distance_adjacency(haversine_matrix(lat, lon)), rtol=1e-3)
+    assert len(store) == 2
+    lat[0] += 0.01
+    assert not np.array_equal(store.haversine(lat, lon), dist)
+
+
+def test_handles_pickle_as_paths(tmp_path):
+    lat, lon = _coords()
+    dist = MatrixStore(tmp_path).haversine(lat, lon)
+    h = handle(dist)
+    assert isinstance(h, MatrixHandle) and len(pickle.dumps(h)) < 1000
+    assert np.array_equal(attach(h), dist)
+    assert not isinstance(handle(dist[1:]), MatrixHandle)  # views are not the whole file
+    plain = np.zeros((3, 3))
+    assert handle(plain) is plain and attach(plain) is plain
+
+
+def test_eviction_keeps_the_newest(tmp_path):
+    store = MatrixStore(tmp_path, max_bytes=1)
+    store.haversine(*_coords(seed=1))
+    newest = store.haversine(*_coords(seed=2))
+    assert len(store) == 1 and newest.shape == (50, 50)
+
+
+def test_multi_start_maps_a_stored_matrix(tmp_path):
+    dist = MatrixStore(tmp_path).haversine(*_coords(120, seed=3))
+    tour = multi_start_tour(dist, starts=2, workers=2, time_budget=1.0)
+    assert sorted(tour) == list(range(120)) and tour[0] == 0
+
+
+def test_route_and_write_hands_the_stored_matrix_to_multi_start(tmp_path, monkeypatch):
+    lat, lon = _coords(120, seed=4)
+    dist = MatrixStore(tmp_path / 'store').haversine(lat, lon)
+    points = [{'id': i, 'lat': a, 'lon': b} for i, (a, b) in enumerate(zip(lat.tolist(), lon.tolist()))]
+    scores = np.random.default_rng(4).random(120)
+
+    def no_copy(*args, **kwargs):
+        raise AssertionError('stored matrix copied into shared memory')
+
+    monkeypatch.setattr(multistart.shared_memory, 'SharedMemory', no_copy)
+    monkeypatch.setattr(multistart, '_startup', {})
+    config = Config()
+    config.YANDEX_API_KEY = None
+    config.MATRIX_CACHE_PATH = None
+    config.ROAD_MODEL_PATH = str(tmp_path / 'missing.npz')
+    config.LOCAL_SEARCH_STARTS = config.LOCAL_SEARCH_WORKERS = 2
+    config.LOCAL_SEARCH_TIME_BUDGET = 1.0
+    out = route_and_write(points, scores, handle(dist), tmp_path / 'out', config)
+    assert out['mode'] == 'fallback'
+    assert out['ordered_ids'][0] == int(np.argmax(scores)) and sorted(out['ordered_ids']) == list(range(120))
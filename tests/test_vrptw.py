@@ -0,0 +1,67 @@
+from pathlib import Path
+import numpy as np
+from core.config import Config
+from core.pipeline import run_pipeline
+from core.vrptw import solve_vrptw, clock_minutes
+
+SAMPLE = Path(__file__).parent.parent / 'data' / 'verification_list.csv'
+
+
+def _line(n, step_km=5.0):
+    x = np.arange(n) * step_km
+    return np.abs(x[:, None] - x[None, :])
+
+
+def test_respects_windows_and_lunch():
+    # 0 opens late, 2 closes early, 1 is at lunch when the courier would arrive
+    points = [
+        {'id': 0, 'time_window_start': '11:00', 'time_window_end': '18:00'},
+        {'id': 1, 'time_window_start': '09:00', 'time_window_end': '18:00',
+         'lunch_start': '09:00', 'lunch_end': '10:00'},
+        {'id': 2, 'time_window_start': '09:00', 'time_window_end': '09:30'},
+    ]
+    ordered, metrics = solve_vrptw(points, _line(3), speed_kmh=60, default_service=10)
+    assert [p['id'] for p in ordered][0] == 2
+    assert metrics['lateness_min'] == 0 and metrics['late_stops'] == 0
+    for p in ordered:
+        start = clock_minutes(p['service_start'])
+        assert start >= clock_minutes(p['time_window_start'])
+        if p.get('lunch_start'):
+            assert not clock_minutes(p['lunch_start']) <= start < clock_minutes(p['lunch_end'])
+
+
+def test_vips_come_first():
+    points = [{'id': i, 'priority': 'VIP' if i in (3, 5) else 'Standart'} for i in range(6)]
+    ordered, _ = solve_vrptw(points, _line(6))
+    assert {p['id'] for p in ordered[:2]} == {3, 5}
+
+
+def test_pipeline_vrptw_mode(tmp_path):
+    config = Config()
+    config.YANDEX_API_KEY = None
+    config.MATRIX_CACHE_PATH = None
+    config.SOLVER_MODE = 'vrptw'
+    out = run_pipeline(SAMPLE, output_dir=tmp_path, config=config)
+    assert out['mode'] == 'vrptw' and len(out['ordered_ids']) == 20
+    assert out['ordered_points'][0]['priority'] == 'VIP'
+    assert {'lateness_min', 'wait_time_min', 'route_end'} <= set(out['metrics'])
+    assert (tmp_path / 'route.json').exists()
+
+
+def test_timeout_places_remaining_stops_by_distance():
+    # out of time before the first insertion: stops still go where they add the fewest km
+    x = np.random.default_rng(0).permutation(200) * 1.0
+    dist = np.abs(x[:, None] - x[None, :])
+    points = [{'id': i} for i in range(200)]
+    ordered, metrics = solve_vrptw(points, dist, time_limit=0.0)
+    assert metrics['timed_out'] and len(ordered) == 200
+    assert metrics['distance_km'] == 199.0
+
+
+def test_larger_instance_finishes_within_limit():
+    rng = np.random.default_rng(1)
+    x, y = rng.uniform(0, 20, 150), rng.uniform(0, 20, 150)
+    dist = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+    points = [{'id': i, 'time_window_start': '09:00', 'time_window_end': '20:00'} for i in range(150)]
+    ordered, metrics = solve_vrptw(points, dist, time_limit=5.0)
+    assert len(ordered) == 150 and metrics['solve_time_s'] < 6.0
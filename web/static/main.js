@@ -3,6 +3,14 @@ document.addEventListener('DOMContentLoaded', () => {
   const fileInput = document.getElementById('file');
   const status = document.getElementById('status');
   const externalLink = document.getElementById('external-link');
+  const POLL_INTERVAL_MS = 1000;
+  const STAGE_LABELS = {
+    load: 'чтение файла',
+    graph: 'построение графа',
+    gnn: 'оценка GNN',
+    route: 'построение маршрута',
+    render: 'сохранение результатов'
+  };
 
   async function loadLastUrl() {
     try {
@@ -17,6 +25,49 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
 
+  const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+  function showProgress(job) {
+    const stage = STAGE_LABELS[job.stage];
+    status.textContent = 'Обработка' + (stage ? ': ' + stage : ' (в очереди)') + '...';
+  }
+
+  async function pollJob(jobId) {
+    for (;;) {
+      const res = await fetch(`/jobs/${jobId}`);
+      if (!res.ok) throw new Error(await res.text());
+      const job = await res.json();
+      if (job.state === 'done') return job;
+      if (job.state === 'failed') throw new Error(job.error || 'pipeline failed');
+      showProgress(job);
+      await sleep(POLL_INTERVAL_MS);
+    }
+  }
+
+  // Server-Sent Events where the server offers them (asgi.py), polling otherwise
+  function waitForJob(jobId, eventsUrl) {
+    if (!eventsUrl || !window.EventSource) return pollJob(jobId);
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(eventsUrl);
+      let settled = false;
+      source.addEventListener('status', (e) => {
+        const job = JSON.parse(e.data);
+        if (job.state === 'done' || job.state === 'failed') {
+          settled = true;
+          source.close();
+          if (job.state === 'done') resolve(job);
+          else reject(new Error(job.error || 'pipeline failed'));
+        } else {
+          showProgress(job);
+        }
+      });
+      source.onerror = () => {
+        source.close();
+        if (!settled) pollJob(jobId).then(resolve, reject);
+      };
+    });
+  }
+
   form.addEventListener('submit', async (e) => {
     e.preventDefault();
     const file = fileInput.files[0];
@@ -24,7 +75,7 @@ document.addEventListener('DOMContentLoaded', () => {
       status.textContent = 'Пожалуйста, выберите файл.';
       return;
     }
-    status.textContent = 'Загрузка и обработка...';
+    status.textContent = 'Загрузка...';
     externalLink.style.display = 'none';
 
     const fd = new FormData();
@@ -36,8 +87,16 @@ document.addEventListener('DOMContentLoaded', () => {
         status.textContent = 'Ошибка обработки: ' + txt;
         return;
       }
+      const { job_id: jobId, events_url: eventsUrl } = await resp.json();
+      try {
+        await waitForJob(jobId, eventsUrl);
+      } catch (err) {
+        status.textContent = 'Ошибка обработки: ' + err.message;
+        return;
+      }
       status.textContent = 'Файл обработан успешно.';
-      const url = await loadLastUrl();
+      const result = await (await fetch(`/jobs/${jobId}/result`)).json();
+      const url = result.map_url || await loadLastUrl();
       if (url) {
         externalLink.href = url;
         externalLink.style.display = 'inline-block';
@@ -48,4 +107,4 @@ document.addEventListener('DOMContentLoaded', () => {
       status.textContent = 'Ошибка загрузки: ' + err;
     }
   });
-});
\ No newline at end of file
+});